@@ -12,6 +12,10 @@ def format_number(number):
         return "0"
     return format(number / 10000, ',.2f')
 
+def changed_badge(stock):
+    """最近入库时新增或内容变化的股票在名称后显示标记"""
+    return '<span class="changed-badge">有更新</span>' if stock.get('changed') else ''
+
 def generate_html_report(prereport_date, exceed_date, high_change_stocks, exceed_area_stocks, high_profit_growth_stocks=None, exceed_area_report_info=None, query_date='auto'):
     """生成HTML报告"""
     logging.info("开始生成HTML报告...")
@@ -110,6 +114,14 @@ def generate_html_report(prereport_date, exceed_date, high_change_stocks, exceed
         text-decoration: underline;
         color: #1a0dab;
     }
+    .changed-badge {
+        margin-left: 4px;
+        padding: 0 4px;
+        font-size: 0.75em;
+        color: #fff;
+        background-color: #f0883e;
+        border-radius: 3px;
+    }
     
     /* 确保PC端嵌套表格内容居中 */
     .nested-table td {
@@ -243,7 +255,7 @@ def generate_html_report(prereport_date, exceed_date, high_change_stocks, exceed
         high_change_rows += f"""
         <tr class="stock-main-row">
             <td data-label="股票代码"><a href="https://www.kakasong.cn/webview?url=https://stockpage.10jqka.com.cn/{stock['0']}/" target="_blank" class="stock-link">{stock['0']}</a></td>
-            <td data-label="股票名称"><a href="https://www.kakasong.cn/webview?url=https://stockpage.10jqka.com.cn/{stock['0']}/" target="_blank" class="stock-link">{stock['1']}</a></td>
+            <td data-label="股票名称"><a href="https://www.kakasong.cn/webview?url=https://stockpage.10jqka.com.cn/{stock['0']}/" target="_blank" class="stock-link">{stock['1']}</a>{changed_badge(stock)}</td>
             <td data-label="预测指标">{stock['2']}</td>
             <td data-label="变动幅度" class="{change_class}">{float(stock['3']):+.2f}%</td>
             <td data-label="预测值(万元)">{format_number(stock['4'])}</td>
@@ -309,7 +321,7 @@ def generate_html_report(prereport_date, exceed_date, high_change_stocks, exceed
         exceed_rows += f"""
         <tr class="stock-main-row">
             <td data-label="股票代码"><a href="https://www.kakasong.cn/webview?url=https://stockpage.10jqka.com.cn/{stock['0']}/" target="_blank" class="stock-link">{stock['0']}</a></td>
-            <td data-label="股票名称"><a href="https://www.kakasong.cn/webview?url=https://stockpage.10jqka.com.cn/{stock['0']}/" target="_blank" class="stock-link">{stock['1']}</a></td>
+            <td data-label="股票名称"><a href="https://www.kakasong.cn/webview?url=https://stockpage.10jqka.com.cn/{stock['0']}/" target="_blank" class="stock-link">{stock['1']}</a>{changed_badge(stock)}</td>
             <td data-label="上期预测值(万元)">{format_number(stock['2'])} ({stock['7'][:4]}年{stock['7'][4:6]}月)</td>
             <td data-label="本期实际净利润(万元)">{format_number(stock['3'])} ({stock['8'][:4]}年{stock['8'][4:6]}月)</td>
             <td data-label="超预期倍数" class="positive-change">{exceed_rate:.2f}倍</td>
@@ -414,7 +426,7 @@ def generate_html_report(prereport_date, exceed_date, high_change_stocks, exceed
             growth_rows += f"""
             <tr class="stock-main-row">
                 <td data-label="股票代码"><a href="https://www.kakasong.cn/webview?url=https://stockpage.10jqka.com.cn/{stock['0']}/" target="_blank" class="stock-link">{stock['0']}</a></td>
-                <td data-label="股票名称"><a href="https://www.kakasong.cn/webview?url=https://stockpage.10jqka.com.cn/{stock['0']}/" target="_blank" class="stock-link">{stock['1']}</a></td>
+                <td data-label="股票名称"><a href="https://www.kakasong.cn/webview?url=https://stockpage.10jqka.com.cn/{stock['0']}/" target="_blank" class="stock-link">{stock['1']}</a>{changed_badge(stock)}</td>
                 <td data-label="净利润(万元)">{format_number(net_profit)}</td>
                 <td data-label="同比增长率" class="positive-change">{growth_rate:+.2f}%</td>
                 <td data-label="公告日期">{stock['4'] if stock.get('4') else ''}</td>
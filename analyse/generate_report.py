@@ -1,6 +1,6 @@
 import sys
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 # from dotenv import load_dotenv
 import akshare as ak
 from typing import Dict, Any, List, Tuple
@@ -13,6 +13,9 @@ import logging
 
 from analyse import createHtml
 from db.db_manager import db_manager
+from db.ingest.board import BOARDS, BOARD_MARKETS, classify_board, allowed_boards, split_except_prefixes
+from db.ingest.changes import get_changed_stocks
+from db.ingest.specs import REPORT_SPEC, PREREPORT_SPEC
 
 import analyse.date_utils as dateUtil
 
@@ -23,6 +26,21 @@ def load_config():
     except_stock_str = os.getenv('EXCEPT_STOCK', '')
     except_stock = except_stock_str.replace("'", "").split(',') if except_stock_str else []
     
+    # 排除的板块（sh_main/sz_main/chinext/star/bj/other），按入库时计算的board列过滤，可以使用索引
+    except_board_str = os.getenv('EXCEPT_BOARD', '')
+    except_board = [b.strip().lower() for b in except_board_str.replace("'", "").split(',') if b.strip()]
+    unknown_board = [b for b in except_board if b not in BOARDS]
+    if unknown_board:
+        logging.warning(f"EXCEPT_BOARD中有未知的板块: {unknown_board}，可选: {list(BOARDS)}")
+    
+    # 一组前缀恰好覆盖整个板块时（如300,301,302对应创业板）改为按板块排除，排除的股票不变；其余前缀仍使用 NOT LIKE
+    prefix_boards, except_stock = split_except_prefixes(except_stock)
+    if prefix_boards:
+        logging.info(f"EXCEPT_STOCK中的前缀覆盖了整个板块 {prefix_boards}，改为按板块排除")
+    except_board += [b for b in prefix_boards if b not in except_board]
+    if except_stock:
+        logging.info(f"EXCEPT_STOCK中的前缀 {except_stock} 不对应整个板块，按股票代码前缀排除")
+    
     return {
         'queryNum': int(os.getenv('QUERY_NUM', 5)),
         'multiple': {
@@ -38,7 +56,9 @@ def load_config():
             'high': float(os.getenv('NET_PROFIT_YOY_HIGH', 1000))  # 默认1000%
         },
         'queryDate': os.getenv('QUERY_DATE', 'auto'),
-        'exceptStock': except_stock  # 添加排除股票列表
+        'exceptStock': except_stock,  # 添加排除股票列表
+        'exceptBoard': except_board,  # 排除的板块
+        'changedHours': float(os.getenv('CHANGED_HOURS', 24))  # 标记最近N小时内新增或内容变化的股票，0表示不标记
     }
 
 
@@ -70,39 +90,32 @@ def check_data_availability(date):
     
     return count > 0
 
-def get_exceed_area_stocks(current_report_date, query_num, exceed_multiple_config):
-    """获取业绩超预期的股票
-    Returns:
-        tuple: (exceed_stocks, actual_report_date, report_info)
-        - exceed_stocks: 超预期股票列表
-        - actual_report_date: 实际使用的业绩报告期
-        - report_info: 期间信息字典
+def _exclude_stock_conditions(except_stock, params, except_board=None):
+    """生成排除板块和股票前缀的条件，参数追加到params中；没有排除条件时返回空字符串
+    排除板块转换为剩余板块的 board IN (...)，股票前缀仍使用 NOT LIKE
+    board为NULL（未补算板块）的记录不按板块排除，与按前缀排除时一致
     """
-    logging.info("\n=== 业绩超预期分析 ===")
-    logging.info("分析参数:")
+    conditions = []
+    if except_board:
+        boards = allowed_boards(except_board)
+        conditions.append(f"(board IS NULL OR board IN ({', '.join(['%s'] * len(boards))}))" if boards else "board IS NULL")
+        params.extend(boards)
+    for prefix in except_stock or []:
+        if prefix:
+            conditions.append("stock_code NOT LIKE %s")
+            params.append(f"{prefix}%")
+    if not conditions:
+        return ""
+    return "AND (" + " AND ".join(conditions) + ")"
 
-    exceed_multiple_low = exceed_multiple_config['low']
-    exceed_multiple_high = exceed_multiple_config['high']
-    # 从config中获取exceptStock
-    except_stock = []
-    try:
-        from db.db_manager import db_manager
-        from analyse import createHtml
-        # 导入配置
-        config = load_config()
-        except_stock = config.get('exceptStock', [])
-    except Exception as e:
-        logging.error(f"获取exceptStock配置失败: {e}")
-    
-    logging.info(f"- 超预期倍数范围: {exceed_multiple_low}~{exceed_multiple_high}倍")
-    logging.info(f"- 返回记录数限制: {query_num}")
-    logging.info(f"- 排除股票前缀: {except_stock}")
-    
-    # 报告SQL参数，初始只包含报告日期
-    report_params = [current_report_date]
-    
-    # 获取业绩报告数据SQL模板，每个股票取净利润最高的一条记录
-    base_report_sql = """
+def build_exceed_report_sql(report_date, except_stock, except_board=None):
+    """业绩超预期分析的当期业绩SQL，每个股票取净利润最高的一条记录
+    Returns:
+        tuple: (sql, params)
+    """
+    params = [report_date]
+    exclude = _exclude_stock_conditions(except_stock, params, except_board)
+    sql = """
     WITH StockProfit AS (
         SELECT 
             stock_code,
@@ -114,20 +127,9 @@ def get_exceed_area_stocks(current_report_date, query_num, exceed_multiple_confi
         FROM stock_report 
         WHERE report_date = %s
     """
-    
-    # 添加排除股票的条件 - 使用参数化查询
-    exclude_conditions = []
-    if except_stock:
-        for prefix in except_stock:
-            if prefix:
-                exclude_conditions.append("stock_code NOT LIKE %s")
-                report_params.append(f"{prefix}%")
-        
-        if exclude_conditions:
-            base_report_sql += "    AND (" + " AND ".join(exclude_conditions) + ")\n"
-    
-    # 完成WITH子句
-    base_report_sql += """
+    if exclude:
+        sql += f"    {exclude}\n"
+    sql += """
     )
     SELECT 
         stock_code,
@@ -138,11 +140,16 @@ def get_exceed_area_stocks(current_report_date, query_num, exceed_multiple_confi
     FROM StockProfit 
     WHERE rn = 1 order by notice_date desc,actual_profit DESC
     """
-    
-    report_sql = base_report_sql
-    
-    # 获取预告数据SQL模板，每个股票取预测值最高的一条记录
-    prereport_sql = """
+    return sql, tuple(params)
+
+def build_exceed_prereport_sql(report_date, except_stock, except_board=None):
+    """业绩超预期分析的预告SQL，每个股票取预测值最高的一条记录
+    Returns:
+        tuple: (sql, params)
+    """
+    params = [report_date]
+    exclude = _exclude_stock_conditions(except_stock, params, except_board)
+    sql = f"""
     WITH StockPredict AS (
         SELECT 
             stock_code,
@@ -152,7 +159,7 @@ def get_exceed_area_stocks(current_report_date, query_num, exceed_multiple_confi
             predict_indicator,
             ROW_NUMBER() OVER(PARTITION BY stock_code ORDER BY predict_value DESC) as rn
         FROM stock_prereport
-        WHERE report_date = %s
+        WHERE report_date = %s {exclude}
     )
     SELECT 
         stock_code,
@@ -163,11 +170,123 @@ def get_exceed_area_stocks(current_report_date, query_num, exceed_multiple_confi
     FROM StockPredict
     WHERE rn = 1
     """
+    return sql, tuple(params)
+
+def build_high_change_sql(report_date, config):
+    """业绩预告高变动分析SQL，每个股票取变动幅度最高的一条记录
+    Returns:
+        tuple: (sql, params)
+    """
+    multiple_low = int(config['multiple']['low'] * 100)
+    multiple_high = int(config['multiple']['high'] * 100) if config['multiple']['high'] != -1 else float('inf')
+    params = [report_date, multiple_low]
+    exclude = _exclude_stock_conditions(config.get('exceptStock', []), params, config.get('exceptBoard'))
+
+    sql = """
+    WITH RankedStocks AS (
+        SELECT 
+            stock_code, 
+            stock_name, 
+            predict_indicator, 
+            change_rate, 
+            predict_value, 
+            last_year_value, 
+            predict_type,
+            change_reason, 
+            notice_date,
+            ROW_NUMBER() OVER (PARTITION BY stock_code ORDER BY change_rate DESC) as rn
+        FROM stock_prereport 
+        WHERE report_date = %s 
+        AND change_rate >= %s
+    """
+    if exclude:
+        sql += f"    {exclude}\n"
+    sql += """
+    )
+    SELECT 
+        stock_code, 
+        stock_name, 
+        predict_indicator, 
+        change_rate, 
+        predict_value, 
+        last_year_value,
+        predict_type,
+        change_reason, 
+        notice_date
+    FROM RankedStocks 
+    WHERE rn = 1 
+    """
+    # 添加change_rate上限条件（如果有）
+    if multiple_high != float('inf'):
+        sql += " AND change_rate <= %s"
+        params.append(multiple_high)
+    sql += "  ORDER BY notice_date desc,change_rate desc LIMIT %s"
+    params.append(config['queryNum'])
+    return sql, tuple(params)
+
+def build_high_profit_growth_sql(report_date, config):
+    """净利润同比增长分析SQL
+    Returns:
+        tuple: (sql, params)
+    """
+    params = [report_date]
+    exclude = _exclude_stock_conditions(config.get('exceptStock', []), params, config.get('exceptBoard'))
+    sql = """
+    SELECT 
+        stock_code, 
+        stock_name,
+        net_profit,
+        net_profit_yoy,
+        notice_date
+    FROM stock_report
+    WHERE report_date = %s
+    AND net_profit > 0
+    """
+    if exclude:
+        sql += exclude + "\n"
+    sql += """
+    ORDER BY notice_date DESC, net_profit_yoy DESC
+    LIMIT %s
+    """
+    params.append(config['queryNum'])
+    return sql, tuple(params)
+
+def get_exceed_area_stocks(current_report_date, query_num, exceed_multiple_config):
+    """获取业绩超预期的股票
+    Returns:
+        tuple: (exceed_stocks, actual_report_date, report_info)
+        - exceed_stocks: 超预期股票列表
+        - actual_report_date: 实际使用的业绩报告期
+        - report_info: 期间信息字典
+    """
+    logging.info("\n=== 业绩超预期分析 ===")
+    logging.info("分析参数:")
+
+    exceed_multiple_low = exceed_multiple_config['low']
+    exceed_multiple_high = exceed_multiple_config['high']
+    # 从config中获取exceptStock
+    except_stock = []
+    except_board = []
+    try:
+        from db.db_manager import db_manager
+        from analyse import createHtml
+        # 导入配置
+        config = load_config()
+        except_stock = config.get('exceptStock', [])
+        except_board = config.get('exceptBoard', [])
+    except Exception as e:
+        logging.error(f"获取exceptStock配置失败: {e}")
+    
+    logging.info(f"- 超预期倍数范围: {exceed_multiple_low}~{exceed_multiple_high}倍")
+    logging.info(f"- 返回记录数限制: {query_num}")
+    logging.info(f"- 排除股票前缀: {except_stock}")
+    logging.info(f"- 排除板块: {except_board}")
+    
+    report_sql, report_params = build_exceed_report_sql(current_report_date, except_stock, except_board)
     
     try:
-        # 获取当期业绩数据
-        db_manager.execute(report_sql, tuple(report_params))
-        current_reports = {row[0]: row for row in db_manager.fetchall()}
+        # 获取当期业绩数据，流式读取整期结果
+        current_reports = {row[0]: row for row in db_manager.cached_query(report_sql, report_params, 'stock_report_header', current_report_date)}
         
         # 如果当期没有数据，获取上期数据
         # actual_report_date = current_report_date
@@ -185,42 +304,14 @@ def get_exceed_area_stocks(current_report_date, query_num, exceed_multiple_confi
         # current_prereport_date = actual_report_date
         # current_report_date = (actual_report_date)
         
-        # 预告SQL参数化查询 - 同样处理排除条件
-        prereport_params = [current_report_date]
-        prereport_sql_with_filter = prereport_sql
-        
-        # 如果有排除条件，添加到预告SQL中
-        if except_stock:
-            # 因为原始SQL已经有WHERE条件，这里使用AND添加
-            filter_conditions = []
-            for prefix in except_stock:
-                if prefix:
-                    filter_conditions.append("stock_code NOT LIKE %s")
-                    prereport_params.append(f"{prefix}%")
-            
-            if filter_conditions:
-                # 在WHERE子句后添加条件
-                where_index = prereport_sql.find("WHERE")
-                if where_index > 0:
-                    # 找到WHERE后的换行符位置
-                    newline_index = prereport_sql.find("\n", where_index)
-                    if newline_index > 0:
-                        # 在WHERE行的末尾添加AND条件
-                        prereport_sql_with_filter = prereport_sql[:newline_index] + " AND (" + " AND ".join(filter_conditions) + ")" + prereport_sql[newline_index:]
-        
         # 获取当期预告数据
-        if db_manager.execute(prereport_sql_with_filter, tuple(prereport_params)):
-            current_prereports = {row[0]: row for row in db_manager.fetchall()}
-        else:
-            current_prereports = {}
+        prereport_sql, prereport_params = build_exceed_prereport_sql(current_report_date, except_stock, except_board)
+        current_prereports = {row[0]: row for row in db_manager.cached_query(prereport_sql, prereport_params, 'stock_prereport_header', current_report_date)}
        
         # 获取上期预告数据
         prev_prereport_date = dateUtil.get_prevdate_by_date(current_report_date)
-        prereport_params[0] = prev_prereport_date  # 更新日期参数
-        if db_manager.execute(prereport_sql_with_filter, tuple(prereport_params)):
-            prev_prereports = {row[0]: row for row in db_manager.fetchall()}
-        else:
-            prev_prereports = {}
+        prereport_sql, prereport_params = build_exceed_prereport_sql(prev_prereport_date, except_stock, except_board)
+        prev_prereports = {row[0]: row for row in db_manager.cached_query(prereport_sql, prereport_params, 'stock_prereport_header', prev_prereport_date)}
         
         logging.info("\n数据周期:")
         logging.info(f"- 业绩报告期: {current_report_date}")
@@ -291,77 +382,14 @@ def get_high_change_stocks(report_date, config):
     logging.info(f"- 业绩变动倍数范围: {multiple_low/100}~{multiple_high/100 if multiple_high != float('inf') else '∞'}倍")
     logging.info(f"- 返回记录数限制: {query_num}")
     logging.info(f"- 排除股票前缀: {except_stock}")
+    logging.info(f"- 排除板块: {config.get('exceptBoard', [])}")
     
-    # 构建基础SQL
-    base_sql = """
-    WITH RankedStocks AS (
-        SELECT 
-            stock_code, 
-            stock_name, 
-            predict_indicator, 
-            change_rate, 
-            predict_value, 
-            last_year_value, 
-            predict_type,
-            change_reason, 
-            notice_date,
-            ROW_NUMBER() OVER (PARTITION BY stock_code ORDER BY change_rate DESC) as rn
-        FROM stock_prereport 
-        WHERE report_date = %s 
-        AND change_rate >= %s
-    """
-    
-    # 初始化参数列表
-    params = [report_date, multiple_low]
-    
-    # 添加排除股票的条件到WITH子句 - 使用参数化查询
-    exclude_conditions = []
-    if except_stock:
-        for prefix in except_stock:
-            if prefix:
-                exclude_conditions.append("stock_code NOT LIKE %s")
-                params.append(f"{prefix}%")  # 直接添加到params列表
-        
-        if exclude_conditions:
-            base_sql += "    AND (" + " AND ".join(exclude_conditions) + ")\n"
-    
-    # 完成WITH子句
-    base_sql += """
-    )
-    SELECT 
-        stock_code, 
-        stock_name, 
-        predict_indicator, 
-        change_rate, 
-        predict_value, 
-        last_year_value,
-        predict_type,
-        change_reason, 
-        notice_date
-    FROM RankedStocks 
-    WHERE rn = 1 
-    """
-    
-    # 添加change_rate上限条件（如果有）
-    if multiple_high != float('inf'):
-        base_sql += " AND change_rate <= %s"
-        params.append(multiple_high)
-    
-    # 添加排序和限制条件
-    base_sql += "  ORDER BY notice_date desc,change_rate desc LIMIT %s"
-    params.append(query_num)
-    
-    sql = base_sql
+    sql, params = build_high_change_sql(report_date, config)
     
     try:
-        # 执行SQL并检查是否成功
-        if db_manager.execute(sql, tuple(params)):
-            results = db_manager.fetchall()
-            logging.info(f"查询结果: {len(results)}条记录")
-            return results
-        else:
-            logging.error("SQL执行失败，无法获取结果")
-            return []
+        results = list(db_manager.cached_query(sql, params, 'stock_prereport_header', report_date))
+        logging.info(f"查询结果: {len(results)}条记录")
+        return results
     except Exception as e:
         logging.error(f"执行SQL出错: {e}")
         import traceback
@@ -390,50 +418,14 @@ def get_high_profit_growth_stocks(report_date, config):
     logging.info(f"- 净利润同比增长范围: {yoy_low}%~{yoy_high}%")
     logging.info(f"- 返回记录数限制: {query_num}")
     logging.info(f"- 排除股票前缀: {except_stock}")
+    logging.info(f"- 排除板块: {config.get('exceptBoard', [])}")
     
-    # 基础SQL
-    sql = """
-    SELECT 
-        stock_code, 
-        stock_name,
-        net_profit,
-        net_profit_yoy,
-        notice_date
-    FROM stock_report
-    WHERE report_date = %s
-    AND net_profit > 0
-    """
-    
-    # 参数列表初始化
-    params = [report_date]
-    
-    # 添加排除股票的条件 - 使用参数化查询
-    exclude_conditions = []
-    if except_stock:
-        for prefix in except_stock:
-            if prefix:  # 确保前缀不为空
-                exclude_conditions.append("stock_code NOT LIKE %s")
-                params.append(f"{prefix}%")
-        
-        if exclude_conditions:
-            sql += "AND (" + " AND ".join(exclude_conditions) + ")\n"
-    
-    # 添加排序和限制
-    sql += """
-    ORDER BY notice_date DESC, net_profit_yoy DESC
-    LIMIT %s
-    """
-    params.append(query_num)
+    sql, params = build_high_profit_growth_sql(report_date, config)
     
     try:
-        # 执行SQL并检查是否成功
-        if db_manager.execute(sql, tuple(params)):
-            results = db_manager.fetchall()
-            logging.info(f"查询结果: {len(results)}条记录")
-            return results
-        else:
-            logging.error("SQL执行失败，无法获取结果")
-            return []
+        results = list(db_manager.cached_query(sql, params, 'stock_report_header', report_date))
+        logging.info(f"查询结果: {len(results)}条记录")
+        return results
     except Exception as e:
         logging.error(f"执行SQL出错: {e}")
         import traceback
@@ -443,15 +435,9 @@ def get_high_profit_growth_stocks(report_date, config):
 def get_stock_fund_flow(stock_code):
     """获取单个股票的资金流数据"""
     try:
-        # 根据股票代码判断市场
-        market = ''
-        if stock_code.startswith('300'):
-            market = 'bj'
-        elif stock_code.startswith('6'):
-            market = 'sh'
-        elif stock_code.startswith(('001', '002', '003', '004')):
-            market = 'sz'
-        else:
+        # 根据股票代码所属板块判断市场，与入库时计算的board列使用同一套规则
+        market = BOARD_MARKETS.get(classify_board(stock_code))
+        if not market:
             return None
             
         # 获取资金流数据
@@ -461,14 +447,34 @@ def get_stock_fund_flow(stock_code):
         logging.error(f"获取股票 {stock_code} 资金流数据失败: {e}")
         return None
 
-def add_fund_flow_data(stocks: List[Tuple]) -> List[Dict[str, Any]]:
-    """为股票数据添加资金流信息"""
+def get_recent_changed_stocks(report_date, source_table, config):
+    """获取报告期内最近changedHours小时入库时新增或内容变化的股票代码
+    
+    Args:
+        report_date (str): 报告期日期，格式为YYYYMMDD
+        source_table (str): 明细表名，与变化记录表中的source_table一致
+        config (dict): 配置参数字典
+        
+    Returns:
+        set: 股票代码集合，未开启标记或报告期为空时返回空集合
+    """
+    hours = config.get('changedHours', 0)
+    if not report_date or hours <= 0:
+        return set()
+    since = datetime.now() - timedelta(hours=hours)
+    changed = set(get_changed_stocks(report_date, source_table, since))
+    logging.info(f"{source_table} 报告期 {report_date} 最近{hours:g}小时新增或变化的股票: {len(changed)}只")
+    return changed
+
+def add_fund_flow_data(stocks: List[Tuple], changed_stocks=None) -> List[Dict[str, Any]]:
+    """为股票数据添加资金流信息，并标记最近入库时新增或内容变化的股票"""
     enhanced_stocks = []
     for stock in stocks:
         stock_dict = {
             str(i): value for i, value in enumerate(stock)  # 将元组转换为字典以便添加额外数据
         }
         stock_dict['fund_flow'] = get_stock_fund_flow(stock[0])
+        stock_dict['changed'] = str(stock[0]) in changed_stocks if changed_stocks else False
         enhanced_stocks.append(stock_dict)
     return enhanced_stocks
 
@@ -493,15 +499,18 @@ def main():
     
         # 预报业绩变动
         high_change_stocks = get_high_change_stocks(prereport_date, config)
-        high_change_stocks_with_fund = add_fund_flow_data(high_change_stocks)
+        high_change_stocks_with_fund = add_fund_flow_data(
+            high_change_stocks, get_recent_changed_stocks(prereport_date, PREREPORT_SPEC.detail_table, config))
         
         # 实际业绩和预测比较报告
         exceed_area_stocks, current_report_date, report_info = get_exceed_area_stocks(exceed_date, config['queryNum'], config['exceedMultiple'])
-        exceed_area_stocks_with_fund = add_fund_flow_data(exceed_area_stocks)
+        exceed_area_stocks_with_fund = add_fund_flow_data(
+            exceed_area_stocks, get_recent_changed_stocks(current_report_date, REPORT_SPEC.detail_table, config))
 
         # 净利润同比增长分析
         high_profit_growth_stocks = get_high_profit_growth_stocks(exceed_date, config)
-        high_profit_growth_stocks_with_fund = add_fund_flow_data(high_profit_growth_stocks)
+        high_profit_growth_stocks_with_fund = add_fund_flow_data(
+            high_profit_growth_stocks, get_recent_changed_stocks(exceed_date, REPORT_SPEC.detail_table, config))
         
         # prev_period_date = get_prev_period_date(actual_report_date if actual_report_date else exceed_date)
         # 使用新的HTML生成模块
@@ -0,0 +1,113 @@
+import sys
+import os
+import time
+import random
+import argparse
+from datetime import date, timedelta
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+# 连接需要开启local_infile才能测试load_data方式，必须在导入db_manager之前设置
+os.environ.setdefault('DB_BULK_MODE', 'load_data')
+from tabulate import tabulate
+from db.db_manager import db_manager
+
+BENCH_TABLE = "bench_bulk_load"
+
+COLUMNS = ['report_date', 'seq_no', 'stock_code', 'stock_name', 'predict_indicator', 'performance_change',
+           'predict_value', 'change_rate', 'change_reason', 'predict_type', 'last_year_value', 'notice_date']
+
+def create_bench_table():
+    """
+    创建与stock_prereport结构一致（不含外键）的基准测试表
+    """
+    db_manager.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+    db_manager.execute(f"""
+        CREATE TABLE {BENCH_TABLE} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            report_date VARCHAR(20) NOT NULL,
+            seq_no INT,
+            stock_code VARCHAR(10),
+            stock_name VARCHAR(50),
+            predict_indicator VARCHAR(50),
+            performance_change TEXT,
+            predict_value DECIMAL(20,2),
+            change_rate DECIMAL(10,2),
+            change_reason TEXT,
+            predict_type VARCHAR(20),
+            last_year_value DECIMAL(20,2),
+            notice_date DATE,
+            INDEX idx_report_date (report_date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    db_manager.commit()
+
+def generate_rows(count):
+    """
+    生成模拟的业绩预告明细行，包含NULL值和含制表符、换行的文本
+    """
+    rows = []
+    for i in range(count):
+        rows.append((
+            '20250331',
+            i + 1,
+            f"{random.choice(['600', '000', '300', '688'])}{i % 1000:03d}",
+            f"股票{i}",
+            random.choice(['归属于上市公司股东的净利润', '扣除非经常性损益后的净利润', '营业收入']),
+            "预计净利润\t同比增长\n50%至80%",
+            round(random.uniform(-1e9, 1e9), 2) if i % 10 else None,
+            round(random.uniform(-100, 1000), 2),
+            "主营业务增长，\\成本下降",
+            random.choice(['预增', '略增', '扭亏', '首亏']),
+            round(random.uniform(-1e9, 1e9), 2),
+            date(2025, 1, 1) + timedelta(days=i % 120)
+        ))
+    return rows
+
+def run_strategy(mode, rows):
+    """
+    使用指定方式写入数据并返回耗时（秒）
+    """
+    db_manager.execute(f"TRUNCATE TABLE {BENCH_TABLE}")
+    start = time.perf_counter()
+    if not db_manager.bulk_insert(BENCH_TABLE, COLUMNS, rows, mode=mode):
+        return None
+    db_manager.commit()
+    elapsed = time.perf_counter() - start
+    
+    db_manager.execute(f"SELECT COUNT(*) FROM {BENCH_TABLE}")
+    written = db_manager.fetchone()[0]
+    if written != len(rows):
+        print(f"警告: {mode} 写入 {written} 行，预期 {len(rows)} 行")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="批量写入方式吞吐量基准测试")
+    parser.add_argument("--rows", type=int, default=5000, help="写入行数")
+    parser.add_argument("--modes", default="row,executemany,load_data", help="逗号分隔的写入方式")
+    args = parser.parse_args()
+    
+    if not db_manager.connect():
+        print("数据库连接失败")
+        return
+    
+    try:
+        create_bench_table()
+        rows = generate_rows(args.rows)
+        
+        results = []
+        for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+            elapsed = run_strategy(mode, rows)
+            if elapsed is None:
+                results.append([mode, "失败", "-"])
+            else:
+                results.append([mode, f"{elapsed:.3f}", f"{len(rows) / elapsed:,.0f}"])
+        if 'load_data' in args.modes and not db_manager._load_data_supported:
+            print("注意: 服务器不允许LOAD DATA LOCAL INFILE，load_data 已退回 executemany")
+        
+        print(f"写入 {len(rows)} 行到 {BENCH_TABLE}")
+        print(tabulate(results, headers=["方式", "耗时(秒)", "行/秒"]))
+    finally:
+        db_manager.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        db_manager.close()
+
+if __name__ == "__main__":
+    main()
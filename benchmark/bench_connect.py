@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+import argparse
+import statistics
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import pymysql
+from tabulate import tabulate
+from db.db_manager import db_manager
+
+def legacy_connect():
+    """
+    旧的连接方式：先无库连接执行建库语句，关闭后再连接目标库（两次握手 + 一次DDL）
+    """
+    conn = pymysql.connect(
+        host=db_manager.host,
+        user=db_manager.user,
+        password=db_manager.password,
+        charset=db_manager.charset
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db_manager.db_name}")
+    conn.close()
+    
+    conn = pymysql.connect(
+        host=db_manager.host,
+        user=db_manager.user,
+        password=db_manager.password,
+        database=db_manager.db_name,
+        charset=db_manager.charset
+    )
+    conn.close()
+
+def direct_connect():
+    """
+    新的连接方式：一次握手直接连接目标库
+    """
+    conn = db_manager._open_connection()
+    conn.close()
+
+def pooled_connect():
+    """
+    连接池方式：connect()/close()借出并归还池中连接
+    """
+    db_manager.connect()
+    db_manager.close()
+
+def measure(func, iterations):
+    """
+    执行指定次数并记录每次耗时
+
+    返回:
+        list: 每次调用的耗时（毫秒）
+    """
+    # 预热一次，排除首次DNS解析等影响
+    func()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="DBManager连接耗时基准测试")
+    parser.add_argument("--iterations", type=int, default=50, help="每种方式的连接次数")
+    args = parser.parse_args()
+    
+    if not db_manager.ensure_database():
+        print("数据库不可用，无法执行基准测试")
+        return
+    
+    cases = [("legacy (建库 + 两次握手)", legacy_connect), ("direct (一次握手)", direct_connect)]
+    if db_manager.pool is not None:
+        cases.append(("pooled (连接池复用)", pooled_connect))
+    
+    rows = []
+    for name, func in cases:
+        timings = sorted(measure(func, args.iterations))
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        rows.append([name, statistics.mean(timings), statistics.median(timings), p95, timings[-1]])
+    
+    print(f"连接耗时（毫秒），每种方式 {args.iterations} 次，服务器: {db_manager.host}")
+    print(tabulate(rows, headers=["方式", "平均", "中位数", "P95", "最大"], floatfmt=".2f"))
+
+if __name__ == "__main__":
+    main()
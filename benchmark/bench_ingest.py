@@ -0,0 +1,231 @@
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from tabulate import tabulate
+from benchmark.synthetic import make_yjyg_frame, make_yjbb_frame
+
+REPORT_DATE = '20250331'
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+FRAME_MAKERS = {
+    'prereport': make_yjyg_frame,
+    'report': make_yjbb_frame,
+}
+
+# 各阶段：紧凑类型转换、规范化、去重+指纹、首次入库、重复入库（全部已存在，只走比对去重）、upsert部分变化、整期重载
+STAGES = ['compact', 'normalize', 'fingerprint', 'ingest_new', 'dedupe_existing', 'upsert_changed', 'reload']
+
+def _configure_worker_env(sqlite_path):
+    """
+    子进程使用本地SQLite文件作为数据库替身，开启全量SQL追踪统计往返次数，必须在导入db_manager之前设置
+    """
+    os.environ['DB_BACKEND'] = 'sqlite'
+    os.environ['DB_SQLITE_PATH'] = sqlite_path
+    os.environ['DB_TRACE_ENABLED'] = 'true'
+    os.environ['DB_TRACE_SAMPLE_RATE'] = '1'
+    os.environ['FETCH_CACHE_ENABLED'] = 'false'
+
+def _mutate(df, spec, ratio, seed):
+    """
+    修改部分行的第一个数值列，模拟已发布记录的修订
+    """
+    source = next(src for _, src, kind in spec.columns if kind == 'number' and src in df.columns)
+    changed = df.copy()
+    mask = np.random.default_rng(seed).random(len(df)) < ratio
+    changed.loc[mask, source] = changed.loc[mask, source] + 1
+    return changed
+
+def run_worker(dataset, size, seed, sqlite_path, output):
+    """
+    在独立进程中执行一个数据集、一种行数的全部阶段，结果写入output指定的JSON文件
+    每个组合使用独立进程，峰值RSS不会被前一个组合抬高
+    """
+    _configure_worker_env(sqlite_path)
+    from db.db_manager import db_manager
+    from db import initDb
+    from db.ingest.engine import IngestionEngine
+    from db.ingest.specs import DATASET_SPECS
+    from db.ingest.normalize import normalize_frame, drop_duplicate_keys, add_row_fingerprints
+    from db.ingest.metrics import peak_rss_bytes
+    from db.ingest.dtypes import compact_frame, frame_memory
+
+    initDb.check_and_create_tables()
+    db_manager.close()
+
+    spec = DATASET_SPECS[dataset]
+    df = FRAME_MAKERS[dataset](size, seed=seed)
+    frame_mb = {'frame_mb_before': round(frame_memory(df) / 1024 / 1024, 2)}
+    changed = None
+    engine = IngestionEngine(spec, ingest_mode='insert', watermark_enabled=False)
+    upsert_engine = IngestionEngine(spec, ingest_mode='upsert', watermark_enabled=False)
+
+    def compact():
+        nonlocal changed
+        compact_frame(df, spec.dtypes)
+        frame_mb['frame_mb_after'] = round(frame_memory(df) / 1024 / 1024, 2)
+        changed = _mutate(df, spec, 0.1, seed)
+        return True
+
+    stage_funcs = {
+        'compact': compact,
+        'normalize': lambda: normalize_frame(df, spec.columns, {'report_date': REPORT_DATE}) is not None,
+        'fingerprint': lambda: not add_row_fingerprints(drop_duplicate_keys(df, spec.columns, spec.key_columns),
+                                                        spec.columns).empty,
+        'ingest_new': lambda: engine.ingest(df, REPORT_DATE),
+        'dedupe_existing': lambda: engine.ingest(df, REPORT_DATE),
+        'upsert_changed': lambda: upsert_engine.ingest(changed, REPORT_DATE),
+        'reload': lambda: engine.reload(df, REPORT_DATE),
+    }
+
+    results = []
+    for stage in STAGES:
+        db_manager.tracer.reset()
+        start = time.perf_counter()
+        ok = bool(stage_funcs[stage]())
+        elapsed = time.perf_counter() - start
+        totals = db_manager.tracer.totals()
+        peak = peak_rss_bytes()
+        results.append({
+            'dataset': dataset,
+            'size': size,
+            'stage': stage,
+            'ok': ok,
+            'seconds': round(elapsed, 4),
+            'rows_per_sec': round(size / elapsed, 1) if elapsed > 0 else None,
+            'round_trips': totals['statements'],
+            'db_ms': round(totals['total_ms'], 2),
+            'peak_rss_mb': round(peak / 1024 / 1024, 1) if peak is not None else None,
+        })
+    results[0].update(frame_mb)
+    db_manager.close()
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False)
+
+def run_case(dataset, size, seed):
+    """
+    启动子进程执行一个组合，返回各阶段结果列表，子进程失败时返回一条失败记录
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'result.json')
+        cmd = [sys.executable, os.path.abspath(__file__), '--worker', dataset, str(size),
+               '--seed', str(seed), '--sqlite-path', os.path.join(tmp, 'bench.db'), '--worker-output', output]
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if proc.returncode != 0 or not os.path.exists(output):
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"退出码 {proc.returncode}"
+            return [{'dataset': dataset, 'size': size, 'stage': '-', 'ok': False, 'error': error}]
+        with open(output, encoding='utf-8') as f:
+            return json.load(f)
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        return None
+
+def collect_meta(seed):
+    """
+    记录运行环境，便于不同版本之间的结果对比
+    """
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'backend': 'sqlite',
+        'seed': seed,
+        'chunk_size': int(os.getenv('INGEST_CHUNK_SIZE', 5000)),
+        'bulk_batch_size': int(os.getenv('DB_BULK_BATCH_SIZE', 1000)),
+    }
+
+def compare(results, baseline, threshold):
+    """
+    与基线结果对比各阶段吞吐量
+
+    参数:
+        results: list, 本次结果
+        baseline: list, 基线结果
+        threshold: float, 吞吐量低于基线的该比例时视为退化
+
+    返回:
+        list: 对比表格行
+        bool: 是否存在退化
+    """
+    base = {(r['dataset'], r['size'], r['stage']): r for r in baseline if r.get('rows_per_sec')}
+    rows, regressed = [], False
+    for r in results:
+        old = base.get((r['dataset'], r['size'], r['stage']))
+        if not old or not r.get('rows_per_sec'):
+            continue
+        ratio = r['rows_per_sec'] / old['rows_per_sec']
+        flag = ''
+        if ratio < threshold:
+            flag = '退化'
+            regressed = True
+        rows.append([r['dataset'], r['size'], r['stage'], old['rows_per_sec'], r['rows_per_sec'], f"{ratio:.2f}x",
+                     old['round_trips'], r['round_trips'], flag])
+    return rows, regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="入库吞吐量基准测试：模拟akshare数据，在本地SQLite上执行各入库阶段")
+    parser.add_argument("--sizes", default="1000,5000,50000,500000", help="逗号分隔的模拟数据行数")
+    parser.add_argument("--datasets", default="report,prereport", help="逗号分隔的数据集名称")
+    parser.add_argument("--seed", type=int, default=0, help="模拟数据随机种子")
+    parser.add_argument("--output", default=None, help="结果JSON文件，默认写入benchmark/results目录")
+    parser.add_argument("--compare", default=None, help="基线结果JSON文件，对比各阶段吞吐量")
+    parser.add_argument("--threshold", type=float, default=0.8, help="吞吐量低于基线的该比例时视为退化")
+    parser.add_argument("--worker", nargs=2, metavar=("DATASET", "SIZE"), help=argparse.SUPPRESS)
+    parser.add_argument("--sqlite-path", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], int(args.worker[1]), args.seed, args.sqlite_path, args.worker_output)
+        return
+
+    datasets = [d.strip() for d in args.datasets.split(',') if d.strip()]
+    unknown = [d for d in datasets if d not in FRAME_MAKERS]
+    if unknown:
+        parser.error(f"未知的数据集: {unknown}，可选: {list(FRAME_MAKERS)}")
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        for dataset in datasets:
+            print(f"运行 {dataset} {size}行 ...", flush=True)
+            results.extend(run_case(dataset, size, args.seed))
+
+    table = [[r['dataset'], r['size'], r['stage'], '是' if r['ok'] else '否', r.get('seconds'), r.get('rows_per_sec'),
+              r.get('round_trips'), r.get('peak_rss_mb'), r.get('error', '')] for r in results]
+    print(tabulate(table, headers=["数据集", "行数", "阶段", "成功", "耗时(秒)", "行/秒", "往返次数", "峰值RSS(MB)", "错误"]))
+    for r in results:
+        if 'frame_mb_before' in r:
+            print(f"{r['dataset']} {r['size']}行 数据内存: 转换前{r['frame_mb_before']}MB，转换后{r.get('frame_mb_after')}MB")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_ingest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': collect_meta(args.seed), 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows, regressed = compare(results, baseline['results'], args.threshold)
+        print(tabulate(rows, headers=["数据集", "行数", "阶段", "基线行/秒", "本次行/秒", "比例", "基线往返", "本次往返", ""]))
+        if regressed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
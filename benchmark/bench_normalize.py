@@ -0,0 +1,145 @@
+import sys
+import os
+import time
+import math
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from tabulate import tabulate
+from benchmark.synthetic import make_yjyg_frame, make_yjbb_frame
+from db.ingest.normalize import normalize_frame
+from db.ingest.specs import PREREPORT_COLUMNS, REPORT_COLUMNS
+
+REPORT_DATE = '20250331'
+
+def _legacy_date(value):
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').date()
+        except ValueError:
+            try:
+                return datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                return None
+    return value
+
+def legacy_prereport_rows(df):
+    """
+    原insert_preReport_data中的逐行处理方式，返回{列名: 值}字典列表
+    """
+    rows = []
+    for _, row in df.iterrows():
+        insert_data = {
+            'report_date': REPORT_DATE,
+            'seq_no': row.get('序号', 0),
+            'stock_code': row.get('股票代码', ''),
+            'stock_name': row.get('股票简称', ''),
+            'predict_indicator': row.get('预测指标', ''),
+            'performance_change': row.get('业绩变动', ''),
+            'predict_value': row.get('预测数值', 0),
+            'change_rate': row.get('业绩变动幅度', 0),
+            'change_reason': row.get('业绩变动原因', ''),
+            'predict_type': row.get('预告类型', ''),
+            'last_year_value': row.get('上年同期值', 0),
+            'notice_date': row.get('公告日期', None)
+        }
+        for key, value in insert_data.items():
+            if isinstance(value, (int, float)) and (pd.isna(value) or np.isnan(value)):
+                insert_data[key] = None
+        insert_data['notice_date'] = _legacy_date(insert_data['notice_date'])
+        rows.append(insert_data)
+    return rows
+
+def legacy_report_rows(df):
+    """
+    原insert_report_data中的逐行处理方式，返回{列名: 值}字典列表
+    """
+    rows = []
+    for _, row in df.iterrows():
+        insert_data = {
+            'report_date': REPORT_DATE,
+            'stock_code': str(row.get('股票代码', '')),
+            'stock_name': str(row.get('股票简称', '')),
+            'basic_eps': float(row.get('每股收益', None) or 0),
+            'diluted_eps': float(row.get('每股收益', None) or 0),
+            'revenue': float(row.get('营业总收入-营业总收入', None) or 0),
+            'revenue_yoy': float(row.get('营业总收入-同比增长', None) or 0),
+            'revenue_qoq': float(row.get('营业总收入-季度环比增长', None) or 0),
+            'net_profit': float(row.get('净利润-净利润', None) or 0),
+            'net_profit_yoy': float(row.get('净利润-同比增长', None) or 0),
+            'net_profit_qoq': float(row.get('净利润-季度环比增长', None) or 0),
+            'net_asset_per_share': float(row.get('每股净资产', None) or 0),
+            'roe': float(row.get('净资产收益率', None) or 0),
+            'cf_per_share': float(row.get('每股经营现金流量', None) or 0),
+            'gross_profit_margin': float(row.get('销售毛利率', None) or 0),
+            'industry': str(row.get('所处行业', '')),
+            'notice_date': row.get('最新公告日期', None)
+        }
+        for key, value in insert_data.items():
+            if isinstance(value, (int, float)) and (pd.isna(value) or np.isnan(value)):
+                insert_data[key] = None
+        insert_data['notice_date'] = _legacy_date(insert_data['notice_date'])
+        rows.append(insert_data)
+    return rows
+
+def _same_value(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-12)
+    return a == b
+
+def count_mismatches(legacy_rows, new_columns, new_rows):
+    """
+    比较两种方式生成的行，返回不一致的行数
+    按列名比较，新方式多出的派生列（行内容指纹、板块等）不参与比较
+    """
+    if len(legacy_rows) != len(new_rows):
+        return abs(len(legacy_rows) - len(new_rows))
+    positions = {column: i for i, column in enumerate(new_columns)}
+    return sum(
+        1 for old, new in zip(legacy_rows, new_rows)
+        if not all(_same_value(value, new[positions[column]]) for column, value in old.items())
+    )
+
+def time_call(func, repeat):
+    """
+    重复执行并返回最短耗时（秒）和最后一次的结果
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="入库数据规范化方式基准测试：逐行iterrows vs 列式向量化")
+    parser.add_argument("--sizes", default="5000,50000", help="逗号分隔的模拟数据行数")
+    parser.add_argument("--repeat", type=int, default=3, help="每种方式重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    cases = [
+        ('stock_preReport', make_yjyg_frame, legacy_prereport_rows, PREREPORT_COLUMNS),
+        ('stock_report', make_yjbb_frame, legacy_report_rows, REPORT_COLUMNS),
+    ]
+    results = []
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        for table, make_frame, legacy_func, spec in cases:
+            df = make_frame(size)
+            legacy_time, legacy_rows = time_call(lambda: legacy_func(df), args.repeat)
+            new_time, (new_columns, new_rows) = time_call(
+                lambda: normalize_frame(df, spec, {'report_date': REPORT_DATE}), args.repeat)
+            results.append([
+                table, size,
+                f"{legacy_time:.3f}", f"{new_time:.3f}",
+                f"{legacy_time / new_time:.1f}x",
+                count_mismatches(legacy_rows, new_columns, new_rows)
+            ])
+
+    print(tabulate(results, headers=["表", "行数", "逐行(秒)", "向量化(秒)", "加速比", "结果不一致行数"]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import sys
+import os
+import time
+import argparse
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from db.db_manager import db_manager
+
+def worker(thread_id, iterations, errors):
+    """
+    在同一个db_manager上交替执行execute/fetchall，校验读到的结果属于本线程
+    """
+    try:
+        for i in range(iterations):
+            if not db_manager.execute("SELECT %s, %s", (thread_id, i)):
+                errors.append((thread_id, i, "执行失败"))
+                continue
+            # 让出CPU，放大线程交错的概率
+            time.sleep(0)
+            rows = db_manager.fetchall()
+            if not rows or tuple(rows[0]) != (thread_id, i):
+                errors.append((thread_id, i, rows))
+    finally:
+        db_manager.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="DBManager多线程压力测试")
+    parser.add_argument("--threads", type=int, default=8, help="并发线程数")
+    parser.add_argument("--iterations", type=int, default=500, help="每个线程的查询次数")
+    args = parser.parse_args()
+    
+    errors = []
+    threads = [threading.Thread(target=worker, args=(t, args.iterations, errors)) for t in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    
+    total = args.threads * args.iterations
+    print(f"线程数: {args.threads}, 查询总数: {total}, 耗时: {elapsed:.2f}秒, {total / elapsed:.0f} 次/秒")
+    print(f"连接池统计: {db_manager.pool_stats()}")
+    if errors:
+        print(f"发现 {len(errors)} 个错误结果，例如: {errors[:5]}")
+        sys.exit(1)
+    print("所有结果均正确，没有发现游标状态串用")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# 与akshare接口返回结构一致的模拟数据，供基准测试使用，不访问网络
+
+_PREFIXES = ['600', '601', '000', '002', '300', '688', '830']
+
+def _stock_codes(rng, count):
+    # 股票代码在同一报告期内不重复，否则入库去重会把数据压缩到代码段容量；超出常见代码段容量时改用6位序号
+    if count <= len(_PREFIXES) * 1000:
+        pool = [f"{prefix}{n:03d}" for prefix in _PREFIXES for n in range(1000)]
+        return rng.choice(pool, count, replace=False).tolist()
+    return [f"{n:06d}" for n in rng.permutation(count)]
+
+def _notice_dates(rng, count, with_time=False):
+    days = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 120, count), unit='D')
+    fmt = '%Y-%m-%d 00:00:00' if with_time else '%Y-%m-%d'
+    return days.strftime(fmt).tolist()
+
+def make_yjyg_frame(count, seed=0, null_ratio=0.1):
+    """
+    生成模拟的业绩预告数据（stock_yjyg_em结构）
+
+    参数:
+        count: int, 行数
+        seed: int, 随机种子
+        null_ratio: float, 数值列中缺失值的比例
+
+    返回:
+        pandas.DataFrame: 中文列名的业绩预告数据
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        '序号': np.arange(1, count + 1),
+        '股票代码': _stock_codes(rng, count),
+        '股票简称': [f"股票{i}" for i in range(count)],
+        '预测指标': rng.choice(['归属于上市公司股东的净利润', '扣除非经常性损益后的净利润', '营业收入'], count),
+        '业绩变动': '预计净利润同比增长50%至80%',
+        '预测数值': rng.uniform(-1e9, 1e9, count).round(2),
+        '业绩变动幅度': rng.uniform(-100, 1000, count).round(2),
+        '业绩变动原因': '主营业务增长，成本下降',
+        '预告类型': rng.choice(['预增', '略增', '扭亏', '首亏', '预减'], count),
+        '上年同期值': rng.uniform(-1e9, 1e9, count).round(2),
+        '公告日期': _notice_dates(rng, count),
+    })
+    for column in ('预测数值', '业绩变动幅度', '上年同期值'):
+        df.loc[rng.random(count) < null_ratio, column] = np.nan
+    return df
+
+def make_yjbb_frame(count, seed=0, null_ratio=0.1):
+    """
+    生成模拟的业绩报告数据（stock_yjbb_em结构）
+
+    参数:
+        count: int, 行数
+        seed: int, 随机种子
+        null_ratio: float, 数值列中缺失值的比例
+
+    返回:
+        pandas.DataFrame: 中文列名的业绩报告数据
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        '序号': np.arange(1, count + 1),
+        '股票代码': _stock_codes(rng, count),
+        '股票简称': [f"股票{i}" for i in range(count)],
+        '每股收益': rng.uniform(-1, 5, count).round(4),
+        '营业总收入-营业总收入': rng.uniform(1e6, 1e11, count).round(2),
+        '营业总收入-同比增长': rng.uniform(-50, 300, count).round(2),
+        '营业总收入-季度环比增长': rng.uniform(-50, 300, count).round(2),
+        '净利润-净利润': rng.uniform(-1e8, 1e10, count).round(2),
+        '净利润-同比增长': rng.uniform(-100, 2000, count).round(2),
+        '净利润-季度环比增长': rng.uniform(-100, 300, count).round(2),
+        '每股净资产': rng.uniform(0, 20, count).round(4),
+        '净资产收益率': rng.uniform(-20, 40, count).round(2),
+        '每股经营现金流量': rng.uniform(-3, 3, count).round(4),
+        '销售毛利率': rng.uniform(0, 90, count).round(2),
+        '所处行业': rng.choice(['银行', '半导体', '医药制造', '汽车零部件', '软件开发'], count),
+        '最新公告日期': _notice_dates(rng, count, with_time=True),
+    })
+    for column in ('净利润-同比增长', '净利润-季度环比增长', '营业总收入-季度环比增长'):
+        df.loc[rng.random(count) < null_ratio, column] = np.nan
+    return df
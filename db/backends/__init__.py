@@ -0,0 +1,3 @@
+# 数据库后端：MySQL（默认）和SQLite（离线运行、基准测试）
+from db.backends.mysql_backend import MySQLBackend
+from db.backends.sqlite_backend import SQLiteBackend
@@ -0,0 +1,114 @@
+import pymysql
+import pymysql.cursors
+
+# 表示连接已断开的MySQL错误码：2006 server has gone away, 2013 lost connection, 2055 lost connection (system error)
+_DISCONNECT_ERRORS = (2006, 2013, 2055)
+# 表示服务器或客户端禁止LOAD DATA LOCAL INFILE的错误码
+_LOAD_DATA_REJECTED_ERRORS = (1148, 2068, 3948)
+# 1049: Unknown database
+_UNKNOWN_DATABASE = 1049
+
+class MySQLBackend:
+    """
+    MySQL数据库后端，基于PyMySQL
+    """
+    name = 'mysql'
+    supports_load_data = True
+
+    def __init__(self, host, user, password, database, charset='utf8mb4', local_infile=False):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.database = database
+        self.charset = charset
+        self.local_infile = local_infile
+
+    def connect(self):
+        """
+        建立一个指向目标库的连接（一次握手）
+        """
+        return pymysql.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            charset=self.charset,
+            local_infile=self.local_infile
+        )
+
+    def create_database(self):
+        """
+        不指定数据库连接服务器，创建目标库（如果不存在）
+        """
+        conn = pymysql.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            charset=self.charset
+        )
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
+        finally:
+            conn.close()
+
+    def stream_cursor(self, conn):
+        """
+        创建非缓冲的服务端游标，用于流式读取大结果集
+        """
+        return conn.cursor(pymysql.cursors.SSCursor)
+
+    def index_exists_sql(self, table, index_name):
+        """
+        查询当前库中指定表是否存在某个索引的SQL和参数
+        """
+        sql = ("SELECT 1 FROM information_schema.statistics "
+               "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1")
+        return sql, (table, index_name)
+
+    def column_exists_sql(self, table, column):
+        """
+        查询当前库中指定表是否存在某列的SQL和参数
+        """
+        sql = ("SELECT 1 FROM information_schema.columns "
+               "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1")
+        return sql, (table, column)
+
+    def column_nullable_sql(self, table, column):
+        """
+        查询当前库中指定列是否允许NULL的SQL和参数，允许时返回一行
+        """
+        sql = ("SELECT 1 FROM information_schema.columns "
+               "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s AND is_nullable = 'YES' LIMIT 1")
+        return sql, (table, column)
+
+    def table_columns_sql(self, table):
+        """
+        按定义顺序查询当前库中指定表全部列名的SQL和参数
+        """
+        sql = ("SELECT column_name FROM information_schema.columns "
+               "WHERE table_schema = DATABASE() AND table_name = %s ORDER BY ordinal_position")
+        return sql, (table,)
+
+    def explain_sql(self, sql):
+        """
+        获取查询执行计划的SQL，结果中rows列为各表预计扫描的行数
+        """
+        return f"EXPLAIN {sql}"
+
+    def is_unknown_database_error(self, error):
+        return isinstance(error, pymysql.err.OperationalError) and bool(error.args) and error.args[0] == _UNKNOWN_DATABASE
+
+    def is_disconnect_error(self, error):
+        """
+        判断异常是否表示连接已断开
+        """
+        if isinstance(error, pymysql.err.InterfaceError):
+            return True
+        return isinstance(error, pymysql.err.OperationalError) and bool(error.args) and error.args[0] in _DISCONNECT_ERRORS
+
+    def is_load_data_rejected(self, error):
+        """
+        判断异常是否表示服务器或客户端不允许LOAD DATA LOCAL INFILE
+        """
+        return isinstance(error, pymysql.err.MySQLError) and bool(error.args) and error.args[0] in _LOAD_DATA_REJECTED_ERRORS
@@ -0,0 +1,385 @@
+import os
+import re
+import sqlite3
+import datetime
+import threading
+from decimal import Decimal
+from functools import lru_cache
+import numpy as np
+
+# 写入时的类型适配：日期转ISO字符串，numpy标量转Python原生类型
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(sep=' '))
+sqlite3.register_adapter(Decimal, float)
+for _np_type in (np.int8, np.int16, np.int32, np.int64, np.uint8, np.uint16, np.uint32, np.uint64):
+    sqlite3.register_adapter(_np_type, int)
+for _np_type in (np.float16, np.float32):
+    sqlite3.register_adapter(_np_type, float)
+sqlite3.register_adapter(np.bool_, bool)
+
+def _convert_date(value):
+    return datetime.date.fromisoformat(value.decode()[:10])
+
+def _convert_timestamp(value):
+    return datetime.datetime.fromisoformat(value.decode())
+
+# 读取时按列声明类型还原DATE/TIMESTAMP，与PyMySQL返回的类型保持一致
+sqlite3.register_converter('DATE', _convert_date)
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+sqlite3.register_converter('DATETIME', _convert_timestamp)
+
+_COMMENT = re.compile(r"\s+COMMENT\s*=?\s*'(?:[^'\\]|\\.|'')*'", re.IGNORECASE)
+_TABLE_OPTIONS = re.compile(r"\)\s*(?:ENGINE|DEFAULT\s+CHARSET|CHARSET|COLLATE|AUTO_INCREMENT)\b[^;]*;?\s*$", re.IGNORECASE | re.DOTALL)
+_ON_UPDATE = re.compile(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP(?:\(\))?", re.IGNORECASE)
+_COLUMN_ATTRS = re.compile(r"\s+(?:UNSIGNED|CHARACTER\s+SET\s+\w+|COLLATE\s+\w+)\b", re.IGNORECASE)
+_AUTO_PK = re.compile(r"\bINT(?:EGER)?(?:\(\d+\))?\s+(?:NOT\s+NULL\s+)?AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.IGNORECASE)
+_INDEX_ITEM = re.compile(r"^(UNIQUE\s+)?(?:INDEX|KEY)\s+(\w+)\s*(\(.*\))$", re.IGNORECASE | re.DOTALL)
+_UNIQUE_KEY_ITEM = re.compile(r"^UNIQUE\s+(?:INDEX|KEY)\s+(\w+)\s*(\(.*\))$", re.IGNORECASE | re.DOTALL)
+_CREATE_LIKE = re.compile(r"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s+LIKE\s+`?(\w+)`?\s*;?\s*$", re.IGNORECASE)
+_ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b(.*)$", re.IGNORECASE | re.DOTALL)
+_VALUES_FUNC = re.compile(r"\bVALUES\s*\(\s*(\w+)\s*\)", re.IGNORECASE)
+# 引号内的字符串字面量整体匹配后原样保留，只替换引号外的 <=>
+_NULL_SAFE_EQUAL = re.compile(r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.)*")|<=>""")
+
+def _split_top_level(text, sep=','):
+    """
+    按顶层分隔符拆分文本，忽略括号和引号内的分隔符
+    """
+    parts, depth, quote, current = [], 0, None, []
+    for ch in text:
+        if quote:
+            current.append(ch)
+            if ch == quote:
+                quote = None
+            continue
+        if ch in ("'", '"', '`'):
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == sep and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+    if ''.join(current).strip():
+        parts.append(''.join(current).strip())
+    return parts
+
+def _index_name(table, name):
+    """
+    SQLite的索引名在整个库内唯一，加上表名前缀避免不同表的同名索引冲突
+    """
+    return f"{table.lower()}_{name}"
+
+def _translate_create_table(sql):
+    """
+    将MySQL建表语句翻译为SQLite语句列表：建表 + 索引 + 模拟ON UPDATE CURRENT_TIMESTAMP的触发器
+    """
+    head = re.match(r"\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?\s*\(", sql, re.IGNORECASE)
+    table = head.group(2)
+    body = _TABLE_OPTIONS.sub(')', _COMMENT.sub('', sql).strip().rstrip(';'))
+    body = body[head.end():body.rindex(')')]
+
+    items, indexes, on_update_columns, columns = [], [], [], []
+    for item in _split_top_level(body):
+        index_match = _INDEX_ITEM.match(item)
+        if index_match:
+            unique = 'UNIQUE ' if index_match.group(1) else ''
+            indexes.append(f"CREATE {unique}INDEX IF NOT EXISTS {_index_name(table, index_match.group(2))} ON {table} {index_match.group(3)}")
+            continue
+        if re.match(r"^(PRIMARY\s+KEY|CONSTRAINT|FOREIGN\s+KEY|UNIQUE\s*\()", item, re.IGNORECASE):
+            items.append(item)
+            continue
+        column = item.split()[0].strip('`')
+        columns.append(column)
+        if _ON_UPDATE.search(item):
+            on_update_columns.append(column)
+        item = _ON_UPDATE.sub('', item)
+        item = _AUTO_PK.sub('INTEGER PRIMARY KEY AUTOINCREMENT', item)
+        item = _COLUMN_ATTRS.sub('', item)
+        items.append(item)
+
+    exists = head.group(1) or ''
+    statements = [f"CREATE TABLE {exists}{table} (\n    " + ",\n    ".join(items) + "\n)"]
+    statements.extend(indexes)
+    for column in on_update_columns:
+        changed = " OR ".join(f"NEW.{c} IS NOT OLD.{c}" for c in columns if c != column)
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table.lower()}_{column}_on_update AFTER UPDATE ON {table} "
+            f"FOR EACH ROW WHEN NEW.{column} IS OLD.{column} AND ({changed}) "
+            f"BEGIN UPDATE {table} SET {column} = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid; END"
+        )
+    return statements
+
+def _translate_alter_table(sql):
+    """
+    将MySQL的ALTER TABLE翻译为SQLite语句列表，支持ADD COLUMN、ADD/DROP INDEX，MODIFY COLUMN忽略
+    """
+    match = re.match(r"\s*ALTER\s+TABLE\s+`?(\w+)`?\s+(.*?);?\s*$", _COMMENT.sub('', sql), re.IGNORECASE | re.DOTALL)
+    table, specs = match.group(1), match.group(2)
+    statements = []
+    for spec in _split_top_level(specs):
+        add_index = re.match(r"ADD\s+(UNIQUE\s+)?(?:INDEX|KEY)\s+(\w+)\s*(\(.*\))$", spec, re.IGNORECASE | re.DOTALL)
+        drop_index = re.match(r"DROP\s+(?:INDEX|KEY)\s+(\w+)$", spec, re.IGNORECASE)
+        if re.match(r"MODIFY\s", spec, re.IGNORECASE):
+            # SQLite不能修改已有列的约束，旧库的键列保持可为NULL，写入时已统一为空字符串
+            statements.append("SELECT 1")
+        elif add_index:
+            unique = 'UNIQUE ' if add_index.group(1) else ''
+            statements.append(f"CREATE {unique}INDEX IF NOT EXISTS {_index_name(table, add_index.group(2))} ON {table} {add_index.group(3)}")
+        elif drop_index:
+            statements.append(f"DROP INDEX IF EXISTS {_index_name(table, drop_index.group(1))}")
+        else:
+            spec = re.sub(r"^ADD\s+(?!COLUMN\b)", "ADD COLUMN ", spec, flags=re.IGNORECASE)
+            spec = re.sub(r"\s+(?:AFTER\s+\w+|FIRST)\s*$", "", spec, flags=re.IGNORECASE)
+            spec = _COLUMN_ATTRS.sub('', _ON_UPDATE.sub('', spec))
+            statements.append(f"ALTER TABLE {table} {spec}")
+    return statements
+
+@lru_cache(maxsize=1024)
+def translate_sql(sql):
+    """
+    将本项目使用的MySQL语句翻译为SQLite语句
+
+    参数:
+        sql: str, MySQL语句（%s占位符）
+
+    返回:
+        tuple: SQLite语句（?占位符），DDL可能被拆分为多条语句
+    """
+    stripped = sql.strip().rstrip(';').strip()
+    words = stripped.split(None, 3)
+    first = words[0].upper() if words else ''
+    second = words[1].upper() if len(words) > 1 else ''
+
+    if first == 'CREATE' and second == 'DATABASE':
+        return ("SELECT 1",)
+    if first == 'SET':
+        return ("SELECT 1",)
+    if first == 'CREATE' and second == 'TABLE':
+        # CREATE TABLE ... LIKE 只复制列定义，用于暂存表
+        like = _CREATE_LIKE.match(stripped)
+        if like:
+            return (f"CREATE TABLE {like.group(1) or ''}{like.group(2)} AS SELECT * FROM {like.group(3)} WHERE 0",)
+    if first == 'CREATE' and second == 'TABLE' and 'SELECT' not in stripped.upper():
+        return tuple(_translate_create_table(stripped))
+    if first == 'CREATE' and (second == 'INDEX' or (second == 'UNIQUE' and len(words) > 2 and words[2].upper() == 'INDEX')):
+        match = re.match(r"CREATE\s+(UNIQUE\s+)?INDEX\s+(\w+)\s+ON\s+`?(\w+)`?\s*(\(.*\))$", stripped, re.IGNORECASE | re.DOTALL)
+        unique = 'UNIQUE ' if match.group(1) else ''
+        return (f"CREATE {unique}INDEX IF NOT EXISTS {_index_name(match.group(3), match.group(2))} ON {match.group(3)} {match.group(4)}",)
+    if first == 'DROP' and second == 'INDEX':
+        match = re.match(r"DROP\s+INDEX\s+(\w+)\s+ON\s+`?(\w+)`?$", stripped, re.IGNORECASE)
+        return (f"DROP INDEX IF EXISTS {_index_name(match.group(2), match.group(1))}",)
+    if first == 'ALTER' and second == 'TABLE':
+        return tuple(_translate_alter_table(stripped))
+    if first == 'SHOW' and second == 'TABLES':
+        like = re.search(r"\bLIKE\s+('.*')", stripped, re.IGNORECASE)
+        condition = f" AND name LIKE {like.group(1)}" if like else ""
+        return (f"SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'{condition}",)
+    if first in ('DESCRIBE', 'DESC') and second:
+        return (f"PRAGMA table_info({second.strip('`').lower()})",)
+    if first == 'TRUNCATE':
+        return (re.sub(r"^TRUNCATE\s+(?:TABLE\s+)?", "DELETE FROM ", stripped, flags=re.IGNORECASE),)
+
+    text = stripped.replace('%s', '?')
+    text = re.sub(r"^INSERT\s+IGNORE\b", "INSERT OR IGNORE", text, flags=re.IGNORECASE)
+    text = re.sub(r"\bNOW\(\)", "CURRENT_TIMESTAMP", text, flags=re.IGNORECASE)
+    # MySQL的NULL安全等于
+    text = _NULL_SAFE_EQUAL.sub(lambda m: m.group(1) or ' IS ', text)
+    duplicate = _ON_DUPLICATE.search(text)
+    if duplicate:
+        assignments = _VALUES_FUNC.sub(r"excluded.\1", duplicate.group(1))
+        text = text[:duplicate.start()] + "ON CONFLICT DO UPDATE SET" + assignments
+    return (text,)
+
+class SQLiteCursor:
+    """
+    SQLite游标包装：接受MySQL风格的SQL和%s占位符，接口与PyMySQL游标一致
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=None):
+        statements = translate_sql(sql)
+        if len(statements) == 1:
+            self._cursor.execute(statements[0], tuple(params) if params else ())
+        else:
+            for statement in statements:
+                self._cursor.execute(statement)
+        like = _CREATE_LIKE.match(sql)
+        if like:
+            self._copy_indexes(like.group(3), like.group(2))
+        return self._cursor.rowcount
+
+    def _copy_indexes(self, source, target):
+        """
+        CREATE TABLE ... LIKE 在MySQL中会复制索引，CREATE TABLE ... AS SELECT 不会，这里按源表的索引定义补建
+        """
+        rows = self._cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? COLLATE NOCASE AND sql IS NOT NULL",
+            (source,)).fetchall()
+        prefix = f"{source.lower()}_"
+        for name, index_sql in rows:
+            new_name = _index_name(target, name[len(prefix):] if name.startswith(prefix) else name)
+            match = re.match(r"CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?\S+\s+ON\s+\S+\s*(\(.*\))$",
+                             index_sql, re.IGNORECASE | re.DOTALL)
+            if match:
+                self._cursor.execute(f"CREATE {match.group(1) or ''}INDEX IF NOT EXISTS {new_name} ON {target} {match.group(2)}")
+
+    def executemany(self, sql, params_list):
+        statements = translate_sql(sql)
+        self._cursor.executemany(statements[0], [tuple(params) for params in params_list])
+        return self._cursor.rowcount
+
+    def mogrify(self, sql, params=None):
+        if not params:
+            return sql
+        parts = sql.split('%s')
+        values = [repr(value) for value in params]
+        return ''.join(part + (values[i] if i < len(values) else '') for i, part in enumerate(parts))
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size) if size else self._cursor.fetchmany()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SQLiteConnection:
+    """
+    SQLite连接包装，提供与PyMySQL连接一致的cursor/commit/rollback/ping/close接口
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, cursor_class=None):
+        return SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        self._conn.close()
+
+class SQLiteBackend:
+    """
+    SQLite数据库后端，用于无MySQL服务器时离线运行整个流程、基准测试和测试
+    path为':memory:'时使用共享缓存的内存库，同一进程内的所有连接看到同一份数据
+    """
+    name = 'sqlite'
+    supports_load_data = False
+
+    def __init__(self, path, database):
+        self.path = path
+        self.database = database
+        self._keeper = None
+        self._lock = threading.Lock()
+
+    def _target(self):
+        if self.path == ':memory:':
+            return f"file:{self.database}?mode=memory&cache=shared", True
+        return self.path, False
+
+    def _raw_connect(self):
+        target, uri = self._target()
+        conn = sqlite3.connect(target, uri=uri, timeout=30, check_same_thread=False,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def connect(self):
+        """
+        建立一个新的连接
+        内存库在第一次连接时额外保留一个连接，保证连接全部关闭后数据不丢失
+        """
+        if self.path == ':memory:':
+            with self._lock:
+                if self._keeper is None:
+                    self._keeper = self._raw_connect()
+        return SQLiteConnection(self._raw_connect())
+
+    def create_database(self):
+        """
+        SQLite库文件在连接时自动创建，这里只确保目录存在
+        """
+        if self.path != ':memory:':
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+
+    def stream_cursor(self, conn):
+        """
+        SQLite游标本身按需逐步读取结果
+        """
+        return conn.cursor()
+
+    def index_exists_sql(self, table, index_name):
+        """
+        查询索引是否存在的SQL和参数，索引名按建表翻译时的规则加表名前缀
+        """
+        return "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = %s", (_index_name(table, index_name),)
+
+    def column_exists_sql(self, table, column):
+        """
+        查询表中是否存在某列的SQL和参数
+        """
+        return "SELECT 1 FROM pragma_table_info(%s) WHERE name = %s", (table, column)
+
+    def column_nullable_sql(self, table, column):
+        """
+        查询指定列是否允许NULL的SQL和参数，允许时返回一行
+        """
+        return "SELECT 1 FROM pragma_table_info(%s) WHERE name = %s AND \"notnull\" = 0", (table, column)
+
+    def table_columns_sql(self, table):
+        """
+        按定义顺序查询表全部列名的SQL和参数
+        """
+        return "SELECT name FROM pragma_table_info(%s) ORDER BY cid", (table,)
+
+    def explain_sql(self, sql):
+        """
+        获取查询执行计划的SQL，SQLite只给出访问方式和使用的索引，没有扫描行数
+        """
+        return f"EXPLAIN QUERY PLAN {sql}"
+
+    def is_unknown_database_error(self, error):
+        return False
+
+    def is_disconnect_error(self, error):
+        return isinstance(error, sqlite3.ProgrammingError) and 'closed' in str(error).lower()
+
+    def is_load_data_rejected(self, error):
+        return False
@@ -0,0 +1,107 @@
+import pickle
+import logging
+import threading
+from collections import OrderedDict
+
+def cache_key(sql, params=None):
+    """
+    生成查询缓存键：去除多余空白的SQL + 参数
+    只合并空白，不替换字面量，避免内联值不同的语句共用缓存
+    """
+    return ' '.join(sql.split()), tuple(params) if params else ()
+
+class QueryCache:
+    """
+    查询结果缓存，按LRU淘汰，总大小不超过字节预算
+    每个条目带有版本号（如头表的update_time），读取时版本不一致即视为失效
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        初始化查询缓存
+
+        参数:
+            max_bytes: int, 缓存结果的总字节预算
+        """
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()  # key -> (rows, size, version)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key, version=None):
+        """
+        读取缓存
+
+        参数:
+            key: 缓存键
+            version: 当前数据版本，与缓存条目版本不一致时删除该条目
+
+        返回:
+            list: 缓存的结果行，未命中返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            rows, size, cached_version = entry
+            if cached_version != version:
+                del self._entries[key]
+                self._bytes -= size
+                self._stats['invalidations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return rows
+
+    def put(self, key, rows, version=None):
+        """
+        写入缓存，超出字节预算时淘汰最久未使用的条目
+        单个结果超过预算时不缓存
+
+        参数:
+            key: 缓存键
+            rows: list, 查询结果行
+            version: 数据版本
+        """
+        try:
+            size = len(pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            logging.debug(f"查询结果无法估算大小，不缓存: {e}")
+            return
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+            self._entries[key] = (rows, size, version)
+            self._bytes += size
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        获取缓存统计信息
+
+        返回:
+            dict: 命中数、未命中数、淘汰数、失效数、条目数和已用字节数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+        return stats
@@ -1,18 +1,75 @@
-import pymysql
+import pandas as pd
 import os
 from dotenv import load_dotenv
 import pathlib
 import logging
+import io
+import time
+import datetime
+import tempfile
+import threading
+from contextlib import contextmanager
+from db.db_pool import ConnectionPool
+from db.db_trace import SqlTracer
+from db.db_cache import QueryCache, cache_key
+from db.backends import MySQLBackend, SQLiteBackend
 
 # 确保环境变量已加载，无论模块导入顺序如何
 load_dotenv()
 
+def _env_flag(name, default=False):
+    """
+    读取布尔型环境变量
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+# 可以在重连后安全重试的只读语句
+_READ_ONLY_STATEMENTS = ('SELECT', 'SHOW', 'DESCRIBE', 'DESC', 'EXPLAIN', 'WITH')
+
+class _ThreadLocalAttribute:
+    """
+    按线程隔离的实例属性，值保存在实例的threading.local中
+    """
+    def __init__(self, default=None):
+        self.default = default
+    
+    def __set_name__(self, owner, name):
+        self.name = name
+    
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return getattr(instance._local, self.name, self.default)
+    
+    def __set__(self, instance, value):
+        setattr(instance._local, self.name, value)
+
+class TransactionRolledBack(Exception):
+    """
+    事务中有语句执行失败或被要求回滚，整个事务已回滚
+    """
+    pass
+
 class DBManager:
     """
     数据库管理类，负责数据库连接、关闭等操作
     使用.env文件中的配置信息进行连接
+    连接、游标和事务状态按线程隔离，工作线程通过同一个db_manager各自持有连接
     """
     _instance = None
+    # 进程内是否已确认数据库存在
+    _database_verified = False
+    
+    # 每个线程独立的连接、游标和事务状态
+    conn = _ThreadLocalAttribute()
+    cursor = _ThreadLocalAttribute()
+    _tx_depth = _ThreadLocalAttribute(0)
+    _tx_rollback_only = _ThreadLocalAttribute(False)
+    # 当前线程连接最近一次确认可用的时间
+    _last_used = _ThreadLocalAttribute()
     
     def __new__(cls):
         """
@@ -40,101 +97,402 @@ class DBManager:
         self.db_name = os.getenv('DB_NAME', 'stock_data')
         self.charset = os.getenv('DB_CHARSET', 'utf8mb4')
         
-        # 初始化连接和游标为None
-        self.conn = None
-        self.cursor = None
+        # 批量写入方式：load_data（LOAD DATA LOCAL INFILE）、executemany（多行INSERT）、row（逐行INSERT）
+        self.bulk_mode = os.getenv('DB_BULK_MODE', 'executemany').strip().lower()
+        self.bulk_batch_size = int(os.getenv('DB_BULK_BATCH_SIZE', 1000))
+        self._load_data_supported = True
+        
+        # 数据库后端：mysql（默认）或sqlite（离线运行，DB_SQLITE_PATH为':memory:'时使用内存库）
+        if os.getenv('DB_BACKEND', 'mysql').strip().lower() == 'sqlite':
+            self.backend = SQLiteBackend(os.getenv('DB_SQLITE_PATH', ':memory:'), self.db_name)
+        else:
+            self.backend = MySQLBackend(
+                self.host, self.user, self.password, self.db_name, self.charset,
+                local_infile=self.bulk_mode == 'load_data'
+            )
+        
+        # 长连接配置：开启keep_alive后close()不释放连接，空闲超过ping_interval秒的连接先ping再使用
+        self.keep_alive = _env_flag('DB_KEEP_ALIVE', False)
+        self.ping_interval = float(os.getenv('DB_PING_INTERVAL', 60))
+        self._counters = {'pings': 0, 'reconnects': 0, 'retries': 0}
+        self._counter_lock = threading.Lock()
+        
+        # 连接池配置，启用后connect()/close()改为从池中借出/归还连接
+        self.pool = None
+        if _env_flag('DB_POOL_ENABLED', True):
+            self.pool = ConnectionPool(
+                self._open_connection,
+                min_size=int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+                max_size=int(os.getenv('DB_POOL_MAX_SIZE', 5)),
+                idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+                checkout_timeout=float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', 30)),
+                ping_interval=self.ping_interval
+            )
+        
+        # SQL追踪配置，默认关闭，开启后按采样率记录语句耗时
+        self.tracer = SqlTracer(
+            enabled=_env_flag('DB_TRACE_ENABLED', False),
+            sample_rate=float(os.getenv('DB_TRACE_SAMPLE_RATE', 1.0)),
+            log_level=getattr(logging, os.getenv('DB_TRACE_LOG_LEVEL', 'DEBUG').upper(), logging.DEBUG)
+        )
+        
+        # 报告期查询结果缓存，默认关闭
+        self.query_cache = None
+        if _env_flag('DB_QUERY_CACHE_ENABLED', False):
+            self.query_cache = QueryCache(max_bytes=int(os.getenv('DB_QUERY_CACHE_MAX_BYTES', 64 * 1024 * 1024)))
+        
+        # 连接和游标按线程保存，初始均为None
+        # 事务嵌套深度大于0时commit()/close()延迟到最外层事务结束
+        self._local = threading.local()
         self._initialized = True
     
     def connect(self):
         """
         连接到数据库
-        如果数据库不存在，则创建
+        启用连接池或长连接时，已持有连接则直接复用，否则从池中借出或新建连接
         """
+        if self._tx_depth > 0:
+            # 事务中复用事务所在的连接
+            return True
+        if self.conn is not None and self.cursor is not None and (self.pool is not None or self.keep_alive):
+            return True
         try:
-            # 先连接不指定数据库
-            self.conn = pymysql.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                charset=self.charset
-            )
-            self.cursor = self.conn.cursor()
-            
-            # 创建数据库（如果不存在）
-            self.cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.db_name}")
-            
-            # 关闭当前连接
-            self.close()
-            
-            # 连接到指定数据库
-            self.conn = pymysql.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.db_name,
-                charset=self.charset
-            )
+            if self.pool is not None:
+                self.conn = self.pool.checkout()
+            else:
+                self.conn = self._open_connection()
             self.cursor = self.conn.cursor()
+            self._last_used = time.monotonic()
             return True
         except Exception as e:
             logging.error(f"数据库连接出错: {e}")
+            self.conn = None
+            self.cursor = None
+            return False
+    
+    def ensure_database(self):
+        """
+        确保数据库DB_NAME存在，不存在则创建
+        每个进程只执行一次，结果缓存在类属性中，正常的connect()不再执行建库语句
+        
+        返回:
+            bool: 表示数据库是否可用
+        """
+        if DBManager._database_verified:
+            return True
+        try:
+            self.backend.create_database()
+            DBManager._database_verified = True
+            logging.info(f"数据库 {self.db_name} 已确认存在")
+            return True
+        except Exception as e:
+            logging.error(f"创建数据库出错: {e}")
             return False
     
+    def _open_connection(self):
+        """
+        通过数据库后端建立一个新的连接，只进行一次握手直接连接到DB_NAME
+        如果数据库尚不存在（未执行initDb），则先创建数据库再重试一次
+        
+        返回:
+            数据库连接对象
+        """
+        try:
+            return self.backend.connect()
+        except Exception as e:
+            if DBManager._database_verified or not self.backend.is_unknown_database_error(e) or not self.ensure_database():
+                raise
+        return self.backend.connect()
+    
     def close(self):
         """
         关闭数据库连接和游标
+        启用连接池时连接归还到池中，不会真正断开
+        开启长连接时只回滚未提交的事务，连接继续保留给后续调用
+        事务中调用时不做任何操作，连接在最外层事务结束时释放
+        """
+        if self._tx_depth > 0:
+            return
+        if self.keep_alive and self.conn is not None:
+            try:
+                self.conn.rollback()
+                return
+            except Exception as e:
+                logging.warning(f"长连接回滚失败，释放该连接: {e}")
+                self._release(discard=True)
+                return
+        self._release()
+    
+    def disconnect(self):
+        """
+        释放当前线程持有的连接，长连接模式下同样释放
+        """
+        if self._tx_depth > 0:
+            return
+        self._release()
+    
+    def _release(self, discard=False):
+        """
+        关闭游标并释放连接：归还连接池或直接关闭
+        
+        参数:
+            discard: bool, 为True时连接不再放回连接池（如连接已断开）
         """
         if self.cursor:
-            self.cursor.close()
+            try:
+                self.cursor.close()
+            except Exception as e:
+                logging.debug(f"关闭游标出错: {e}")
             self.cursor = None
         if self.conn:
-            self.conn.close()
+            if self.pool is not None:
+                self.pool.checkin(self.conn, discard=discard)
+            else:
+                try:
+                    self.conn.close()
+                except Exception as e:
+                    logging.debug(f"关闭连接出错: {e}")
             self.conn = None
+        self._last_used = None
+    
+    def _count(self, name):
+        with self._counter_lock:
+            self._counters[name] += 1
+    
+    def _reconnect(self):
+        """
+        丢弃当前连接并重新连接
+        """
+        self._release(discard=True)
+        self._count('reconnects')
+        if not self.connect():
+            raise ConnectionError("重新连接数据库失败")
+    
+    def _check_alive(self):
+        """
+        连接空闲超过ping_interval秒时先ping一次，失效则重新连接
+        事务中不检查，避免在事务中途切换连接
+        """
+        if self._tx_depth > 0 or self.conn is None:
+            return
+        now = time.monotonic()
+        if self._last_used is not None and now - self._last_used < self.ping_interval:
+            return
+        self._count('pings')
+        try:
+            self.conn.ping(reconnect=False)
+        except Exception as e:
+            logging.warning(f"数据库连接已失效，重新连接: {e}")
+            self._reconnect()
+        self._last_used = now
+    
+    def _should_retry(self, sql, error):
+        """
+        判断语句失败后能否重连重试：不在事务中、连接断开类错误、且为只读查询
+        """
+        if self._tx_depth > 0 or not self.backend.is_disconnect_error(error):
+            return False
+        words = sql.lstrip().split(None, 1)
+        return bool(words) and words[0].upper() in _READ_ONLY_STATEMENTS
+    
+    def connection_stats(self):
+        """
+        获取连接保活统计信息
+        
+        返回:
+            dict: ping次数、重连次数和重试次数
+        """
+        with self._counter_lock:
+            return dict(self._counters)
+    
+    def pool_stats(self):
+        """
+        获取连接池统计信息
+        
+        返回:
+            dict: 连接池统计信息，未启用连接池时返回None
+        """
+        if self.pool is None:
+            return None
+        return self.pool.stats()
+    
+    def log_run_summary(self):
+        """
+        输出本次运行的数据库统计：连接池使用情况和SQL追踪汇总
+        """
+        pool_stats = self.pool_stats()
+        if pool_stats:
+            logging.info(f"数据库连接池统计: {pool_stats}")
+        logging.info(f"数据库连接保活统计: {self.connection_stats()}")
+        if self.query_cache is not None:
+            logging.info(f"查询缓存统计: {self.query_cache.stats()}")
+        self.tracer.log_summary()
+    
+    def _run_statement(self, sql, params=None, many=False):
+        """
+        在当前游标上执行语句，开启SQL追踪时按采样率记录耗时和行数
+        异常直接抛出，由调用方处理
+        """
+        sampled = self.tracer.should_sample()
+        if sampled:
+            self.tracer.log_statement(self.cursor, sql, None if many else params)
+            start = time.perf_counter()
+        
+        if many:
+            self.cursor.executemany(sql, params)
+        elif params:
+            self.cursor.execute(sql, params)
+        else:
+            self.cursor.execute(sql)
+        
+        if sampled:
+            self.tracer.record(sql, (time.perf_counter() - start) * 1000, self.cursor.rowcount)
+        self._last_used = time.monotonic()
+    
+    def _execute_with_retry(self, sql, params=None, many=False):
+        """
+        执行语句，只读查询遇到连接断开时重连并重试一次
+        """
+        if not self.conn or not self.cursor:
+            self.connect()
+        self._check_alive()
+        try:
+            self._run_statement(sql, params, many)
+        except Exception as e:
+            if not self._should_retry(sql, e):
+                raise
+            logging.warning(f"数据库连接已断开，重连后重试查询: {e}")
+            self._reconnect()
+            self._count('retries')
+            self._run_statement(sql, params, many)
     
     def execute(self, sql, params=None):
         """
         执行SQL语句
+        开启SQL追踪时，按采样率记录语句耗时和行数
+        只读查询遇到连接断开时自动重连并重试一次
         """
         try:
-            if not self.conn or not self.cursor:
-                self.connect()
-            
-            # 打印完整SQL语句（带参数）
-            if params:
-                # 使用mogrify获取带参数的完整SQL
-                try:
-                    final_sql = self.cursor.mogrify(sql, params)
-                    # 如果是字节对象，则解码为字符串
-                    if isinstance(final_sql, bytes):
-                        final_sql = final_sql.decode('utf-8')
-                    logging.info(f"执行SQL: {final_sql}")
-                except Exception as e:
-                    # 如果mogrify失败，只打印原始SQL
-                    logging.info(f"执行SQL(参数未填充): {sql}")
-                    logging.info(f"参数: {params}")
-                
-                self.cursor.execute(sql, params)
-            else:
-                logging.info(f"执行SQL: {sql}")
-                self.cursor.execute(sql)
+            self._execute_with_retry(sql, params)
             return True
         except Exception as e:
+            if self._tx_depth > 0:
+                self._tx_rollback_only = True
             logging.error(f"执行SQL出错: {e}")
+            logging.error(f"出错SQL: {sql}")
             return False
     
     def executemany(self, sql, params_list):
         """
         批量执行SQL语句
         """
+        try:
+            self._execute_with_retry(sql, params_list, many=True)
+            return True
+        except Exception as e:
+            if self._tx_depth > 0:
+                self._tx_rollback_only = True
+            logging.error(f"批量执行SQL出错: {e}")
+            return False
+    
+    def bulk_insert(self, table, columns, rows, mode=None, ignore=False, update_columns=None):
+        """
+        批量插入数据
+        load_data模式将数据序列化为TSV后通过LOAD DATA LOCAL INFILE一次性导入，
+        服务器或客户端不允许时自动退回executemany多行INSERT
+        
+        参数:
+            table: str, 目标表名
+            columns: list, 列名列表
+            rows: list, 每个元素为与columns顺序一致的tuple
+            mode: str, 写入方式 load_data/executemany/row，默认使用DB_BULK_MODE
+            ignore: bool, 为True时跳过与唯一键冲突的行（INSERT IGNORE），由数据库完成去重
+            update_columns: list, 不为空时按唯一键插入或更新（INSERT ... ON DUPLICATE KEY UPDATE），
+                冲突行只更新这些列；LOAD DATA不支持按列更新，此时改用executemany
+        
+        返回:
+            bool: 表示操作是否成功
+        """
+        mode = (mode or self.bulk_mode).lower()
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not rows:
+            return True
         try:
             if not self.conn or not self.cursor:
                 self.connect()
-            self.cursor.executemany(sql, params_list)
+            
+            if mode == 'load_data' and update_columns:
+                mode = 'executemany'
+            if mode == 'load_data':
+                if self._load_data_supported and self.backend.supports_load_data:
+                    try:
+                        self._load_data(table, columns, rows, ignore)
+                        return True
+                    except Exception as e:
+                        if not self.backend.is_load_data_rejected(e):
+                            raise
+                        logging.warning(f"不允许LOAD DATA LOCAL INFILE，改用executemany批量写入: {e}")
+                        self._load_data_supported = False
+                mode = 'executemany'
+            
+            insert_sql = f"INSERT {'IGNORE ' if ignore else ''}INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+            if update_columns:
+                # 值未变化的列不会被写入，整行无变化时update_time也保持不变
+                insert_sql += " ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = VALUES({column})" for column in update_columns)
+            if mode == 'row':
+                for row in rows:
+                    self._execute_with_retry(insert_sql, row)
+            else:
+                for i in range(0, len(rows), self.bulk_batch_size):
+                    self._execute_with_retry(insert_sql, rows[i:i + self.bulk_batch_size], many=True)
             return True
         except Exception as e:
-            logging.error(f"批量执行SQL出错: {e}")
+            if self._tx_depth > 0:
+                self._tx_rollback_only = True
+            logging.error(f"批量写入 {table} 出错: {e}")
             return False
     
+    @staticmethod
+    def _tsv_value(value):
+        """
+        将单个值转换为LOAD DATA默认格式（制表符分隔、反斜杠转义）的字段
+        """
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return '1' if value else '0'
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat(sep=' ') if isinstance(value, datetime.datetime) else value.isoformat()
+        text = str(value)
+        if isinstance(value, str):
+            text = (text.replace('\\', '\\\\').replace('\t', '\\t')
+                    .replace('\n', '\\n').replace('\r', '\\r').replace('\0', '\\0'))
+        return text
+    
+    def _load_data(self, table, columns, rows, ignore=False):
+        """
+        将数据在内存中序列化为TSV，通过LOAD DATA LOCAL INFILE导入
+        PyMySQL只能按文件路径发送本地文件，因此缓冲区写入临时文件后再导入，导入完成即删除
+        """
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(self._tsv_value(value) for value in row))
+            buffer.write('\n')
+        
+        tmp = tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', newline='', suffix='.tsv', delete=False)
+        try:
+            with tmp:
+                tmp.write(buffer.getvalue())
+            buffer.close()
+            load_sql = (
+                f"LOAD DATA LOCAL INFILE %s {'IGNORE ' if ignore else ''}INTO TABLE {table} CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                f"({', '.join(columns)})"
+            )
+            self._execute_with_retry(load_sql, (tmp.name,))
+        finally:
+            os.remove(tmp.name)
+    
     def fetchall(self):
         """
         获取所有查询结果
@@ -143,6 +501,127 @@ class DBManager:
             return self.cursor.fetchall()
         return None
     
+    def _iter_batches(self, sql, params, batch_size):
+        """
+        使用非缓冲的服务端游标分批读取查询结果
+        流式读取期间连接不能执行其他语句，因此单独借用一个连接，不影响self.conn
+        
+        返回:
+            generator: 依次产生 (列名列表, 行批次)
+        """
+        if self.pool is not None:
+            conn = self.pool.checkout()
+        else:
+            conn = self._open_connection()
+        cursor = self.backend.stream_cursor(conn)
+        exhausted = False
+        try:
+            sampled = self.tracer.should_sample()
+            if sampled:
+                self.tracer.log_statement(cursor, sql, params)
+                start = time.perf_counter()
+            
+            if params:
+                cursor.execute(sql, params)
+            else:
+                cursor.execute(sql)
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
+            
+            row_count = 0
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                row_count += len(rows)
+                yield columns, rows
+            exhausted = True
+            
+            if sampled:
+                self.tracer.record(sql, (time.perf_counter() - start) * 1000, row_count)
+        except Exception as e:
+            logging.error(f"流式查询出错: {e}")
+            raise
+        finally:
+            # 结果未读完时直接丢弃连接，避免为关闭游标而读完剩余的结果
+            if exhausted:
+                cursor.close()
+            if self.pool is not None:
+                self.pool.checkin(conn, discard=not exhausted)
+            else:
+                conn.close()
+    
+    def fetch_iter(self, sql, params=None, batch_size=1000):
+        """
+        流式获取查询结果，逐行产生，内存占用与结果集大小无关
+        
+        参数:
+            sql: str, 查询语句
+            params: tuple, 查询参数
+            batch_size: int, 每次从服务端读取的行数
+        
+        返回:
+            generator: 依次产生每一行（tuple）
+        """
+        for _, rows in self._iter_batches(sql, params, batch_size):
+            yield from rows
+    
+    def fetch_dataframe_chunks(self, sql, params=None, chunk_size=10000):
+        """
+        流式获取查询结果，按块产生DataFrame，适合跨多个报告期的大结果集分析
+        
+        参数:
+            sql: str, 查询语句
+            params: tuple, 查询参数
+            chunk_size: int, 每个DataFrame的行数
+        
+        返回:
+            generator: 依次产生pandas.DataFrame，列名与查询结果列一致
+        """
+        for columns, rows in self._iter_batches(sql, params, chunk_size):
+            yield pd.DataFrame(list(rows), columns=columns)
+    
+    def _period_version(self, header_table, report_date):
+        """
+        获取报告期数据版本：头表中该报告期的更新时间、记录数和状态
+        头表记录不存在时返回None
+        """
+        sql = f"SELECT update_time, record_count, status FROM {header_table} WHERE report_date = %s"
+        if not self.execute(sql, (report_date,)):
+            raise RuntimeError(f"读取 {header_table} 的报告期版本失败")
+        row = self.cursor.fetchone()
+        return tuple(row) if row else None
+    
+    def cached_query(self, sql, params=None, header_table=None, report_date=None):
+        """
+        带读穿缓存的查询，适用于按报告期读取的不可变数据
+        缓存键为（规范化SQL, 参数）；指定header_table和report_date时，
+        头表中该报告期的update_time等发生变化后缓存自动失效
+        未开启查询缓存时退化为流式查询
+        
+        参数:
+            sql: str, 查询语句
+            params: tuple, 查询参数
+            header_table: str, 报告期所属的头表名
+            report_date: str, 报告日期
+        
+        返回:
+            iterable: 查询结果行
+        """
+        if self.query_cache is None:
+            return self.fetch_iter(sql, params)
+        
+        version = None
+        if header_table and report_date:
+            version = (header_table, report_date, self._period_version(header_table, report_date))
+        key = cache_key(sql, params)
+        rows = self.query_cache.get(key, version)
+        if rows is not None:
+            return rows
+        
+        rows = list(self.fetch_iter(sql, params))
+        self.query_cache.put(key, rows, version)
+        return rows
+    
     def fetchone(self):
         """
         获取一条查询结果
@@ -151,25 +630,143 @@ class DBManager:
             return self.cursor.fetchone()
         return None
     
+    def index_exists(self, table, index_name):
+        """
+        检查表上是否存在指定索引，用于给已存在的表补建索引
+        
+        参数:
+            table: str, 表名
+            index_name: str, 索引名
+        
+        返回:
+            bool: 索引是否存在
+        """
+        sql, params = self.backend.index_exists_sql(table, index_name)
+        if not self.execute(sql, params):
+            return False
+        return self.fetchone() is not None
+    
+    def column_exists(self, table, column):
+        """
+        检查表中是否存在指定列，用于给已存在的表补加列
+        
+        参数:
+            table: str, 表名
+            column: str, 列名
+        
+        返回:
+            bool: 列是否存在
+        """
+        sql, params = self.backend.column_exists_sql(table, column)
+        if not self.execute(sql, params):
+            return False
+        return self.fetchone() is not None
+    
+    def column_nullable(self, table, column):
+        """
+        检查表中指定列是否允许NULL，用于把已存在表的列改为NOT NULL
+        
+        参数:
+            table: str, 表名
+            column: str, 列名
+        
+        返回:
+            bool: 列存在且允许NULL时返回True
+        """
+        sql, params = self.backend.column_nullable_sql(table, column)
+        if not self.execute(sql, params):
+            return False
+        return self.fetchone() is not None
+    
+    def table_columns(self, table):
+        """
+        获取表的全部列名，用于比较两张表的结构是否一致
+        
+        参数:
+            table: str, 表名
+        
+        返回:
+            list: 按定义顺序的列名，表不存在或查询失败时返回空列表
+        """
+        sql, params = self.backend.table_columns_sql(table)
+        if not self.execute(sql, params):
+            return []
+        return [row[0] for row in self.fetchall()]
+    
     def commit(self):
         """
         提交事务
+        事务中调用时延迟到最外层事务结束时统一提交
         """
+        if self._tx_depth > 0:
+            return
         if self.conn:
             self.conn.commit()
     
     def rollback(self):
         """
         回滚事务
+        事务中调用时将整个事务标记为回滚，在最外层事务结束时统一回滚
         """
+        if self._tx_depth > 0:
+            self._tx_rollback_only = True
+            return
         if self.conn:
             self.conn.rollback()
     
+    @contextmanager
+    def transaction(self):
+        """
+        工作单元事务上下文管理器
+        事务内所有语句使用同一个连接，退出时统一提交一次，出现异常或语句执行失败时整体回滚
+        嵌套调用（包括事务内调用的辅助函数中的connect/commit/close）会加入外层事务
+        
+        用法:
+            with db_manager.transaction():
+                ...
+        
+        异常:
+            TransactionRolledBack: 事务中有语句执行失败，事务已回滚
+        """
+        if self._tx_depth > 0:
+            self._tx_depth += 1
+            try:
+                yield self
+            except Exception:
+                self._tx_rollback_only = True
+                raise
+            finally:
+                self._tx_depth -= 1
+            return
+        
+        owns_connection = self.conn is None
+        if not self.connect():
+            raise TransactionRolledBack("数据库连接失败，无法开始事务")
+        self._tx_depth = 1
+        self._tx_rollback_only = False
+        committed = False
+        try:
+            yield self
+            if self._tx_rollback_only:
+                raise TransactionRolledBack("事务中有语句执行失败，事务已回滚")
+            self.conn.commit()
+            committed = True
+        finally:
+            self._tx_depth = 0
+            self._tx_rollback_only = False
+            if not committed and self.conn:
+                try:
+                    self.conn.rollback()
+                except Exception as e:
+                    logging.error(f"回滚事务出错: {e}")
+            if owns_connection:
+                self.close()
+    
     def __del__(self):
         """
         析构函数，确保关闭连接
         """
-        self.close()
+        self.disconnect()
         
 # 创建实例供直接导入使用
 db_manager = DBManager()
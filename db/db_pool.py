@@ -0,0 +1,214 @@
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+class ConnectionPool:
+    """
+    线程安全的有界数据库连接池
+    归还的连接保留在池中供下次借用，避免每次connect()都重新进行TCP连接和认证握手
+    """
+
+    def __init__(self, connect_func, min_size=1, max_size=5, idle_timeout=300, checkout_timeout=30, ping_interval=None):
+        """
+        初始化连接池
+
+        参数:
+            connect_func: callable, 创建新数据库连接的函数
+            min_size: int, 空闲回收时至少保留的连接数
+            max_size: int, 池中连接总数上限（空闲 + 已借出）
+            idle_timeout: float, 连接空闲超过该秒数后被关闭
+            checkout_timeout: float, 连接全部借出时等待归还的最长秒数
+            ping_interval: float, 空闲超过该秒数的连接借出前先ping检查，为None时不检查
+        """
+        self._connect_func = connect_func
+        self.min_size = max(0, int(min_size))
+        self.max_size = max(1, int(max_size))
+        self.idle_timeout = float(idle_timeout)
+        self.checkout_timeout = float(checkout_timeout)
+        self.ping_interval = None if ping_interval is None else float(ping_interval)
+
+        # 空闲连接队列，元素为 (conn, 最后归还时间)，右端为最近归还的连接
+        self._idle = deque()
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        self._stats = {
+            'created': 0,    # 实际建立的连接数（握手次数）
+            'reused': 0,     # 复用空闲连接的次数（避免的握手次数）
+            'closed': 0,     # 被关闭的连接数
+            'waits': 0,      # 因连接耗尽而等待的次数
+            'ping_failures': 0,  # 借出前ping失败被丢弃的连接数
+        }
+
+    def _size_locked(self):
+        return len(self._idle) + self._in_use
+
+    def _reap_idle_locked(self):
+        """
+        取出空闲超时的连接，保留至少min_size个连接
+        返回需要关闭的连接列表，由调用方在锁外关闭
+        """
+        expired = []
+        now = time.monotonic()
+        while self._idle and self._size_locked() > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            expired.append(conn)
+        return expired
+
+    def _close_connections(self, conns):
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception as e:
+                logging.debug(f"关闭连接池连接出错: {e}")
+        if conns:
+            with self._cond:
+                self._stats['closed'] += len(conns)
+
+    def checkout(self):
+        """
+        从池中借出一个连接
+        优先复用最近归还的空闲连接，池未满时新建连接，否则等待其他线程归还
+        空闲时间超过ping_interval的连接借出前先ping，失效则丢弃并重新获取
+
+        返回:
+            数据库连接对象
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+        expired = []
+        conn = None
+        idle_seconds = 0
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("连接池已关闭")
+                expired.extend(self._reap_idle_locked())
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    idle_seconds = time.monotonic() - last_used
+                    self._in_use += 1
+                    self._stats['reused'] += 1
+                    break
+                if self._size_locked() < self.max_size:
+                    # 先占用名额，在锁外建立连接
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待数据库连接超时（{self.checkout_timeout}秒），连接池上限: {self.max_size}")
+                self._stats['waits'] += 1
+                self._cond.wait(remaining)
+
+        self._close_connections(expired)
+        if conn is not None:
+            if self.ping_interval is not None and idle_seconds >= self.ping_interval:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception as e:
+                    logging.warning(f"连接池空闲连接已失效，重新获取: {e}")
+                    with self._cond:
+                        self._stats['ping_failures'] += 1
+                        self._stats['reused'] -= 1
+                    self.checkin(conn, discard=True)
+                    return self.checkout()
+            return conn
+
+        try:
+            conn = self._connect_func()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def grow(self, max_size):
+        """
+        提高连接总数上限，已经小于等于当前上限时不变；等待中的借用方会立即重试
+
+        参数:
+            max_size: int, 新的连接总数上限
+
+        返回:
+            int: 调整后的上限
+        """
+        with self._cond:
+            if int(max_size) > self.max_size:
+                self.max_size = int(max_size)
+                self._cond.notify_all()
+            return self.max_size
+
+    def checkin(self, conn, discard=False):
+        """
+        归还连接到池中
+        归还前回滚未提交的事务，与直接关闭连接时的行为保持一致
+
+        参数:
+            conn: 通过checkout借出的连接
+            discard: bool, 为True时直接关闭该连接而不放回池中（如连接已损坏）
+        """
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception as e:
+                logging.warning(f"归还连接时回滚失败，丢弃该连接: {e}")
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                to_close = [conn]
+            else:
+                self._idle.append((conn, time.monotonic()))
+                to_close = []
+            self._cond.notify()
+        self._close_connections(to_close)
+
+    @contextmanager
+    def connection(self):
+        """
+        借用连接的上下文管理器，退出时自动归还
+
+        用法:
+            with pool.connection() as conn:
+                ...
+        """
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def close(self):
+        """
+        关闭池中所有空闲连接，已借出的连接在归还时关闭
+        """
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close_connections(idle)
+
+    def stats(self):
+        """
+        获取连接池统计信息
+
+        返回:
+            dict: 包含创建数、复用数（即避免的握手次数）、当前空闲数和借出数
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats['handshakes_avoided'] = stats['reused']
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._in_use
+            stats['max_size'] = self.max_size
+        return stats
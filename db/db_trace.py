@@ -0,0 +1,181 @@
+import re
+import random
+import logging
+import threading
+from functools import lru_cache
+from tabulate import tabulate
+
+# 延迟直方图的桶上限（毫秒），最后一个桶收集所有更慢的语句
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(VALUES\s*\(\?\.\.\.\))(?:\s*,\s*\(\?\.\.\.\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=512)
+def normalize_sql(sql):
+    """
+    将SQL归一化为统计键：去除多余空白，字面量和占位符替换为?，合并IN列表和多行VALUES
+
+    参数:
+        sql: str, 原始SQL语句
+
+    返回:
+        str: 归一化后的SQL
+    """
+    text = sql.replace('%s', '?')
+    text = _STRING_LITERAL.sub('?', text)
+    text = _NUMBER_LITERAL.sub('?', text)
+    text = _WHITESPACE.sub(' ', text).strip()
+    text = _PLACEHOLDER_LIST.sub('(?...)', text)
+    text = _VALUES_LIST.sub(r'\1', text)
+    return text
+
+class SqlTracer:
+    """
+    SQL执行追踪器
+    默认关闭；开启后按采样率记录语句耗时和影响行数，按归一化SQL汇总为直方图
+    """
+
+    def __init__(self, enabled=False, sample_rate=1.0, log_level=logging.DEBUG):
+        """
+        初始化追踪器
+
+        参数:
+            enabled: bool, 是否开启追踪
+            sample_rate: float, 采样率，取值0~1
+            log_level: int, 被采样语句的日志级别
+        """
+        self.enabled = enabled
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self.log_level = log_level
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def should_sample(self):
+        """
+        判断当前语句是否需要采样
+        """
+        if not self.enabled:
+            return False
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def log_statement(self, cursor, sql, params=None):
+        """
+        按配置的日志级别输出被采样的语句，只有该级别启用时才填充参数生成完整SQL
+        """
+        if not logging.getLogger().isEnabledFor(self.log_level):
+            return
+        if params:
+            try:
+                final_sql = cursor.mogrify(sql, params)
+                if isinstance(final_sql, bytes):
+                    final_sql = final_sql.decode('utf-8')
+            except Exception:
+                final_sql = f"{sql} 参数: {params}"
+        else:
+            final_sql = sql
+        logging.log(self.log_level, f"执行SQL: {final_sql}")
+
+    def record(self, sql, elapsed_ms, rowcount):
+        """
+        记录一次语句执行
+
+        参数:
+            sql: str, 原始SQL语句
+            elapsed_ms: float, 执行耗时（毫秒）
+            rowcount: int, 返回或影响的行数
+        """
+        key = normalize_sql(sql)
+        bucket = len(LATENCY_BUCKETS_MS)
+        for i, upper in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= upper:
+                bucket = i
+                break
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0,
+                         'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+                self._stats[key] = entry
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += max(rowcount or 0, 0)
+            entry['buckets'][bucket] += 1
+
+    @staticmethod
+    def _percentile_bound(buckets, count, percentile):
+        """
+        根据直方图估算分位数所在桶的上限
+        """
+        threshold = count * percentile
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= threshold:
+                return f"<={LATENCY_BUCKETS_MS[i]}" if i < len(LATENCY_BUCKETS_MS) else f">{LATENCY_BUCKETS_MS[-1]}"
+        return "-"
+
+    def summary(self, top=20):
+        """
+        获取按总耗时排序的统计汇总
+
+        参数:
+            top: int, 返回的语句条数
+
+        返回:
+            list: 每个元素为 [SQL, 次数, 总耗时, 平均耗时, 最大耗时, P95, 行数]
+        """
+        with self._lock:
+            items = [(key, dict(entry, buckets=list(entry['buckets']))) for key, entry in self._stats.items()]
+        items.sort(key=lambda item: item[1]['total_ms'], reverse=True)
+        rows = []
+        for key, entry in items[:top]:
+            rows.append([
+                key if len(key) <= 80 else key[:77] + '...',
+                entry['count'],
+                entry['total_ms'],
+                entry['total_ms'] / entry['count'],
+                entry['max_ms'],
+                self._percentile_bound(entry['buckets'], entry['count'], 0.95),
+                entry['rows']
+            ])
+        return rows
+
+    def totals(self):
+        """
+        获取所有已记录语句的合计，采样率为1时statements即数据库往返次数
+
+        返回:
+            dict: statements、total_ms、rows
+        """
+        with self._lock:
+            entries = list(self._stats.values())
+        return {
+            'statements': sum(entry['count'] for entry in entries),
+            'total_ms': sum(entry['total_ms'] for entry in entries),
+            'rows': sum(entry['rows'] for entry in entries),
+        }
+
+    def log_summary(self, top=20):
+        """
+        以表格形式输出统计汇总
+        """
+        if not self.enabled:
+            return
+        rows = self.summary(top)
+        if not rows:
+            logging.info("SQL追踪: 没有采样到语句")
+            return
+        table = tabulate(rows, headers=["SQL", "次数", "总耗时ms", "平均ms", "最大ms", "P95 ms", "行数"], floatfmt=".2f")
+        logging.info(f"SQL追踪汇总（采样率 {self.sample_rate}）:\n{table}")
+
+    def reset(self):
+        """
+        清空已记录的统计
+        """
+        with self._lock:
+            self._stats.clear()
@@ -0,0 +1,11 @@
+# 数据入库公共流程：数据集规范、DataFrame列式规范化、板块分类、水位线、原始数据缓存等
+# 依赖数据库连接的入库引擎和变化记录在db.ingest.engine、db.ingest.changes中按需导入
+from db.ingest.normalize import normalize_frame, drop_duplicate_keys, row_fingerprints, add_row_fingerprints
+from db.ingest.board import BOARDS, BOARD_MARKETS, classify_board, board_series, allowed_boards, split_except_prefixes
+from db.ingest.watermark import frame_max_notice_date, slice_since_watermark
+from db.ingest.dtypes import compact_frame, frame_memory
+from db.ingest.fetch_cache import FetchCache, fetch_cache
+from db.ingest.metrics import RunMetrics, peak_rss_bytes, current_rss_bytes
+from db.ingest.spec import DatasetSpec
+from db.ingest.specs import (PREREPORT_COLUMNS, REPORT_COLUMNS, PREREPORT_KEY, REPORT_KEY, PREREPORT_DTYPES, REPORT_DTYPES,
+                             PREREPORT_SPEC, REPORT_SPEC, DATASET_SPECS)
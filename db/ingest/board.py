@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+# 股票所属板块，由股票代码前缀确定，入库时计算一次写入明细表的board列
+BOARD_SH_MAIN = 'sh_main'   # 沪市主板
+BOARD_SZ_MAIN = 'sz_main'   # 深市主板（含原中小板）
+BOARD_CHINEXT = 'chinext'   # 创业板
+BOARD_STAR = 'star'         # 科创板
+BOARD_BJ = 'bj'             # 北交所
+BOARD_OTHER = 'other'       # 其他（B股等）
+
+# 板块 -> 股票代码前缀，按顺序匹配
+BOARD_PREFIXES = (
+    (BOARD_STAR, ('688', '689')),
+    (BOARD_SH_MAIN, ('600', '601', '603', '605')),
+    (BOARD_CHINEXT, ('300', '301', '302')),
+    (BOARD_SZ_MAIN, ('000', '001', '002', '003', '004')),
+    (BOARD_BJ, ('43', '83', '87', '920')),
+)
+
+# 全部板块，未匹配任何前缀的代码归入BOARD_OTHER
+BOARDS = tuple(board for board, _ in BOARD_PREFIXES) + (BOARD_OTHER,)
+
+# 板块 -> 交易所，用于akshare按市场查询的接口
+BOARD_MARKETS = {
+    BOARD_SH_MAIN: 'sh',
+    BOARD_STAR: 'sh',
+    BOARD_SZ_MAIN: 'sz',
+    BOARD_CHINEXT: 'sz',
+    BOARD_BJ: 'bj',
+}
+
+CODE_WIDTH = 6
+
+def classify_board(stock_code):
+    """
+    根据股票代码确定所属板块
+
+    参数:
+        stock_code: str, 股票代码，如300750
+
+    返回:
+        str: 板块，见BOARDS；代码为空时返回None
+    """
+    if stock_code is None:
+        return None
+    code = str(stock_code).strip().zfill(CODE_WIDTH)
+    for board, prefixes in BOARD_PREFIXES:
+        if code.startswith(prefixes):
+            return board
+    return BOARD_OTHER
+
+def board_series(codes):
+    """
+    整列计算股票代码所属的板块，与classify_board的规则一致
+
+    参数:
+        codes: pandas.Series, 股票代码列
+
+    返回:
+        list: 板块列表，代码为空的行为None
+    """
+    text = codes.astype(str).str.strip().str.zfill(CODE_WIDTH)
+    boards = np.select([text.str.startswith(prefixes).to_numpy(dtype=bool) for _, prefixes in BOARD_PREFIXES],
+                       [board for board, _ in BOARD_PREFIXES], default=BOARD_OTHER)
+    return pd.Series(boards, index=codes.index, dtype=object).where(codes.notna(), None).tolist()
+
+def board_case_sql(code_column='stock_code'):
+    """
+    按股票代码计算板块的SQL表达式，用于给已有数据补算board列
+
+    参数:
+        code_column: str, 股票代码列名
+
+    返回:
+        str: CASE表达式
+    """
+    whens = []
+    for board, prefixes in BOARD_PREFIXES:
+        condition = " OR ".join(f"{code_column} LIKE '{prefix}%'" for prefix in prefixes)
+        whens.append(f"WHEN {condition} THEN '{board}'")
+    return f"CASE {' '.join(whens)} ELSE '{BOARD_OTHER}' END"
+
+def _prefix_within(prefix, boards):
+    """
+    以prefix开头的股票代码是否全部属于指定板块
+    """
+    board_prefixes = tuple(p for board, prefixes in BOARD_PREFIXES if board in boards for p in prefixes)
+    if len(prefix) >= 3:
+        return prefix.startswith(board_prefixes)
+    # 较短的前缀：以它开头的每个三位代码段都必须落在这些板块的前缀内
+    segments = [prefix + str(i).zfill(3 - len(prefix)) for i in range(10 ** (3 - len(prefix)))]
+    return all(segment.startswith(board_prefixes) for segment in segments)
+
+def _boards_covered(prefixes):
+    """
+    全部前缀都被给定前缀覆盖的板块，即按这些前缀排除时已经整体排除的板块
+    """
+    return [board for board, board_prefixes in BOARD_PREFIXES
+            if all(bp.startswith(tuple(prefixes)) for bp in board_prefixes)]
+
+def boards_for_prefix(prefix):
+    """
+    与单个股票代码前缀完全等价的板块：前缀覆盖这些板块的全部前缀，且以它开头的代码全部属于这些板块
+    只覆盖板块一部分的前缀（如300不含301、302，43不含83、87、920）不能用板块代替，返回空列表
+
+    参数:
+        prefix: str, 股票代码前缀，如300
+
+    返回:
+        list: 对应的板块，不能用板块代替时返回空列表
+    """
+    boards, leftover = split_except_prefixes([prefix])
+    return [] if leftover else boards
+
+def split_except_prefixes(prefixes):
+    """
+    把排除的股票代码前缀拆分为可以用板块代替的部分和剩余的前缀，拆分前后排除的股票完全相同：
+    只有一组前缀覆盖了某个板块的全部前缀（如300,301,302对应创业板）时才按板块排除，
+    且只有代码全部落在这些板块内的前缀才会被替换，其余前缀仍按 NOT LIKE 排除
+
+    参数:
+        prefixes: list, 排除的股票代码前缀
+
+    返回:
+        list: 可以整体排除的板块
+        list: 不能用板块代替、仍需按前缀排除的前缀
+    """
+    prefixes = [str(p).strip() for p in prefixes or [] if str(p).strip()]
+    digits = [p for p in prefixes if p.isdigit()]
+    covered = _boards_covered(digits) if digits else []
+    replaced = [p for p in digits if covered and _prefix_within(p, covered)]
+    leftover = [p for p in prefixes if p not in replaced]
+    # 只保留实际替换了前缀的板块
+    boards = [board for board, board_prefixes in BOARD_PREFIXES if board in covered
+              and any(bp.startswith(p) or p.startswith(bp) for bp in board_prefixes for p in replaced)]
+    return boards, leftover
+
+def allowed_boards(except_board):
+    """
+    排除指定板块后剩余的板块，筛选查询使用 board IN (...) 代替逐个前缀的 NOT LIKE，可以使用索引
+
+    参数:
+        except_board: list, 需要排除的板块
+
+    返回:
+        list: 剩余的板块
+    """
+    excluded = set(except_board or [])
+    return [board for board in BOARDS if board not in excluded]
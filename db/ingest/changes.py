@@ -0,0 +1,121 @@
+import logging
+import numpy as np
+import pandas as pd
+from db.db_manager import db_manager
+from db.ingest.normalize import ROW_HASH_SOURCE
+
+# 变化类型：NEW 库中不存在的记录，CHANGED 唯一键已存在但内容指纹不同
+CHANGE_NEW = 'NEW'
+CHANGE_CHANGED = 'CHANGED'
+
+CHANGE_LOG_TABLE = 'stock_change_log'
+
+def get_existing_hashes(table, report_date, key_columns):
+    """
+    读取报告期内已入库记录的唯一键和内容指纹
+
+    参数:
+        table: str, 明细表名
+        report_date: str, 报告日期
+        key_columns: tuple, 唯一键列（不含report_date）
+
+    返回:
+        pandas.DataFrame: 唯一键列 + existing_hash 列
+    """
+    select_sql = f"SELECT {', '.join(key_columns)}, row_hash FROM {table} WHERE report_date = %s"
+    rows = list(db_manager.fetch_iter(select_sql, (report_date,)))
+    return pd.DataFrame(rows, columns=[*key_columns, 'existing_hash'])
+
+def classify_changes(df, column_spec, key_columns, existing_hashes):
+    """
+    按唯一键关联已入库记录，比较内容指纹，得到每行的变化类型
+    df需要先通过add_row_fingerprints附加指纹列
+
+    参数:
+        df: pandas.DataFrame, akshare返回的原始数据（已附加指纹）
+        column_spec: tuple, 列规范，用于把唯一键映射为源列名
+        key_columns: tuple, 唯一键列（不含report_date）
+        existing_hashes: pandas.DataFrame, get_existing_hashes的返回值
+
+    返回:
+        pandas.Series: 与df索引一致，值为NEW/CHANGED，内容未变化的行为None
+    """
+    sources = {column: source for column, source, _ in column_spec}
+    keys = pd.DataFrame({
+        column: df[sources[column]].astype(str).where(df[sources[column]].notna(), '').to_numpy()
+        for column in key_columns
+    })
+    keys['row_hash'] = df[ROW_HASH_SOURCE].to_numpy()
+    existing = existing_hashes.copy()
+    for column in key_columns:
+        existing[column] = existing[column].fillna('').astype(str)
+    # 唯一键改为NOT NULL之前，NULL键可能已写入重复记录，每个键只保留一条参与比对，保证结果与df逐行对应
+    duplicated = existing.duplicated(subset=list(key_columns), keep='last')
+    if duplicated.any():
+        logging.warning(f"已入库记录中唯一键 {key_columns} 重复 {int(duplicated.sum())} 条，请运行 db/initDb.py 清理")
+        existing = existing[~duplicated]
+
+    merged = keys.merge(existing, how='left', on=list(key_columns), indicator=True, validate='many_to_one')
+    change_types = np.where(
+        merged['_merge'] == 'left_only', CHANGE_NEW,
+        np.where(merged['existing_hash'] != merged['row_hash'], CHANGE_CHANGED, None)
+    )
+    return pd.Series(change_types, index=df.index, dtype=object)
+
+def record_changes(source_table, report_date, df, change_types, code_source='股票代码'):
+    """
+    将新增和内容变化的股票写入变化记录表，供报告生成和消息推送读取
+
+    参数:
+        source_table: str, 明细表名
+        report_date: str, 报告日期
+        df: pandas.DataFrame, 已写入的数据（已附加指纹）
+        change_types: pandas.Series, classify_changes的返回值
+        code_source: str, 股票代码的源列名
+
+    返回:
+        bool: 表示操作是否成功
+    """
+    mask = change_types.notna()
+    if not mask.any():
+        return True
+    rows = list(zip(
+        [source_table] * int(mask.sum()),
+        [report_date] * int(mask.sum()),
+        df.loc[mask, code_source].astype(str).tolist(),
+        change_types[mask].tolist(),
+        df.loc[mask, ROW_HASH_SOURCE].tolist(),
+    ))
+    counts = change_types[mask].value_counts().to_dict()
+    logging.info(f"{source_table} 报告期 {report_date} 数据变化: 新增{counts.get(CHANGE_NEW, 0)}条, 内容变化{counts.get(CHANGE_CHANGED, 0)}条")
+    return db_manager.bulk_insert(
+        CHANGE_LOG_TABLE,
+        ['source_table', 'report_date', 'stock_code', 'change_type', 'row_hash'],
+        rows
+    )
+
+def get_changed_stocks(report_date, source_table=None, since=None):
+    """
+    获取报告期内新增或内容变化的股票代码
+
+    参数:
+        report_date: str, 报告日期
+        source_table: str, 只查询指定明细表的变化，为None时查询全部
+        since: datetime, 只返回该时间之后记录的变化，为None时返回全部
+
+    返回:
+        list: 排序后的股票代码列表
+    """
+    sql = f"SELECT DISTINCT stock_code FROM {CHANGE_LOG_TABLE} WHERE report_date = %s"
+    params = [report_date]
+    if source_table:
+        sql += " AND source_table = %s"
+        params.append(source_table)
+    if since is not None:
+        sql += " AND create_time >= %s"
+        params.append(since)
+    try:
+        return sorted(row[0] for row in db_manager.fetch_iter(sql, tuple(params)))
+    except Exception as e:
+        logging.error(f"获取变化股票列表时发生错误: {e}")
+        return []
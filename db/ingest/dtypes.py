@@ -0,0 +1,95 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+from db.ingest.normalize import DECIMAL_PLACES, parse_dates
+
+try:
+    import pyarrow  # noqa: F401  string[pyarrow]列依赖pyarrow
+    _CODE_DTYPE = 'string[pyarrow]'
+except ImportError:
+    _CODE_DTYPE = object
+
+# 获取数据后是否按数据集的类型方案转换为紧凑类型
+COMPACT_ENABLED = os.getenv('INGEST_COMPACT_DTYPES', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+
+# 不同值占行数的比例不超过该值时才转为category，否则保持原类型
+CATEGORY_MAX_RATIO = 0.5
+
+# 股票代码的固定宽度
+CODE_WIDTH = 6
+
+# 类型方案见db.ingest.specs：{源列名: 紧凑类型}
+# 紧凑类型: category 低基数文本, float32 单精度数值, code 定宽股票代码, date 日期（datetime64）
+
+def frame_memory(df):
+    """
+    DataFrame占用的内存（字节），包含object列中字符串本身的大小
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+def _to_category(series):
+    if series.nunique(dropna=True) > len(series) * CATEGORY_MAX_RATIO:
+        return None
+    return series.astype('category')
+
+def _to_float32(series):
+    numbers = pd.to_numeric(series, errors='coerce')
+    compact = numbers.astype('float32')
+    # 单精度取回后按明细表精度取整必须与原值一致，否则保持原类型
+    if not np.allclose(compact.astype('float64').round(DECIMAL_PLACES), numbers.round(DECIMAL_PLACES),
+                       rtol=0, atol=0, equal_nan=True):
+        return None
+    return compact
+
+def _to_code(series):
+    codes = series.astype(str).str.strip().str.zfill(CODE_WIDTH)
+    return codes.where(series.notna(), None).astype(_CODE_DTYPE)
+
+def _to_date(series):
+    return parse_dates(series)
+
+_CONVERTERS = {
+    'category': _to_category,
+    'float32': _to_float32,
+    'code': _to_code,
+    'date': _to_date,
+}
+
+def compact_frame(df, schema, enabled=None):
+    """
+    按类型方案原地转换获取到的DataFrame的列类型，减少后续处理中的内存占用和复制开销
+    转换不改变规范化后写入数据库的值和行内容指纹；精度不足或基数过高的列保持原类型
+
+    参数:
+        df: pandas.DataFrame, akshare返回的原始数据
+        schema: dict, {源列名: 紧凑类型}
+        enabled: bool, 是否转换，默认使用INGEST_COMPACT_DTYPES
+
+    返回:
+        pandas.DataFrame: 转换后的数据（与传入的是同一个对象）
+    """
+    enabled = COMPACT_ENABLED if enabled is None else enabled
+    if not enabled or not schema or df is None or df.empty:
+        return df
+
+    before = frame_memory(df)
+    skipped = []
+    for source, kind in schema.items():
+        if source not in df.columns:
+            continue
+        try:
+            converted = _CONVERTERS[kind](df[source])
+        except Exception as e:
+            logging.warning(f"列 {source} 转换为{kind}失败，保持原类型: {e}")
+            converted = None
+        if converted is None:
+            skipped.append(source)
+            continue
+        df[source] = converted
+    after = frame_memory(df)
+
+    remark = f"，保持原类型的列: {skipped}" if skipped else ""
+    logging.info(f"数据内存: 转换前{before / 1024 / 1024:.2f}MB，转换后{after / 1024 / 1024:.2f}MB"
+                 f"（{len(df)}行）{remark}")
+    return df
@@ -0,0 +1,856 @@
+import os
+import logging
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+from db.db_manager import db_manager
+from db.ingest.normalize import ROW_HASH_SOURCE, normalize_frame, drop_duplicate_keys, add_row_fingerprints, frame_fingerprint
+from db.ingest.watermark import frame_max_notice_date, slice_since_watermark
+from db.ingest.changes import CHANGE_NEW, get_existing_hashes, classify_changes, record_changes
+from db.ingest.fetch_cache import fetch_cache
+from db.ingest.dtypes import compact_frame
+from db.ingest.metrics import RunMetrics
+
+# 去重方式：memory 读取已存在的股票代码在内存中过滤；sql 依赖明细表唯一键由INSERT IGNORE跳过
+DEDUPE_MODE = os.getenv('INGEST_DEDUPE', 'memory').lower()
+# 入库方式：insert 只插入新记录（按DEDUPE_MODE去重）；upsert 按唯一键插入或更新，已发布记录的修订也会写入
+INGEST_MODE = os.getenv('INGEST_MODE', 'insert').lower()
+# 是否按头表记录的最大公告日期只处理新公告，以及水位线向前重叠的天数
+WATERMARK_ENABLED = os.getenv('INGEST_WATERMARK', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+WATERMARK_OVERLAP_DAYS = int(os.getenv('INGEST_WATERMARK_OVERLAP_DAYS', 1))
+# 规范化和写库的分块行数，限制同时转换为Python行元组的数据量
+CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', 5000))
+# 是否逐块提交并在头表记录断点；默认关闭，一个报告期在同一个事务中提交，读者看不到写了一半的数据
+# 开启后失败时已提交的分块会保留在明细表中（头表为FAILED），直到重新运行从断点继续
+CHECKPOINT_ENABLED = os.getenv('INGEST_CHECKPOINT', 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+
+class IngestionEngine:
+    """
+    通用入库引擎：按DatasetSpec获取数据并写入头表和明细表
+    列式规范化、批量写入、去重、upsert、水位线和变化记录都在这一条路径中完成
+    """
+
+    def __init__(self, spec, ingest_mode=None, dedupe_mode=None, watermark_enabled=None, overlap_days=None,
+                 chunk_size=None, checkpoint_enabled=None):
+        """
+        初始化入库引擎
+
+        参数:
+            spec: DatasetSpec, 数据集入库规范
+            ingest_mode: str, insert/upsert，默认使用INGEST_MODE
+            dedupe_mode: str, memory/sql，默认使用INGEST_DEDUPE
+            watermark_enabled: bool, 是否按公告日期水位线切片，默认使用INGEST_WATERMARK
+            overlap_days: int, 水位线向前重叠的天数，默认使用INGEST_WATERMARK_OVERLAP_DAYS
+            chunk_size: int, 规范化和写库的分块行数，默认使用INGEST_CHUNK_SIZE
+            checkpoint_enabled: bool, 是否逐块提交并记录断点，默认使用INGEST_CHECKPOINT
+        """
+        self.spec = spec
+        self.ingest_mode = (ingest_mode or INGEST_MODE).lower()
+        self.dedupe_mode = (dedupe_mode or DEDUPE_MODE).lower()
+        self.watermark_enabled = WATERMARK_ENABLED if watermark_enabled is None else watermark_enabled
+        self.overlap_days = WATERMARK_OVERLAP_DAYS if overlap_days is None else overlap_days
+        self.chunk_size = max(1, int(chunk_size or CHUNK_SIZE))
+        self.checkpoint_enabled = CHECKPOINT_ENABLED if checkpoint_enabled is None else checkpoint_enabled
+
+    # ---------- 头表 ----------
+
+    def header_exists(self, report_date):
+        """
+        检查头表中是否存在该报告日期的记录
+
+        参数:
+            report_date: str, 报告日期，格式为YYYYMMDD
+
+        返回:
+            bool: 是否存在
+        """
+        try:
+            if not db_manager.execute(f"SELECT 1 FROM {self.spec.header_table} WHERE report_date = %s", (report_date,)):
+                return False
+            return db_manager.fetchone() is not None
+
+        except Exception as e:
+            logging.error(f"检查头表记录时发生错误: {e}")
+            return False
+
+    def get_header_status(self, report_date):
+        """
+        获取头表记录的处理状态
+
+        参数:
+            report_date: str, 报告日期
+
+        返回:
+            str: 处理状态，没有记录时返回None
+        """
+        try:
+            if not db_manager.execute(f"SELECT status FROM {self.spec.header_table} WHERE report_date = %s", (report_date,)):
+                return None
+            row = db_manager.fetchone()
+            return row[0] if row else None
+
+        except Exception as e:
+            logging.error(f"获取头表状态时发生错误: {e}")
+            return None
+
+    def save_header(self, report_date, status="PENDING"):
+        """
+        保存头表记录：不存在则插入，已存在则更新状态
+
+        参数:
+            report_date: str, 报告日期
+            status: str, 状态 (PENDING, PROCESSING, COMPLETED, FAILED)
+
+        返回:
+            bool: 表示操作是否成功
+        """
+        try:
+            if not db_manager.connect():
+                logging.error("数据库连接失败")
+                return False
+
+            upsert_sql = f"""
+            INSERT INTO {self.spec.header_table}
+            (report_date, query_param, status)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE status = VALUES(status)
+            """
+
+            if not db_manager.execute(upsert_sql, (report_date, f"date={report_date}", status)):
+                return False
+            db_manager.commit()
+            return True
+
+        except Exception as e:
+            logging.error(f"保存头表记录时发生错误: {e}")
+            return False
+
+        finally:
+            db_manager.close()
+
+    def update_header_status(self, report_date, record_count, status="COMPLETED", remark=None):
+        """
+        更新头表状态
+
+        参数:
+            report_date: str, 报告日期
+            record_count: int, 本次运行写入明细表的记录数量（新增及内容变化的行）；
+                数据已全部存在、无需写入时与原实现一致，为该报告期已有的记录数
+            status: str, 状态 (PENDING, PROCESSING, COMPLETED, FAILED)
+            remark: str, 备注信息
+
+        返回:
+            bool: 表示操作是否成功
+        """
+        try:
+            if not db_manager.connect():
+                logging.error("数据库连接失败")
+                return False
+
+            update_sql = f"""
+            UPDATE {self.spec.header_table}
+            SET record_count = %s, status = %s, remark = %s
+            WHERE report_date = %s
+            """
+
+            db_manager.execute(update_sql, (record_count, status, remark, report_date))
+            db_manager.commit()
+
+            logging.info(f"头表状态更新成功！报告日期: {report_date}, 状态: {status}, 记录数: {record_count}")
+            return True
+
+        except Exception as e:
+            logging.error(f"更新头表状态时发生错误: {e}")
+            return False
+
+        finally:
+            db_manager.close()
+
+    def get_notice_watermark(self, report_date):
+        """
+        获取头表记录的已入库最大公告日期（水位线）
+
+        参数:
+            report_date: str, 报告日期
+
+        返回:
+            datetime.date: 水位线，没有记录时返回None
+        """
+        try:
+            select_sql = f"SELECT max_notice_date FROM {self.spec.header_table} WHERE report_date = %s"
+            if not db_manager.execute(select_sql, (report_date,)):
+                return None
+            row = db_manager.fetchone()
+            return row[0] if row else None
+
+        except Exception as e:
+            logging.error(f"获取公告日期水位线时发生错误: {e}")
+            return None
+
+    def update_notice_watermark(self, report_date, max_notice_date):
+        """
+        推进头表的公告日期水位线，只会向后移动
+
+        参数:
+            report_date: str, 报告日期
+            max_notice_date: datetime.date, 本次入库数据的最大公告日期
+
+        返回:
+            bool: 表示操作是否成功
+        """
+        if max_notice_date is None:
+            return True
+        try:
+            if not db_manager.connect():
+                logging.error("数据库连接失败")
+                return False
+
+            update_sql = f"""
+            UPDATE {self.spec.header_table}
+            SET max_notice_date = %s
+            WHERE report_date = %s AND (max_notice_date IS NULL OR max_notice_date < %s)
+            """
+
+            if not db_manager.execute(update_sql, (max_notice_date, report_date, max_notice_date)):
+                return False
+            db_manager.commit()
+            return True
+
+        except Exception as e:
+            logging.error(f"更新公告日期水位线时发生错误: {e}")
+            return False
+
+        finally:
+            db_manager.close()
+
+    # ---------- 明细表 ----------
+
+    def get_checkpoint(self, report_date):
+        """
+        获取头表记录的断点
+
+        参数:
+            report_date: str, 报告日期
+
+        返回:
+            tuple: (状态, 已提交的分块数, 已提交的源数据行数, 源数据指纹)，没有记录时返回None
+        """
+        try:
+            select_sql = f"""
+            SELECT status, checkpoint_chunk, checkpoint_offset, source_fingerprint
+            FROM {self.spec.header_table} WHERE report_date = %s
+            """
+            if not db_manager.execute(select_sql, (report_date,)):
+                return None
+            return db_manager.fetchone()
+
+        except Exception as e:
+            logging.error(f"获取断点时发生错误: {e}")
+            return None
+
+    def save_checkpoint(self, report_date, chunk, offset, source_fingerprint):
+        """
+        记录断点：已提交的分块数、源数据行数和源数据指纹，与分块数据在同一个事务中提交
+
+        参数:
+            report_date: str, 报告日期
+            chunk: int, 已提交的分块数，为None时清除断点
+            offset: int, 已提交的源数据行数
+            source_fingerprint: str, 源数据指纹
+
+        返回:
+            bool: 表示操作是否成功
+        """
+        try:
+            if not db_manager.connect():
+                logging.error("数据库连接失败")
+                return False
+
+            update_sql = f"""
+            UPDATE {self.spec.header_table}
+            SET checkpoint_chunk = %s, checkpoint_offset = %s, source_fingerprint = %s
+            WHERE report_date = %s
+            """
+
+            if not db_manager.execute(update_sql, (chunk, offset, source_fingerprint, report_date)):
+                return False
+            db_manager.commit()
+            return True
+
+        except Exception as e:
+            logging.error(f"记录断点时发生错误: {e}")
+            return False
+
+        finally:
+            db_manager.close()
+
+    def clear_checkpoint(self, report_date):
+        """
+        报告期处理完成后清除断点
+        """
+        return self.save_checkpoint(report_date, None, None, None)
+
+    def get_existing_codes(self, report_date):
+        """
+        根据报告日期获取已存在的股票代码集合，只读取单列用于去重
+
+        参数:
+            report_date: str, 报告日期，格式为YYYYMMDD
+
+        返回:
+            set: 已存在的股票代码
+        """
+        try:
+            select_sql = f"SELECT DISTINCT stock_code FROM {self.spec.detail_table} WHERE report_date = %s"
+            return {row[0] for row in db_manager.fetch_iter(select_sql, (report_date,))}
+
+        except Exception as e:
+            logging.error(f"获取已存在股票代码时发生错误: {e}")
+            return set()
+
+    def count_rows(self, report_date):
+        """
+        统计报告日期下的明细记录数
+
+        参数:
+            report_date: str, 报告日期，格式为YYYYMMDD
+
+        返回:
+            int: 记录数量，查询失败返回0
+        """
+        try:
+            if not db_manager.execute(f"SELECT COUNT(*) FROM {self.spec.detail_table} WHERE report_date = %s", (report_date,)):
+                return 0
+            row = db_manager.fetchone()
+            return row[0] if row else 0
+
+        except Exception as e:
+            logging.error(f"统计明细记录数时发生错误: {e}")
+            return 0
+
+    def delete_rows(self, report_date):
+        """
+        根据报告日期删除明细表中的数据
+
+        参数:
+            report_date: str, 报告日期，格式为YYYYMMDD
+
+        返回:
+            bool: 表示操作是否成功
+        """
+        try:
+            if not db_manager.connect():
+                logging.error("数据库连接失败")
+                return False
+
+            # 直接删除日期对应的子表数据
+            db_manager.execute(f"DELETE FROM {self.spec.detail_table} WHERE report_date = %s", (report_date,))
+
+            db_manager.commit()
+            logging.info(f"成功删除日期参数 {report_date} 的子表数据")
+            return True
+
+        except Exception as e:
+            logging.error(f"删除子表数据时发生错误: {e}")
+            return False
+
+        finally:
+            db_manager.close()
+
+    def insert(self, df, report_date, ignore=False, upsert=False, metrics=None):
+        """
+        将数据按chunk_size分块规范化后批量写入明细表，同一时刻只有一个分块转换为行元组
+
+        参数:
+            df: pandas.DataFrame, 原始数据
+            report_date: str, 报告日期，用于关联头表
+            ignore: bool, 为True时由唯一键跳过已存在的记录（INSERT IGNORE）
+            upsert: bool, 为True时按唯一键插入或更新，已存在的记录只更新变化的列
+            metrics: RunMetrics, 记录分块写入指标，可选
+
+        返回:
+            bool: 表示操作是否成功
+            int: 插入的记录数量
+        """
+        spec = self.spec
+        try:
+            if df is None:
+                logging.error("错误：未提供数据")
+                return False, 0
+
+            if df.empty:
+                logging.info("没有获取到数据，请检查日期参数或稍后再试")
+                return False, 0
+
+            logging.info(f"准备插入{len(df)}条{spec.label}数据")
+
+            if not db_manager.connect():
+                logging.error("数据库连接失败")
+                return False, 0
+
+            if report_date is None:
+                logging.error("错误：未提供报告日期")
+                return False, 0
+
+            if not self.header_exists(report_date):
+                logging.error(f"错误：报告日期 {report_date} 在头表中不存在")
+                return False, 0
+
+            success, insert_count, _ = self._write_chunks(spec.detail_table, df, report_date, ignore, upsert, metrics)
+            if not success:
+                return False, 0
+
+            db_manager.commit()
+            logging.info(f"成功插入{insert_count}条数据到{spec.detail_table}表")
+
+            return True, insert_count
+
+        except Exception as e:
+            logging.error(f"插入数据时发生错误: {e}")
+            return False, 0
+
+    def _write_chunks(self, table, df, report_date, ignore=False, upsert=False, metrics=None):
+        """
+        按chunk_size分块规范化并批量写入指定表，不提交事务
+
+        返回:
+            bool: 表示操作是否成功
+            int: 写入的记录数量
+            list: 写入的列名
+        """
+        spec = self.spec
+        insert_count = 0
+        columns = None
+        for start in range(0, len(df), self.chunk_size):
+            # 按列规范化数据：列名映射、数值转换、NaN转NULL、日期解析
+            chunk = df.iloc[start:start + self.chunk_size]
+            columns, rows = normalize_frame(chunk, spec.columns, {'report_date': report_date}, spec.key_columns)
+
+            # 批量写入，避免逐行INSERT的往返开销；upsert时更新唯一键以外的所有列
+            update_columns = spec.update_columns(columns) if upsert else None
+            if not db_manager.bulk_insert(table, columns, rows, ignore=ignore, update_columns=update_columns):
+                logging.error(f"批量写入{table}表失败")
+                return False, 0, columns
+            insert_count += len(rows)
+            if metrics is not None:
+                metrics.add_chunk(len(rows))
+            del chunk, rows
+        return True, insert_count, columns
+
+    # ---------- 整期重载 ----------
+
+    @property
+    def staging_table(self):
+        """
+        整期重载使用的暂存表名
+        """
+        return f"{self.spec.detail_table}_staging"
+
+    def ensure_staging_table(self):
+        """
+        创建与明细表结构一致的暂存表（不含外键），DDL会隐式提交，必须在事务外执行
+        明细表补加列后已有暂存表的列与明细表不一致，暂存表只存放重载过程中的临时数据，直接删除后重建
+
+        返回:
+            bool: 表示操作是否成功
+        """
+        try:
+            if not db_manager.connect():
+                logging.error("数据库连接失败")
+                return False
+            detail, staging = self.spec.detail_table, self.staging_table
+            staging_columns = db_manager.table_columns(staging)
+            if staging_columns and staging_columns != db_manager.table_columns(detail):
+                logging.info(f"暂存表{staging}与{detail}表结构不一致，重新创建")
+                if not db_manager.execute(f"DROP TABLE {staging}"):
+                    return False
+            if not db_manager.execute(f"CREATE TABLE IF NOT EXISTS {staging} LIKE {detail}"):
+                return False
+            db_manager.commit()
+            return True
+
+        except Exception as e:
+            logging.error(f"创建暂存表时发生错误: {e}")
+            return False
+
+    def load_staging(self, df, report_date, metrics=None):
+        """
+        清理暂存表中该报告期的残留数据后，将数据分块批量写入暂存表并提交
+        读者看不到暂存表，写入耗时再长也不影响明细表的查询
+
+        参数:
+            df: pandas.DataFrame, 已去重并计算指纹的数据
+            report_date: str, 报告日期
+            metrics: RunMetrics, 记录分块写入指标，可选
+
+        返回:
+            bool: 表示操作是否成功
+            int: 写入的记录数量
+            list: 写入的列名
+        """
+        try:
+            db_manager.execute(f"DELETE FROM {self.staging_table} WHERE report_date = %s", (report_date,))
+            success, count, columns = self._write_chunks(self.staging_table, df, report_date, metrics=metrics)
+            if not success:
+                db_manager.rollback()
+                return False, 0, columns
+            db_manager.commit()
+            logging.info(f"已写入{count}条数据到暂存表{self.staging_table}")
+            return True, count, columns
+
+        except Exception as e:
+            logging.error(f"写入暂存表时发生错误: {e}")
+            db_manager.rollback()
+            return False, 0, None
+
+    def swap_from_staging(self, report_date, columns):
+        """
+        在当前事务中用暂存表的数据替换明细表中该报告期的数据，全部在服务端完成：
+        1. 删除暂存表中没有的唯一键对应的明细记录
+        2. 暂存表中新增或行内容指纹变化的记录按唯一键插入或更新到明细表
+        3. 清理暂存表
+        内容未变化的记录不会被删除或重写，事务只锁定实际变化的行，提交前读者看到的始终是旧数据
+
+        参数:
+            report_date: str, 报告日期
+            columns: list, 需要复制的列名
+
+        返回:
+            int: 明细表中该报告期的记录数量
+        """
+        detail, staging = self.spec.detail_table, self.staging_table
+        column_list = ", ".join(columns)
+        # 唯一键可能包含NULL，使用NULL安全的比较
+        same_key = " AND ".join(f"d.{column} <=> s.{column}" for column in self.spec.key_columns)
+
+        # 待删除的id先物化到派生表中，MySQL不允许在DELETE的子查询中直接读取被删除的表
+        if not db_manager.execute(
+                f"DELETE FROM {detail} WHERE id IN (SELECT id FROM ("
+                f"SELECT d.id FROM {detail} d LEFT JOIN {staging} s ON s.report_date = d.report_date AND {same_key} "
+                f"WHERE d.report_date = %s AND s.report_date IS NULL) gone)",
+                (report_date,)):
+            raise RuntimeError(f"删除{detail}表中已不存在的记录失败")
+
+        update_columns = self.spec.update_columns(columns)
+        if not db_manager.execute(
+                f"INSERT INTO {detail} ({column_list}) SELECT {column_list} FROM {staging} s "
+                f"WHERE s.report_date = %s AND NOT EXISTS (SELECT 1 FROM {detail} d "
+                f"WHERE d.report_date = s.report_date AND {same_key} AND d.row_hash <=> s.row_hash) "
+                "ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = VALUES({column})" for column in update_columns),
+                (report_date,)):
+            raise RuntimeError(f"从暂存表复制数据到{detail}表失败")
+        if not db_manager.execute(f"DELETE FROM {staging} WHERE report_date = %s", (report_date,)):
+            raise RuntimeError(f"清理暂存表{staging}失败")
+        return self.count_rows(report_date)
+
+    def reload(self, df, report_date):
+        """
+        整期重载：用本次获取的完整数据替换明细表中该报告期的全部数据
+        1. 同批次按唯一键去重，计算行内容指纹并与已入库记录比对
+        2. 分块批量写入暂存表（事务外，不影响读者）
+        3. 在一个短事务中按唯一键替换明细数据（只删除、写入实际变化的行）、写入变化记录、更新头表状态和水位线
+
+        参数:
+            df: pandas.DataFrame, 原始数据
+            report_date: str, 报告日期，格式为YYYYMMDD
+
+        返回:
+            bool: 表示操作是否成功
+        """
+        metrics = RunMetrics(f"{self.spec.label} {report_date} 整期重载")
+        try:
+            return self._reload(df, report_date, metrics)
+        finally:
+            metrics.log()
+
+    def _reload(self, df, report_date, metrics):
+        spec = self.spec
+        date = report_date
+        try:
+            if df is None or df.empty:
+                logging.info("没有获取到数据，请检查日期参数或稍后再试")
+                return False
+
+            logging.info(f"成功获取到{len(df)}条{spec.label}数据，开始整期重载")
+            batch_max_notice_date = frame_max_notice_date(df, spec.columns)
+            df = drop_duplicate_keys(df, spec.columns, spec.key_columns)
+            df = add_row_fingerprints(df, spec.columns)
+            existing_hashes = get_existing_hashes(spec.detail_table, date, spec.key_columns)
+            change_types = classify_changes(df, spec.columns, spec.key_columns, existing_hashes)
+            written_count = int(change_types.notna().sum())
+
+            logging.info("步骤1: 写入暂存表")
+            if not self.ensure_staging_table():
+                return False
+            success, staged_count, columns = self.load_staging(df, date, metrics)
+            if not success:
+                with db_manager.transaction():
+                    self.save_header(date, "FAILED")
+                    self.update_header_status(date, 0, "FAILED", "写入暂存表失败")
+                return False
+
+            logging.info("步骤2: 从暂存表替换明细数据")
+            try:
+                with db_manager.transaction():
+                    if not self.save_header(date, "PENDING"):
+                        raise RuntimeError("保存头表记录失败")
+                    row_count = self.swap_from_staging(date, columns)
+                    if not record_changes(spec.detail_table, date, df, change_types, spec.source_of('stock_code')):
+                        raise RuntimeError("写入数据变化记录失败")
+                    # 头表记录数与增量写入一致，为本次写入的新增和内容变化的记录数
+                    if not self.update_header_status(date, written_count, "COMPLETED", "整期重载成功"):
+                        raise RuntimeError("更新头表状态失败")
+                    if not self.update_notice_watermark(date, batch_max_notice_date):
+                        raise RuntimeError("更新公告日期水位线失败")
+                    if not self.clear_checkpoint(date):
+                        raise RuntimeError("清除断点失败")
+            except Exception as e:
+                logging.error(f"替换明细数据失败，明细表保持原数据: {e}")
+                with db_manager.transaction():
+                    self.save_header(date, "FAILED")
+                    self.update_header_status(date, 0, "FAILED", "整期重载失败")
+                return False
+
+            db_manager.close()
+            logging.info(f"整期重载完成，写入{written_count}条新增或变化的数据，{spec.detail_table}表报告期{date}共{row_count}条数据")
+            return True
+
+        except Exception as e:
+            logging.error(f"整期重载时发生错误: {e}")
+            db_manager.close()
+            return False
+
+    def _chunk_bounds(self, df):
+        """
+        按chunk_size计算分块的行范围，分块边界只落在同一股票代码的所有行之后
+        按股票代码去重时，从断点继续的剩余行不会因为前面分块写入了同一只股票而被跳过
+
+        返回:
+            list: [(起始行, 结束行), ...]，行号为df中的位置
+        """
+        n = len(df)
+        code_source = self.spec.source_of('stock_code')
+        if n == 0:
+            return []
+        if code_source not in df.columns:
+            return [(start, min(start + self.chunk_size, n)) for start in range(0, n, self.chunk_size)]
+        # 每行所属股票代码最后一次出现的位置，前缀的最大值等于当前位置时可以在其后切分
+        positions = pd.Series(np.arange(n))
+        last_position = positions.groupby(df[code_source].astype(str).to_numpy()).transform('max').to_numpy()
+        cuts = np.flatnonzero(np.maximum.accumulate(last_position) == np.arange(n)) + 1
+        bounds = []
+        start = 0
+        while start < n:
+            i = np.searchsorted(cuts, start + self.chunk_size)
+            end = int(cuts[i]) if i < len(cuts) else n
+            bounds.append((start, end))
+            start = end
+        return bounds
+
+    def _resume_point(self, report_date, source_fingerprint, bounds):
+        """
+        检查头表断点，源数据指纹一致且断点与当前分块边界吻合时返回可跳过的分块数和行数
+
+        返回:
+            tuple: (已提交的分块数, 已提交的源数据行数)，不能续传时返回 (0, 0)
+        """
+        if not self.checkpoint_enabled:
+            return 0, 0
+        checkpoint = self.get_checkpoint(report_date)
+        if not checkpoint:
+            return 0, 0
+        status, chunk, offset, fingerprint = checkpoint
+        if status == 'COMPLETED' or not chunk or fingerprint != source_fingerprint:
+            return 0, 0
+        if chunk > len(bounds) or bounds[chunk - 1][1] != offset:
+            logging.info("断点与当前分块边界不一致，重新处理全部数据")
+            return 0, 0
+        return chunk, offset
+
+    # ---------- 入库流程 ----------
+
+    def fetch(self, report_date):
+        """
+        按数据集规范获取原始数据，优先使用本地磁盘缓存，见db.ingest.fetch_cache
+        获取后立即按数据集的类型方案转换为紧凑类型，见db.ingest.dtypes
+
+        参数:
+            report_date: str, 报告日期，格式为YYYYMMDD
+
+        返回:
+            pandas.DataFrame: 原始数据
+        """
+        df = fetch_cache.get_or_fetch(self.spec.name, report_date, self.spec.fetcher)
+        return compact_frame(df, self.spec.dtypes)
+
+    def run(self, report_date, reload=False):
+        """
+        获取并入库一个报告期的数据
+
+        参数:
+            report_date: str, 报告日期，格式为YYYYMMDD
+            reload: bool, 为True时通过暂存表整期重载，替换该报告期的全部明细数据
+
+        返回:
+            bool: 表示操作是否成功
+        """
+        try:
+            logging.info(f"开始处理股票{self.spec.label}数据...")
+            df = self.fetch(report_date)
+        except Exception as e:
+            logging.error(f"处理数据时发生错误: {e}")
+            db_manager.close()
+            return False
+        if reload:
+            return self.reload(df, report_date)
+        return self.ingest(df, report_date)
+
+    def ingest(self, df, report_date):
+        """
+        入库已获取的数据：
+        1. 按公告日期水位线切片
+        2. 计算行内容指纹，源数据未变化时从头表断点继续，并与已入库记录比对、去重
+        3. 分块写入明细和变化记录，每个分块与断点一起提交（INGEST_CHECKPOINT关闭时整体一个事务）
+        4. 更新头表状态和水位线，清除断点
+        结束时记录写入行数、分块数、耗时和峰值RSS
+
+        参数:
+            df: pandas.DataFrame, 原始数据
+            report_date: str, 报告日期，格式为YYYYMMDD
+
+        返回:
+            bool: 表示操作是否成功
+        """
+        metrics = RunMetrics(f"{self.spec.label} {report_date}")
+        try:
+            return self._ingest(df, report_date, metrics)
+        finally:
+            metrics.log()
+
+    def _ingest(self, df, report_date, metrics):
+        spec = self.spec
+        date = report_date
+        try:
+            # 检查是否有数据返回
+            if df is None or df.empty:
+                logging.info("没有获取到数据，请检查日期参数或稍后再试")
+                return False
+
+            logging.info(f"成功获取到{len(df)}条{spec.label}数据")
+
+            # 按公告日期水位线切片，跳过上次已入库的公告，之后的比对和写库只处理新公告
+            if self.watermark_enabled:
+                watermark = self.get_notice_watermark(date)
+                fetched_count = len(df)
+                df, skipped_count = slice_since_watermark(df, spec.columns, watermark, self.overlap_days)
+                logging.info(f"公告日期水位线: {watermark}（重叠{self.overlap_days}天），获取{fetched_count}条，跳过{skipped_count}条，剩余{len(df)}条")
+                if df.empty:
+                    logging.info("水位线之后没有新公告，无需处理")
+                    db_manager.close()
+                    return True
+            batch_max_notice_date = frame_max_notice_date(df, spec.columns)
+
+            # 同一批次内按唯一键去重
+            df = drop_duplicate_keys(df, spec.columns, spec.key_columns)
+
+            # 计算行内容指纹，整批指纹用于判断断点续传时源数据是否变化
+            df = add_row_fingerprints(df, spec.columns)
+            source_fingerprint = frame_fingerprint(df[ROW_HASH_SOURCE].tolist())
+            bounds = self._chunk_bounds(df)
+
+            # 源数据未变化时从断点继续，已提交分块的行不再比对和写入
+            start_chunk, offset = self._resume_point(date, source_fingerprint, bounds)
+            if start_chunk:
+                logging.info(f"源数据未变化，从断点继续：跳过已提交的{start_chunk}个分块（{offset}行）")
+                df = df.iloc[offset:]
+                bounds = [(s - offset, e - offset) for s, e in bounds[start_chunk:]]
+
+            # 与已入库记录比对，得到每行是新增、内容变化还是未变化
+            existing_hashes = get_existing_hashes(spec.detail_table, date, spec.key_columns)
+            change_types = classify_changes(df, spec.columns, spec.key_columns, existing_hashes)
+
+            upsert = self.ingest_mode == 'upsert'
+            use_sql_dedupe = not upsert and self.dedupe_mode == 'sql'
+            if upsert:
+                logging.info("步骤2: upsert模式，只写入新增和内容变化的记录")
+                write_mask = change_types.notna()
+            elif use_sql_dedupe:
+                logging.info("步骤2: 由数据库唯一键去重（INSERT IGNORE），只写入新增的记录")
+                write_mask = change_types == CHANGE_NEW
+            else:
+                logging.info("步骤2: 检查并处理已存在的数据")
+                # 已存在的股票代码集合，用isin一次性过滤
+                existing_codes = set(existing_hashes['stock_code'])
+                if existing_codes:
+                    logging.info(f"发现{len(existing_codes)}只已存在的股票，开始数据比对")
+                write_mask = ~df[spec.source_of('stock_code')].astype(str).isin(existing_codes)
+
+            if not write_mask.any():
+                logging.info("所有新数据都已存在，无需插入")
+                self.update_header_status(date, self.count_rows(date), "COMPLETED", "数据已存在，无需更新")
+                self.update_notice_watermark(date, batch_max_notice_date)
+                self.clear_checkpoint(date)
+                db_manager.close()
+                return True
+            logging.info(f"共{int(write_mask.sum())}条新数据需要插入，分{len(bounds)}个分块")
+
+            logging.info("步骤3: 插入新数据")
+            # 开启断点时每个分块的明细、变化记录和断点在同一个事务中提交，失败后重试只需处理剩余分块
+            # 关闭断点时所有分块和头表状态在同一个外层事务中提交，只提交一次
+            # 头表记录数为本次运行写入的记录数：写入前已按唯一键和指纹过滤，分块写入数即新增和内容变化的行数；
+            # 从断点继续时只统计本次写入的剩余分块，之前分块的写入数已记录在上次运行失败时的头表中
+            write_mask = write_mask.to_numpy()
+            insert_count = 0
+            committed_count = 0
+            try:
+                with nullcontext() if self.checkpoint_enabled else db_manager.transaction():
+                    if not self.save_header(date, "PENDING"):
+                        raise RuntimeError("保存头表记录失败")
+
+                    for index, (chunk_start, chunk_end) in enumerate(bounds, start=start_chunk):
+                        chunk_mask = write_mask[chunk_start:chunk_end]
+                        with db_manager.transaction():
+                            if chunk_mask.any():
+                                part = df.iloc[chunk_start:chunk_end][chunk_mask]
+                                part_types = change_types.iloc[chunk_start:chunk_end][chunk_mask]
+                                success, count, _ = self._write_chunks(spec.detail_table, part, date, use_sql_dedupe,
+                                                                       upsert, metrics)
+                                if not success:
+                                    raise RuntimeError("插入数据失败")
+                                insert_count += count
+
+                                # 记录新增和内容变化的股票，供报告生成和消息推送使用
+                                if not record_changes(spec.detail_table, date, part, part_types, spec.source_of('stock_code')):
+                                    raise RuntimeError("写入数据变化记录失败")
+
+                            if not self.save_checkpoint(date, index + 1, offset + chunk_end, source_fingerprint):
+                                raise RuntimeError("记录断点失败")
+                        if self.checkpoint_enabled:
+                            committed_count = insert_count
+
+                    # 更新头表状态和公告日期水位线，清除断点
+                    logging.info("步骤4: 更新头表状态")
+                    with db_manager.transaction():
+                        if not self.update_header_status(date, insert_count, "COMPLETED", "处理成功"):
+                            raise RuntimeError("更新头表状态失败")
+                        if not self.update_notice_watermark(date, batch_max_notice_date):
+                            raise RuntimeError("更新公告日期水位线失败")
+                        if not self.clear_checkpoint(date):
+                            raise RuntimeError("清除断点失败")
+            except Exception as e:
+                logging.error(f"插入数据失败，终止数据处理: {e}")
+                # 失败的分块已回滚，已提交的分块和断点保留，记录失败状态和本次已提交的记录数
+                with db_manager.transaction():
+                    self.save_header(date, "FAILED")
+                    self.update_header_status(date, committed_count, "FAILED", "插入数据失败")
+                return False
+
+            db_manager.close()
+
+            logging.info("数据处理完成！")
+            return True
+
+        except Exception as e:
+            logging.error(f"处理数据时发生错误: {e}")
+            db_manager.close()
+            return False
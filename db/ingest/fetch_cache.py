@@ -0,0 +1,276 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+import pandas as pd
+
+try:
+    # parquet/feather读写依赖pyarrow
+    from pyarrow import feather
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# 是否缓存akshare原始数据，以及缓存目录
+CACHE_ENABLED = os.getenv('FETCH_CACHE_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+CACHE_DIR = os.getenv('FETCH_CACHE_DIR', os.path.join(PROJECT_ROOT, 'cache', 'fetch'))
+# 存储格式：parquet 体积小；feather 读取快（可内存映射）；pickle 不依赖pyarrow
+CACHE_FORMAT = os.getenv('FETCH_CACHE_FORMAT', 'parquet').lower()
+# 未关闭报告期的缓存有效期（秒），可按数据集覆盖，如FETCH_CACHE_TTL_REPORT
+# 默认0：未关闭的报告期仍有新公告发布，每次都重新获取，不读也不写缓存
+CACHE_TTL = int(os.getenv('FETCH_CACHE_TTL', 0))
+# 报告期结束超过该天数即视为已关闭，数据不再变化，关闭后获取的缓存永久有效
+CACHE_CLOSED_DAYS = int(os.getenv('FETCH_CACHE_CLOSED_DAYS', 180))
+# 缓存目录总大小上限（MB），超出后按最近访问时间淘汰
+CACHE_MAX_MB = int(os.getenv('FETCH_CACHE_MAX_MB', 512))
+
+# 格式 -> 文件扩展名
+FORMAT_SUFFIXES = {'parquet': '.parquet', 'feather': '.feather', 'pickle': '.pkl'}
+
+class FetchCache:
+    """
+    akshare原始数据的本地磁盘缓存，按数据集和报告期存储获取到的DataFrame
+    文件修改时间记录获取时间，用于判断TTL；访问时间在每次命中时更新，用于按LRU淘汰
+    默认只缓存已关闭的报告期，未关闭的报告期需要设置FETCH_CACHE_TTL才会缓存
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, enabled=CACHE_ENABLED, fmt=CACHE_FORMAT,
+                 ttl=CACHE_TTL, closed_days=CACHE_CLOSED_DAYS, max_bytes=CACHE_MAX_MB * 1024 * 1024):
+        """
+        初始化缓存
+
+        参数:
+            cache_dir: str, 缓存目录
+            enabled: bool, 是否启用缓存
+            fmt: str, 存储格式 parquet/feather/pickle，没有安装pyarrow时使用pickle
+            ttl: int, 未关闭报告期的默认有效期（秒）
+            closed_days: int, 报告期结束超过该天数视为已关闭，缓存永久有效
+            max_bytes: int, 缓存目录总大小上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        if fmt not in FORMAT_SUFFIXES:
+            logging.warning(f"未知的缓存格式 {fmt}，使用parquet")
+            fmt = 'parquet'
+        if fmt != 'pickle' and not ARROW_AVAILABLE:
+            logging.warning(f"未安装pyarrow，缓存格式由{fmt}改为pickle")
+            fmt = 'pickle'
+        self.fmt = fmt
+        self.ttl = int(ttl)
+        self.closed_days = int(closed_days)
+        self.max_bytes = int(max_bytes)
+        # 为True时忽略已有缓存，重新获取后覆盖
+        self.refresh = False
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def closed_at(self, period):
+        """
+        报告期关闭的时间戳：报告期结束后closed_days天，无法解析报告期时返回None
+        """
+        try:
+            return (datetime.strptime(str(period), '%Y%m%d') + timedelta(days=self.closed_days)).timestamp()
+        except ValueError:
+            return None
+
+    def ttl_for(self, dataset, period):
+        """
+        获取缓存有效期（秒），已关闭的报告期返回None表示永久有效，返回0表示不缓存
+
+        参数:
+            dataset: str, 数据集名称
+            period: str, 报告期，格式为YYYYMMDD
+        """
+        closed_at = self.closed_at(period)
+        if closed_at is not None and time.time() > closed_at:
+            return None
+        return int(os.getenv(f'FETCH_CACHE_TTL_{dataset.upper()}', self.ttl))
+
+    def _is_fresh(self, dataset, period, fetched_at):
+        """
+        判断获取时间为fetched_at的缓存是否仍然有效
+        已关闭的报告期只有在关闭之后获取的缓存才永久有效，关闭前获取的数据可能缺少之后发布的公告
+        """
+        ttl = self.ttl_for(dataset, period)
+        if ttl is None:
+            return fetched_at >= self.closed_at(period)
+        return ttl > 0 and time.time() - fetched_at <= ttl
+
+    def _path(self, dataset, period, fmt):
+        return os.path.join(self.cache_dir, f"{dataset}_{period}{FORMAT_SUFFIXES[fmt]}")
+
+    def _find(self, dataset, period):
+        """
+        查找已有的缓存文件，返回 (路径, 格式)，格式切换后旧格式的文件仍可读取
+        """
+        for fmt in (self.fmt,) + tuple(f for f in FORMAT_SUFFIXES if f != self.fmt):
+            path = self._path(dataset, period, fmt)
+            if os.path.exists(path):
+                return path, fmt
+        return None, None
+
+    def get(self, dataset, period):
+        """
+        读取缓存的原始数据
+
+        参数:
+            dataset: str, 数据集名称
+            period: str, 报告期，格式为YYYYMMDD
+
+        返回:
+            pandas.DataFrame: 缓存的数据，未命中、已过期或refresh时返回None
+        """
+        if not self.enabled or self.refresh or self.ttl_for(dataset, period) == 0:
+            return None
+        path, fmt = self._find(dataset, period)
+        if path is None:
+            self._count('misses')
+            return None
+        try:
+            stat = os.stat(path)
+            if not self._is_fresh(dataset, period, stat.st_mtime):
+                self._count('expired')
+                self._count('misses')
+                return None
+            if fmt == 'parquet':
+                df = pd.read_parquet(path)
+            elif fmt == 'feather':
+                df = feather.read_feather(path, memory_map=True)
+            else:
+                df = pd.read_pickle(path)
+            # 只更新访问时间，修改时间保留为获取时间
+            os.utime(path, (time.time(), stat.st_mtime))
+            self._count('hits')
+            logging.info(f"使用缓存的原始数据: {dataset} {period}（{len(df)}行）")
+            return df
+        except Exception as e:
+            logging.error(f"读取缓存 {path} 失败: {e}")
+            self._count('misses')
+            return None
+
+    def put(self, dataset, period, df):
+        """
+        写入原始数据到缓存，先写临时文件再替换，写入失败不影响主流程
+
+        参数:
+            dataset: str, 数据集名称
+            period: str, 报告期，格式为YYYYMMDD
+            df: pandas.DataFrame, 获取到的原始数据
+
+        返回:
+            bool: 是否写入成功
+        """
+        if not self.enabled or df is None or self.ttl_for(dataset, period) == 0:
+            return False
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fmt = self.fmt
+        path = self._path(dataset, period, fmt)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            try:
+                if fmt == 'parquet':
+                    df.to_parquet(tmp_path, index=False)
+                elif fmt == 'feather':
+                    df.reset_index(drop=True).to_feather(tmp_path)
+                else:
+                    df.to_pickle(tmp_path)
+            except Exception as e:
+                # 混合类型的object列无法转换为Arrow格式时退回pickle
+                if fmt == 'pickle':
+                    raise
+                logging.warning(f"{fmt}格式写入缓存失败，改用pickle: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                fmt = 'pickle'
+                path = self._path(dataset, period, fmt)
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+            # 删除同一报告期其他格式的旧缓存，避免读到过期文件
+            for other in FORMAT_SUFFIXES:
+                other_path = self._path(dataset, period, other)
+                if other != fmt and os.path.exists(other_path):
+                    os.remove(other_path)
+            self.evict()
+            return True
+        except Exception as e:
+            logging.error(f"写入缓存 {path} 失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def get_or_fetch(self, dataset, period, fetcher):
+        """
+        优先读取缓存，未命中时调用fetcher获取并写入缓存
+
+        参数:
+            dataset: str, 数据集名称
+            period: str, 报告期，格式为YYYYMMDD
+            fetcher: callable, 按报告期获取原始数据的函数
+
+        返回:
+            pandas.DataFrame: 原始数据
+        """
+        df = self.get(dataset, period)
+        if df is not None:
+            return df
+        df = fetcher(period)
+        self.put(dataset, period, df)
+        return df
+
+    def evict(self):
+        """
+        缓存目录超出大小上限时，按最近访问时间从旧到新删除缓存文件
+
+        返回:
+            int: 删除的文件数
+        """
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_atime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            self._stats['evictions'] += removed
+            return removed
+
+    def clear(self, dataset=None):
+        """
+        删除缓存文件
+
+        参数:
+            dataset: str, 只删除该数据集的缓存，为None时删除全部
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and (dataset is None or entry.name.startswith(f"{dataset}_")):
+                os.remove(entry.path)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        """
+        获取缓存统计：命中、未命中、过期和淘汰次数
+        """
+        with self._lock:
+            return dict(self._stats)
+
+# 全局缓存实例
+fetch_cache = FetchCache()
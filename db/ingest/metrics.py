@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import logging
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def _windows_memory_counters():
+    """
+    通过GetProcessMemoryInfo读取Windows进程内存计数，返回 (当前工作集, 峰值工作集) 字节数
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return None, None
+    return counters.WorkingSetSize, counters.PeakWorkingSetSize
+
+def peak_rss_bytes():
+    """
+    获取进程启动以来的峰值常驻内存（字节），无法获取时返回None
+    """
+    try:
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Linux单位为KB，macOS为字节
+            return peak if sys.platform == 'darwin' else peak * 1024
+        if os.name == 'nt':
+            return _windows_memory_counters()[1]
+    except Exception as e:
+        logging.debug(f"获取峰值内存失败: {e}")
+    return None
+
+def current_rss_bytes():
+    """
+    获取进程当前常驻内存（字节），无法获取时返回None
+    """
+    try:
+        if os.path.exists('/proc/self/statm'):
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        if os.name == 'nt':
+            return _windows_memory_counters()[0]
+    except Exception as e:
+        logging.debug(f"获取当前内存失败: {e}")
+    return None
+
+def _mb(value):
+    return f"{value / 1024 / 1024:.1f}MB" if value is not None else "未知"
+
+class RunMetrics:
+    """
+    一次入库运行的指标：处理行数、写入分块数、耗时和内存
+    峰值RSS是进程级的累计峰值，分块边界处采样当前RSS得到本次运行观测到的最大值
+    """
+
+    def __init__(self, name):
+        """
+        初始化运行指标
+
+        参数:
+            name: str, 日志中显示的运行名称，如 业绩报告 20250331
+        """
+        self.name = name
+        self.rows = 0
+        self.chunks = 0
+        self.start_time = time.perf_counter()
+        self.start_rss = current_rss_bytes()
+        self.max_rss = self.start_rss
+
+    def sample(self):
+        """
+        采样当前RSS，更新本次运行观测到的最大值
+        """
+        rss = current_rss_bytes()
+        if rss is not None and (self.max_rss is None or rss > self.max_rss):
+            self.max_rss = rss
+
+    def add_chunk(self, rows):
+        """
+        记录一个已写入的分块
+
+        参数:
+            rows: int, 分块行数
+        """
+        self.rows += rows
+        self.chunks += 1
+        self.sample()
+
+    def summary(self):
+        """
+        获取指标汇总
+
+        返回:
+            dict: rows、chunks、seconds、start_rss、max_rss、peak_rss（字节）
+        """
+        self.sample()
+        return {
+            'rows': self.rows,
+            'chunks': self.chunks,
+            'seconds': round(time.perf_counter() - self.start_time, 3),
+            'start_rss': self.start_rss,
+            'max_rss': self.max_rss,
+            'peak_rss': peak_rss_bytes(),
+        }
+
+    def log(self):
+        """
+        将指标汇总写入日志
+        """
+        s = self.summary()
+        logging.info(f"{self.name} 入库指标: 写入{s['rows']}行，{s['chunks']}个分块，耗时{s['seconds']}秒，"
+                     f"RSS 开始{_mb(s['start_rss'])} 运行中最大{_mb(s['max_rss'])}，进程峰值RSS {_mb(s['peak_rss'])}")
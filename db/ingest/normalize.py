@@ -0,0 +1,200 @@
+import logging
+import hashlib
+from itertools import repeat
+import pandas as pd
+from db.ingest.board import board_series
+
+# 列规范见db.ingest.specs：(数据库列名, 源列名, 类型)
+# 类型: text 文本, int 整数, number 数值, date 日期, hash 行内容指纹（由其他列计算）, board 板块（由股票代码列计算）
+# 源列缺失时使用类型默认值，与原逐行处理的row.get默认值一致
+
+# 行内容指纹在DataFrame中的列名，已计算过指纹的数据直接复用
+ROW_HASH_SOURCE = '_row_hash'
+
+# 不参与指纹计算的列：序号只是akshare返回结果中的排序位置，不代表数据内容
+FINGERPRINT_EXCLUDE = ('seq_no',)
+
+# 由其他列计算的类型，不参与指纹计算，增加这类列不会使已入库数据的指纹失效
+DERIVED_KINDS = ('hash', 'board')
+
+_DEFAULTS = {'text': '', 'int': 0, 'number': 0, 'date': None, 'board': None}
+
+# 明细表DECIMAL列的最大小数位数，指纹计算前数值统一按此取整
+DECIMAL_PLACES = 4
+
+# 公告日期的两种格式，依次尝试
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d')
+
+def _to_python(series):
+    """
+    转为Python原生对象列表，缺失值（NaN/NaT/NA）转为None，数据库驱动会写入NULL
+    """
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def _normalize_text(series):
+    text = series.astype(str)
+    return text.where(series.notna(), None).tolist()
+
+def _normalize_int(series):
+    return _to_python(pd.to_numeric(series, errors='coerce').round().astype('Int64'))
+
+def _normalize_number(series):
+    numbers = pd.to_numeric(series, errors='coerce')
+    if numbers.dtype == 'float32':
+        # 紧凑类型的float32列升为float64时按明细表精度取整，去掉单精度表示带来的尾数
+        numbers = numbers.astype('float64').round(DECIMAL_PLACES)
+    return _to_python(numbers)
+
+def parse_dates(series):
+    """
+    按DATE_FORMATS整列解析日期，无法解析的值为NaT
+
+    参数:
+        series: pandas.Series, 日期字符串、日期对象或datetime64列
+
+    返回:
+        pandas.Series: datetime64列
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    text = series.astype(str)
+    parsed = pd.to_datetime(text, format=DATE_FORMATS[0], errors='coerce')
+    for fmt in DATE_FORMATS[1:]:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors='coerce')
+    return parsed
+
+def _normalize_date(series):
+    parsed = parse_dates(series)
+    return _to_python(parsed.dt.date.where(parsed.notna()))
+
+_NORMALIZERS = {
+    'text': _normalize_text,
+    'int': _normalize_int,
+    'number': _normalize_number,
+    'date': _normalize_date,
+    'board': board_series,
+}
+
+def _canonical_column(df, source, kind):
+    """
+    将一列转换为指纹计算用的规范形式，保证同样的内容无论原始类型如何都得到同样的指纹
+    """
+    if source not in df.columns:
+        return pd.Series([_DEFAULTS[kind]] * len(df), index=df.index, dtype=object).astype(str)
+    series = df[source]
+    if kind in ('int', 'number'):
+        return pd.to_numeric(series, errors='coerce').astype('float64').round(DECIMAL_PLACES)
+    if kind == 'date':
+        return parse_dates(series).dt.strftime('%Y-%m-%d').fillna('')
+    return series.astype(str).where(series.notna(), '\0')
+
+def row_fingerprints(df, column_spec):
+    """
+    整列向量化计算每行内容的64位指纹（pandas内置的SipHash），以16位十六进制字符串返回
+    用于比较同一报告期两次获取的数据中哪些行的内容发生了变化
+
+    参数:
+        df: pandas.DataFrame, akshare返回的原始数据
+        column_spec: tuple, 列规范
+
+    返回:
+        list: 与df行顺序一致的指纹字符串
+    """
+    if df.empty:
+        return []
+    if ROW_HASH_SOURCE in df.columns:
+        return df[ROW_HASH_SOURCE].tolist()
+    canonical = pd.DataFrame({
+        column: _canonical_column(df, source, kind).to_numpy()
+        for column, source, kind in column_spec
+        if kind not in DERIVED_KINDS and column not in FINGERPRINT_EXCLUDE
+    })
+    hashes = pd.util.hash_pandas_object(canonical, index=False)
+    return [f"{value:016x}" for value in hashes.tolist()]
+
+def frame_fingerprint(row_hashes):
+    """
+    整批数据的指纹：按行顺序组合每行的内容指纹，内容和顺序都相同的源数据得到同样的指纹
+    用于判断断点续传时源数据是否发生了变化
+
+    参数:
+        row_hashes: list, row_fingerprints返回的行内容指纹
+
+    返回:
+        str: 16位十六进制字符串
+    """
+    return hashlib.blake2b(''.join(row_hashes).encode('ascii'), digest_size=8).hexdigest()
+
+def add_row_fingerprints(df, column_spec):
+    """
+    计算行内容指纹并作为一列附加到DataFrame上，后续规范化时直接复用
+
+    返回:
+        pandas.DataFrame: 附加了指纹列的数据副本
+    """
+    return df.assign(**{ROW_HASH_SOURCE: row_fingerprints(df, column_spec)})
+
+def normalize_frame(df, column_spec, constants=None, key_columns=()):
+    """
+    按列规范化akshare返回的DataFrame，生成可直接批量写入的行
+    每列只做一次向量化转换：列名映射、数值转换、NaN转NULL、日期解析
+    唯一键中的文本列缺失时写入空字符串：唯一键不约束含NULL的行，NULL键会使upsert每次都插入新行
+
+    参数:
+        df: pandas.DataFrame, akshare返回的原始数据
+        column_spec: tuple, 列规范，如db.ingest.specs.PREREPORT_COLUMNS
+        constants: dict, 每行相同的列（如report_date），放在最前面
+        key_columns: tuple, 唯一键列（不含report_date），如db.ingest.specs.PREREPORT_KEY
+
+    返回:
+        list: 数据库列名列表
+        list: 行元组列表
+    """
+    constants = constants or {}
+    columns = list(constants.keys())
+    values = [repeat(value, len(df)) for value in constants.values()]
+
+    for column, source, kind in column_spec:
+        columns.append(column)
+        if kind == 'hash':
+            values.append(row_fingerprints(df, column_spec))
+        elif kind == 'text' and column in key_columns and source in df.columns:
+            values.append(df[source].astype(str).where(df[source].notna(), '').tolist())
+        elif source in df.columns:
+            values.append(_NORMALIZERS[kind](df[source]))
+        else:
+            logging.debug(f"源数据缺少列 {source}，{column} 使用默认值")
+            values.append(repeat(_DEFAULTS[kind], len(df)))
+
+    rows = list(zip(*values)) if len(df) else []
+    return columns, rows
+
+def drop_duplicate_keys(df, column_spec, key_columns):
+    """
+    同一批次内按唯一键去重，保留公告日期最新的一条，避免批量写入时唯一键冲突
+    缺失的键值与空字符串视为相同，与normalize_frame写入的键值一致
+
+    参数:
+        df: pandas.DataFrame, akshare返回的原始数据
+        column_spec: tuple, 列规范，用于把数据库列名映射为源列名
+        key_columns: tuple, 唯一键的数据库列名，如db.ingest.specs.PREREPORT_KEY
+
+    返回:
+        pandas.DataFrame: 去重后的数据，保持原有顺序
+    """
+    sources = {column: source for column, source, _ in column_spec}
+    subset = [sources[column] for column in key_columns if sources[column] in df.columns]
+    if not subset:
+        return df
+    ordered = df
+    date_source = sources.get('notice_date')
+    if date_source in df.columns:
+        ordered = df.sort_values(date_source, kind='stable', na_position='first')
+    keys = ordered[subset].astype(str).where(ordered[subset].notna(), '')
+    deduped = ordered[~keys.duplicated(keep='last')].sort_index()
+    if len(deduped) < len(df):
+        logging.info(f"批次内唯一键 {key_columns} 重复 {len(df) - len(deduped)} 条，保留公告日期最新的记录")
+    return deduped
@@ -0,0 +1,46 @@
+class DatasetSpec:
+    """
+    数据集入库规范：描述一个akshare数据集如何写入头表和明细表
+    入库引擎只依赖该规范，新增数据集只需声明一个规范即可复用同一套优化后的入库流程
+    """
+
+    def __init__(self, name, label, fetcher, columns, key_columns, detail_table, header_table, dtypes=None):
+        """
+        初始化数据集规范
+
+        参数:
+            name: str, 数据集名称，如report、prereport
+            label: str, 日志中使用的中文名称，如业绩报告
+            fetcher: callable, 按报告日期获取原始数据的函数，参数为YYYYMMDD格式的日期，返回DataFrame
+            columns: tuple, 列规范 (数据库列名, 源列名, 类型)，见db.ingest.normalize
+            key_columns: tuple, 明细表唯一键（不含report_date）
+            detail_table: str, 明细表名
+            header_table: str, 头表名
+            dtypes: dict, 获取后应用的紧凑类型方案 {源列名: 紧凑类型}，见db.ingest.dtypes
+        """
+        self.name = name
+        self.label = label
+        self.fetcher = fetcher
+        self.columns = tuple(columns)
+        self.key_columns = tuple(key_columns)
+        self.detail_table = detail_table
+        self.header_table = header_table
+        self.dtypes = dict(dtypes or {})
+
+    def source_of(self, column):
+        """
+        获取数据库列对应的源列名，没有对应列时返回None
+        """
+        for name, source, _ in self.columns:
+            if name == column:
+                return source
+        return None
+
+    def update_columns(self, columns):
+        """
+        upsert时需要更新的列：唯一键和report_date以外的所有列
+        """
+        return [c for c in columns if c != 'report_date' and c not in self.key_columns]
+
+    def __repr__(self):
+        return f"DatasetSpec({self.name}: {self.detail_table})"
@@ -0,0 +1,94 @@
+import akshare as ak
+from db.ingest.normalize import ROW_HASH_SOURCE
+from db.ingest.spec import DatasetSpec
+
+# 列规范：(数据库列名, akshare源列名, 类型)，类型说明见db.ingest.normalize
+PREREPORT_COLUMNS = (
+    ('seq_no', '序号', 'int'),
+    ('stock_code', '股票代码', 'text'),
+    ('stock_name', '股票简称', 'text'),
+    ('board', '股票代码', 'board'),
+    ('predict_indicator', '预测指标', 'text'),
+    ('performance_change', '业绩变动', 'text'),
+    ('predict_value', '预测数值', 'number'),
+    ('change_rate', '业绩变动幅度', 'number'),
+    ('change_reason', '业绩变动原因', 'text'),
+    ('predict_type', '预告类型', 'text'),
+    ('last_year_value', '上年同期值', 'number'),
+    ('notice_date', '公告日期', 'date'),
+    ('row_hash', ROW_HASH_SOURCE, 'hash'),
+)
+
+REPORT_COLUMNS = (
+    ('stock_code', '股票代码', 'text'),
+    ('stock_name', '股票简称', 'text'),
+    ('board', '股票代码', 'board'),
+    ('basic_eps', '每股收益', 'number'),
+    ('diluted_eps', '每股收益', 'number'),  # 使用相同的每股收益值
+    ('revenue', '营业总收入-营业总收入', 'number'),
+    ('revenue_yoy', '营业总收入-同比增长', 'number'),
+    ('revenue_qoq', '营业总收入-季度环比增长', 'number'),
+    ('net_profit', '净利润-净利润', 'number'),
+    ('net_profit_yoy', '净利润-同比增长', 'number'),
+    ('net_profit_qoq', '净利润-季度环比增长', 'number'),
+    ('net_asset_per_share', '每股净资产', 'number'),
+    ('roe', '净资产收益率', 'number'),
+    ('cf_per_share', '每股经营现金流量', 'number'),
+    ('gross_profit_margin', '销售毛利率', 'number'),
+    ('industry', '所处行业', 'text'),
+    ('notice_date', '最新公告日期', 'date'),
+    ('row_hash', ROW_HASH_SOURCE, 'hash'),
+)
+
+# 紧凑类型方案：{源列名: 紧凑类型}，见db.ingest.dtypes
+# 只有每股指标的数值范围和精度适合float32，金额、增长率等保持float64
+PREREPORT_DTYPES = {
+    '股票代码': 'code',
+    '预测指标': 'category',
+    '预告类型': 'category',
+    '公告日期': 'date',
+}
+
+REPORT_DTYPES = {
+    '股票代码': 'code',
+    '每股收益': 'float32',
+    '每股净资产': 'float32',
+    '每股经营现金流量': 'float32',
+    '所处行业': 'category',
+    '最新公告日期': 'date',
+}
+
+# 明细表唯一键（不含report_date），与建表语句中的UNIQUE KEY一致
+PREREPORT_KEY = ('stock_code', 'predict_indicator')
+REPORT_KEY = ('stock_code',)
+
+def _fetch_yjyg(date):
+    return ak.stock_yjyg_em(date=date)
+
+def _fetch_yjbb(date):
+    return ak.stock_yjbb_em(date=date)
+
+PREREPORT_SPEC = DatasetSpec(
+    name='prereport',
+    label='业绩预告',
+    fetcher=_fetch_yjyg,
+    columns=PREREPORT_COLUMNS,
+    key_columns=PREREPORT_KEY,
+    detail_table='stock_preReport',
+    header_table='stock_prereport_header',
+    dtypes=PREREPORT_DTYPES,
+)
+
+REPORT_SPEC = DatasetSpec(
+    name='report',
+    label='业绩报告',
+    fetcher=_fetch_yjbb,
+    columns=REPORT_COLUMNS,
+    key_columns=REPORT_KEY,
+    detail_table='stock_report',
+    header_table='stock_report_header',
+    dtypes=REPORT_DTYPES,
+)
+
+# 按名称查找数据集规范
+DATASET_SPECS = {spec.name: spec for spec in (REPORT_SPEC, PREREPORT_SPEC)}
@@ -0,0 +1,55 @@
+import logging
+from datetime import date, timedelta
+import pandas as pd
+from db.ingest.normalize import parse_dates
+
+def _notice_source(column_spec):
+    for column, source, _ in column_spec:
+        if column == 'notice_date':
+            return source
+    return None
+
+def frame_max_notice_date(df, column_spec):
+    """
+    获取数据中最大的公告日期
+
+    参数:
+        df: pandas.DataFrame, akshare返回的原始数据
+        column_spec: tuple, 列规范，用于定位公告日期列
+
+    返回:
+        datetime.date: 最大公告日期，没有可解析的日期时返回None
+    """
+    source = _notice_source(column_spec)
+    if df.empty or source not in df.columns:
+        return None
+    latest = parse_dates(df[source]).max()
+    return None if pd.isna(latest) else latest.date()
+
+def slice_since_watermark(df, column_spec, watermark, overlap_days=1):
+    """
+    按公告日期水位线切片，只保留水位线（减去重叠天数）当天及之后公告的数据
+    公告日期无法解析的行保留，交给后续去重处理
+
+    参数:
+        df: pandas.DataFrame, akshare返回的原始数据
+        column_spec: tuple, 列规范，用于定位公告日期列
+        watermark: datetime.date, 头表记录的已入库最大公告日期，为None时不切片
+        overlap_days: int, 水位线向前重叠的天数，兼容同一天内分批发布的公告
+
+    返回:
+        pandas.DataFrame: 切片后的数据
+        int: 被跳过的行数
+    """
+    source = _notice_source(column_spec)
+    if watermark is None or df.empty or source not in df.columns:
+        return df, 0
+    if not isinstance(watermark, date):
+        watermark = pd.Timestamp(watermark).date()
+    since = pd.Timestamp(watermark - timedelta(days=max(int(overlap_days), 0)))
+    parsed = parse_dates(df[source])
+    keep = parsed.isna() | (parsed >= since)
+    skipped = int((~keep).sum())
+    if skipped:
+        logging.debug(f"公告日期早于 {since.date()} 的 {skipped} 条数据已跳过")
+    return df[keep], skipped
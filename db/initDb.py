@@ -2,12 +2,159 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from db.db_manager import db_manager
+from db.ingest.board import board_case_sql
+
+# 表已存在时需要补加的列：(表名, 列名, 加列语句)
+TABLE_COLUMNS = [
+    ('stock_report_header', 'max_notice_date',
+     "ALTER TABLE stock_report_header ADD COLUMN max_notice_date DATE COMMENT '已入库的最大公告日期' AFTER remark"),
+    ('stock_prereport_header', 'max_notice_date',
+     "ALTER TABLE stock_prereport_header ADD COLUMN max_notice_date DATE COMMENT '已入库的最大公告日期' AFTER remark"),
+    ('stock_report_header', 'checkpoint_chunk',
+     "ALTER TABLE stock_report_header ADD COLUMN checkpoint_chunk INT COMMENT '断点：已提交的分块数' AFTER max_notice_date"),
+    ('stock_report_header', 'checkpoint_offset',
+     "ALTER TABLE stock_report_header ADD COLUMN checkpoint_offset INT COMMENT '断点：已提交的源数据行数' AFTER checkpoint_chunk"),
+    ('stock_report_header', 'source_fingerprint',
+     "ALTER TABLE stock_report_header ADD COLUMN source_fingerprint CHAR(16) COMMENT '断点对应的源数据指纹' AFTER checkpoint_offset"),
+    ('stock_prereport_header', 'checkpoint_chunk',
+     "ALTER TABLE stock_prereport_header ADD COLUMN checkpoint_chunk INT COMMENT '断点：已提交的分块数' AFTER max_notice_date"),
+    ('stock_prereport_header', 'checkpoint_offset',
+     "ALTER TABLE stock_prereport_header ADD COLUMN checkpoint_offset INT COMMENT '断点：已提交的源数据行数' AFTER checkpoint_chunk"),
+    ('stock_prereport_header', 'source_fingerprint',
+     "ALTER TABLE stock_prereport_header ADD COLUMN source_fingerprint CHAR(16) COMMENT '断点对应的源数据指纹' AFTER checkpoint_offset"),
+    ('stock_report', 'row_hash',
+     "ALTER TABLE stock_report ADD COLUMN row_hash CHAR(16) COMMENT '行内容指纹' AFTER notice_date"),
+    ('stock_prereport', 'row_hash',
+     "ALTER TABLE stock_prereport ADD COLUMN row_hash CHAR(16) COMMENT '行内容指纹' AFTER notice_date"),
+    ('stock_report', 'board',
+     "ALTER TABLE stock_report ADD COLUMN board VARCHAR(10) COMMENT '板块(由股票代码计算)' AFTER stock_name"),
+    ('stock_prereport', 'board',
+     "ALTER TABLE stock_prereport ADD COLUMN board VARCHAR(10) COMMENT '板块(由股票代码计算)' AFTER stock_name"),
+]
+
+# 补加列后需要为已有数据补算的值：{(表名, 列名): 更新语句}
+COLUMN_BACKFILLS = {
+    ('stock_report', 'board'): f"UPDATE stock_report SET board = {board_case_sql()} WHERE stock_code IS NOT NULL",
+    ('stock_prereport', 'board'): f"UPDATE stock_prereport SET board = {board_case_sql()} WHERE stock_code IS NOT NULL",
+}
+
+# 唯一键中需要改为NOT NULL的文本列：(表名, 唯一键列, 改列语句)
+# 唯一键不约束含NULL的行，键列为NULL时upsert和整期重载每次都会插入重复记录
+KEY_COLUMNS = [
+    ('stock_report', ('stock_code',),
+     "ALTER TABLE stock_report MODIFY COLUMN stock_code VARCHAR(10) NOT NULL DEFAULT '' COMMENT '股票代码'"),
+    ('stock_prereport', ('stock_code', 'predict_indicator'),
+     "ALTER TABLE stock_prereport MODIFY COLUMN stock_code VARCHAR(10) NOT NULL DEFAULT '' COMMENT '股票代码', "
+     "MODIFY COLUMN predict_indicator VARCHAR(50) NOT NULL DEFAULT '' COMMENT '预测指标'"),
+]
+
+# 分析报告筛选查询（analyse.generate_report）使用的组合索引：(表名, 索引名, 建索引语句)
+# idx_report_notice_yoy: 净利润同比增长筛选按期间过滤后按 notice_date, net_profit_yoy 排序取前N条，避免filesort
+# idx_report_stock_profit: 超预期分析按股票分组取净利润最高的记录，覆盖查询用到的全部列，不需要回表
+# idx_prereport_change: 高变动筛选按期间和 change_rate 下限做范围扫描
+# idx_prereport_stock_value: 超预期分析按股票分组取预测值最高的记录，覆盖查询用到的全部列
+# idx_report_board/idx_prereport_board: 按板块排除股票时的 board IN (...) 条件
+SCREEN_INDEXES = [
+    ('stock_report', 'idx_report_notice_yoy',
+     "ALTER TABLE stock_report ADD INDEX idx_report_notice_yoy (report_date, notice_date, net_profit_yoy)"),
+    ('stock_report', 'idx_report_stock_profit',
+     "ALTER TABLE stock_report ADD INDEX idx_report_stock_profit "
+     "(report_date, stock_code, net_profit, notice_date, net_profit_yoy, stock_name)"),
+    ('stock_prereport', 'idx_prereport_change',
+     "ALTER TABLE stock_prereport ADD INDEX idx_prereport_change (report_date, change_rate, stock_code)"),
+    ('stock_prereport', 'idx_prereport_stock_value',
+     "ALTER TABLE stock_prereport ADD INDEX idx_prereport_stock_value "
+     "(report_date, stock_code, predict_value, predict_indicator, predict_type, stock_name)"),
+    ('stock_report', 'idx_report_board',
+     "ALTER TABLE stock_report ADD INDEX idx_report_board (report_date, board, stock_code)"),
+    ('stock_prereport', 'idx_prereport_board',
+     "ALTER TABLE stock_prereport ADD INDEX idx_prereport_board (report_date, board, stock_code)"),
+]
+
+# 表已存在时需要补建的索引：(表名, 索引名, 建索引语句)
+TABLE_INDEXES = [
+    ('stock_report', 'uk_report_stock',
+     "ALTER TABLE stock_report ADD UNIQUE KEY uk_report_stock (report_date, stock_code)"),
+    ('stock_prereport', 'uk_prereport_stock',
+     "ALTER TABLE stock_prereport ADD UNIQUE KEY uk_prereport_stock (report_date, stock_code, predict_indicator)"),
+] + SCREEN_INDEXES
+
+def ensure_columns():
+    """
+    给已存在的表补加缺少的列，补加后为已有数据补算COLUMN_BACKFILLS中的值
+    """
+    for table_name, column_name, alter_sql in TABLE_COLUMNS:
+        if db_manager.column_exists(table_name, column_name):
+            continue
+        print(f"表 {table_name} 缺少列 {column_name},准备补加...")
+        if db_manager.execute(alter_sql):
+            db_manager.commit()
+            print(f"列 {column_name} 添加成功")
+            backfill_sql = COLUMN_BACKFILLS.get((table_name, column_name))
+            if backfill_sql:
+                if db_manager.execute(backfill_sql):
+                    db_manager.commit()
+                    print(f"列 {column_name} 已为已有数据补算")
+                else:
+                    print(f"警告: 表 {table_name} 的列 {column_name} 补算失败")
+        else:
+            print(f"警告: 表 {table_name} 添加列 {column_name} 失败")
+
+def ensure_key_columns():
+    """
+    把已存在表的唯一键文本列改为NOT NULL DEFAULT ''
+    先删除NULL与空字符串视为相同后重复的记录（保留id最大的一条），再把NULL补为空字符串，最后修改列定义
+    """
+    for table_name, key_columns, modify_sql in KEY_COLUMNS:
+        if not any(db_manager.column_nullable(table_name, column) for column in key_columns):
+            continue
+        print(f"表 {table_name} 的唯一键列 {key_columns} 允许NULL,准备改为NOT NULL...")
+        same_key = " AND ".join(f"COALESCE(k.{column}, '') = COALESCE(d.{column}, '')" for column in key_columns)
+        delete_sql = f"""
+        DELETE FROM {table_name} WHERE id IN (
+            SELECT id FROM (
+                SELECT d.id FROM {table_name} d
+                JOIN {table_name} k ON k.report_date = d.report_date AND {same_key} AND k.id > d.id
+            ) duplicated
+        )
+        """
+        statements = [delete_sql] + [f"UPDATE {table_name} SET {column} = '' WHERE {column} IS NULL" for column in key_columns]
+        if all(db_manager.execute(sql) for sql in statements):
+            db_manager.commit()
+        else:
+            db_manager.rollback()
+            print(f"警告: 表 {table_name} 唯一键列补空字符串失败")
+            continue
+        if db_manager.execute(modify_sql):
+            db_manager.commit()
+            print(f"表 {table_name} 的唯一键列已改为NOT NULL")
+        else:
+            print(f"警告: 表 {table_name} 修改唯一键列失败")
+
+def ensure_indexes():
+    """
+    给已存在的表补建缺少的索引，补建失败（如已有重复数据）时只给出警告
+    """
+    for table_name, index_name, create_sql in TABLE_INDEXES:
+        if db_manager.index_exists(table_name, index_name):
+            continue
+        print(f"表 {table_name} 缺少索引 {index_name},准备补建...")
+        if db_manager.execute(create_sql):
+            db_manager.commit()
+            print(f"索引 {index_name} 创建成功")
+        else:
+            print(f"警告: 索引 {index_name} 创建失败,请检查表 {table_name} 中是否存在重复数据")
 
 def check_and_create_tables():
     """
     检查数据库中是否存在必要的表,如果不存在则创建
     """
     try:
+        # 一次性确认数据库存在，之后的连接直接连到目标库
+        if not db_manager.ensure_database():
+            print("数据库创建失败")
+            return False
+        
         # 连接数据库
         if not db_manager.connect():
             print("数据库连接失败")
@@ -27,6 +174,10 @@ def check_and_create_tables():
                     record_count INT DEFAULT 0 COMMENT '记录数量',
                     status VARCHAR(20) DEFAULT 'PENDING' COMMENT '处理状态',
                     remark TEXT COMMENT '备注信息',
+                    max_notice_date DATE COMMENT '已入库的最大公告日期',
+                    checkpoint_chunk INT COMMENT '断点：已提交的分块数',
+                    checkpoint_offset INT COMMENT '断点：已提交的源数据行数',
+                    source_fingerprint CHAR(16) COMMENT '断点对应的源数据指纹',
                     create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
                     update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
                     UNIQUE KEY uk_report_date (report_date)
@@ -40,6 +191,10 @@ def check_and_create_tables():
                     record_count INT DEFAULT 0 COMMENT '记录数量',
                     status VARCHAR(20) DEFAULT 'PENDING' COMMENT '处理状态',
                     remark TEXT COMMENT '备注信息',
+                    max_notice_date DATE COMMENT '已入库的最大公告日期',
+                    checkpoint_chunk INT COMMENT '断点：已提交的分块数',
+                    checkpoint_offset INT COMMENT '断点：已提交的源数据行数',
+                    source_fingerprint CHAR(16) COMMENT '断点对应的源数据指纹',
                     create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
                     update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
                     UNIQUE KEY uk_report_date (report_date)
@@ -61,8 +216,9 @@ def check_and_create_tables():
                 CREATE TABLE stock_report (
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     report_date VARCHAR(20) NOT NULL COMMENT '报告日期',
-                    stock_code VARCHAR(10) COMMENT '股票代码',
+                    stock_code VARCHAR(10) NOT NULL DEFAULT '' COMMENT '股票代码',
                     stock_name VARCHAR(50) COMMENT '股票简称',
+                    board VARCHAR(10) COMMENT '板块(由股票代码计算)',
                     basic_eps DECIMAL(20,4) COMMENT '每股收益',
                     diluted_eps DECIMAL(20,4) COMMENT '每股收益(同basic_eps)',
                     revenue DECIMAL(20,2) COMMENT '营业总收入',
@@ -77,9 +233,14 @@ def check_and_create_tables():
                     gross_profit_margin DECIMAL(10,2) COMMENT '销售毛利率',
                     industry VARCHAR(100) COMMENT '所处行业',
                     notice_date DATE COMMENT '最新公告日期',
+                    row_hash CHAR(16) COMMENT '行内容指纹',
                     create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
                     update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+                    UNIQUE KEY uk_report_stock (report_date, stock_code),
                     INDEX idx_report_date (report_date),
+                    INDEX idx_report_board (report_date, board, stock_code),
+                    INDEX idx_report_notice_yoy (report_date, notice_date, net_profit_yoy),
+                    INDEX idx_report_stock_profit (report_date, stock_code, net_profit, notice_date, net_profit_yoy, stock_name),
                     CONSTRAINT fk_report_date_report FOREIGN KEY (report_date) REFERENCES stock_report_header(report_date) ON DELETE CASCADE ON UPDATE CASCADE
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='股票业绩报告';
             """,
@@ -88,9 +249,10 @@ def check_and_create_tables():
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     report_date VARCHAR(20) NOT NULL COMMENT '报告日期',
                     seq_no INT COMMENT '序号',
-                    stock_code VARCHAR(10) COMMENT '股票代码',
+                    stock_code VARCHAR(10) NOT NULL DEFAULT '' COMMENT '股票代码',
                     stock_name VARCHAR(50) COMMENT '股票简称',
-                    predict_indicator VARCHAR(50) COMMENT '预测指标', 
+                    board VARCHAR(10) COMMENT '板块(由股票代码计算)',
+                    predict_indicator VARCHAR(50) NOT NULL DEFAULT '' COMMENT '预测指标',
                     performance_change TEXT COMMENT '业绩变动',
                     predict_value DECIMAL(20,2) COMMENT '预测数值',
                     change_rate DECIMAL(10,2) COMMENT '业绩变动幅度',
@@ -98,11 +260,28 @@ def check_and_create_tables():
                     predict_type VARCHAR(20) COMMENT '预告类型',
                     last_year_value DECIMAL(20,2) COMMENT '上年同期值',
                     notice_date DATE COMMENT '公告日期',
+                    row_hash CHAR(16) COMMENT '行内容指纹',
                     create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
                     update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+                    UNIQUE KEY uk_prereport_stock (report_date, stock_code, predict_indicator),
                     INDEX idx_report_date (report_date),
+                    INDEX idx_prereport_board (report_date, board, stock_code),
+                    INDEX idx_prereport_change (report_date, change_rate, stock_code),
+                    INDEX idx_prereport_stock_value (report_date, stock_code, predict_value, predict_indicator, predict_type, stock_name),
                     CONSTRAINT fk_report_date FOREIGN KEY (report_date) REFERENCES stock_prereport_header(report_date) ON DELETE CASCADE ON UPDATE CASCADE
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='股票业绩预告';
+            """,
+            'stock_change_log': """
+                CREATE TABLE stock_change_log (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    source_table VARCHAR(50) NOT NULL COMMENT '明细表名',
+                    report_date VARCHAR(20) NOT NULL COMMENT '报告日期',
+                    stock_code VARCHAR(10) NOT NULL COMMENT '股票代码',
+                    change_type VARCHAR(10) NOT NULL COMMENT '变化类型(NEW/CHANGED)',
+                    row_hash CHAR(16) COMMENT '行内容指纹',
+                    create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+                    INDEX idx_report_date_time (report_date, create_time)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='股票数据变化记录';
             """
         }
         
@@ -115,6 +294,10 @@ def check_and_create_tables():
             else:
                 print(f"表 {table_name} 已存在")
         
+        ensure_columns()
+        ensure_key_columns()
+        ensure_indexes()
+        
         return True
         
     except Exception as e:
@@ -1,13 +1,16 @@
 import akshare as ak
 import pandas as pd
-import numpy as np
 import pymysql
-from datetime import datetime
 import sys
 import os
 import logging
 sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
 from db.db_manager import db_manager
+from db.ingest.engine import IngestionEngine
+from db.ingest.specs import REPORT_SPEC
+
+# 头表和明细表的读写统一由入库引擎完成，本模块保留原有函数作为兼容入口
+_engine = IngestionEngine(REPORT_SPEC)
 
 def create_stock_report_table(stock_yjbb_em_df=None, report_date=None, force_recreate=True):
     """
@@ -57,8 +60,9 @@ def create_stock_report_table(stock_yjbb_em_df=None, report_date=None, force_rec
         CREATE TABLE stock_report (
             id INT AUTO_INCREMENT PRIMARY KEY,
             report_date VARCHAR(20) NOT NULL COMMENT '报告日期',
-            stock_code VARCHAR(10) COMMENT '股票代码',
+            stock_code VARCHAR(10) NOT NULL DEFAULT '' COMMENT '股票代码',
             stock_name VARCHAR(50) COMMENT '股票简称',
+            board VARCHAR(10) COMMENT '板块(由股票代码计算)',
             basic_eps DECIMAL(20,4) COMMENT '每股收益',
             diluted_eps DECIMAL(20,4) COMMENT '每股收益(同basic_eps)',
             revenue DECIMAL(20,2) COMMENT '营业总收入',
@@ -73,9 +77,14 @@ def create_stock_report_table(stock_yjbb_em_df=None, report_date=None, force_rec
             gross_profit_margin DECIMAL(10,2) COMMENT '销售毛利率',
             industry VARCHAR(100) COMMENT '所处行业',
             notice_date DATE COMMENT '最新公告日期',
+            row_hash CHAR(16) COMMENT '行内容指纹',
             create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
             update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+            UNIQUE KEY uk_report_stock (report_date, stock_code),
             INDEX idx_report_date (report_date),
+            INDEX idx_report_board (report_date, board, stock_code),
+            INDEX idx_report_notice_yoy (report_date, notice_date, net_profit_yoy),
+            INDEX idx_report_stock_profit (report_date, stock_code, net_profit, notice_date, net_profit_yoy, stock_name),
             CONSTRAINT fk_report_date_report FOREIGN KEY (report_date) REFERENCES stock_report_header(report_date) ON DELETE CASCADE ON UPDATE CASCADE
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='股票业绩报告';
         """
@@ -136,6 +145,10 @@ def create_report_header_table(force_recreate=True, report_date="20220331"):
                 record_count INT DEFAULT 0 COMMENT '记录数量',
                 status VARCHAR(20) DEFAULT 'PENDING' COMMENT '处理状态',
                 remark TEXT COMMENT '备注信息',
+                max_notice_date DATE COMMENT '已入库的最大公告日期',
+                checkpoint_chunk INT COMMENT '断点：已提交的分块数',
+                checkpoint_offset INT COMMENT '断点：已提交的源数据行数',
+                source_fingerprint CHAR(16) COMMENT '断点对应的源数据指纹',
                 create_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
                 update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
                 UNIQUE KEY uk_report_date (report_date)
@@ -181,24 +194,7 @@ def check_existing_query(date_str):
         bool: 表示是否存在相同日期的记录
     """
     try:
-        if not db_manager.connect():
-            logging.error("数据库连接失败")
-            return False
-            
-        check_sql = """
-        SELECT COUNT(*) 
-        FROM stock_report_header 
-        WHERE report_date = %s
-        """
-        db_manager.execute(check_sql, (date_str,))
-        count = db_manager.fetchone()[0]
-        
-        return count > 0
-        
-    except Exception as e:
-        logging.error(f"检查查询时间时发生错误: {e}")
-        return False
-        
+        return _engine.header_exists(date_str)
     finally:
         db_manager.close()
 
@@ -212,28 +208,7 @@ def delete_report_detail_by_date(date_str):
     返回:
         bool: 表示操作是否成功
     """
-    try:
-        if not db_manager.connect():
-            logging.error("数据库连接失败")
-            return False
-            
-        # 直接删除日期对应的子表数据
-        delete_sql = """
-        DELETE FROM stock_report 
-        WHERE report_date = %s
-        """
-        db_manager.execute(delete_sql, (date_str,))
-        
-        db_manager.commit()
-        logging.info(f"成功删除日期参数 {date_str} 的子表数据")
-        return True
-        
-    except Exception as e:
-        logging.error(f"删除子表数据时发生错误: {e}")
-        return False
-        
-    finally:
-        db_manager.close()
+    return _engine.delete_rows(date_str)
 
 def get_existing_report_data(date_str):
     """
@@ -243,53 +218,61 @@ def get_existing_report_data(date_str):
         date_str: str, 报告日期，格式为YYYYMMDD
         
     返回:
-        list: 包含已存在数据的列表，每个元素是一个字典
+        generator: 依次产生每条已存在的数据（字典），调用方逐条处理，不会一次性物化整期结果；
+            查询出错时记录日志并停止产生
     """
     try:
-        if not db_manager.connect():
-            logging.error("数据库连接失败")
-            return []
-            
         select_sql = """
         SELECT stock_code, stock_name
         FROM stock_report 
         WHERE report_date = %s
         """
-        db_manager.execute(select_sql, (date_str,))
-        results = db_manager.fetchall()
-        
-        existing_data = []
-        for row in results:
-            data = {
+        # 流式读取，逐条产生
+        for row in db_manager.fetch_iter(select_sql, (date_str,)):
+            yield {
                 'stock_code': row[0],
                 'stock_name': row[1]
             }
-            existing_data.append(data)
-            
-        return existing_data
         
     except Exception as e:
         logging.error(f"获取已存在数据时发生错误: {e}")
-        return []
+
+def get_existing_report_codes(date_str):
+    """
+    根据报告日期获取已存在的股票代码集合，只读取单列用于去重
+    
+    参数:
+        date_str: str, 报告日期，格式为YYYYMMDD
         
-    finally:
-        db_manager.close()
+    返回:
+        set: 已存在的股票代码
+    """
+    return _engine.get_existing_codes(date_str)
 
-def is_record_exists(new_record, existing_records):
+def count_report_data(date_str):
     """
-    检查新记录是否在已存在的记录中
+    统计报告日期下的明细记录数
     
     参数:
-        new_record: dict, 新的记录数据
-        existing_records: list, 已存在的记录列表
+        date_str: str, 报告日期，格式为YYYYMMDD
+        
+    返回:
+        int: 记录数量，查询失败返回0
+    """
+    return _engine.count_rows(date_str)
+
+def save_header(report_date, status="PENDING"):
+    """
+    保存头表记录：不存在则插入，已存在则更新状态
     
+    参数:
+        report_date: str, 报告日期
+        status: str, 状态 (PENDING, PROCESSING, COMPLETED, FAILED)
+        
     返回:
-        bool: 如果记录已存在返回True，否则返回False
+        bool: 表示操作是否成功
     """
-    for existing in existing_records:
-        if existing['stock_code'] == new_record['stock_code']:
-            return True
-    return False
+    return _engine.save_header(report_date, status)
 
 def update_header_status(report_date, record_count, status="COMPLETED", remark=None):
     """
@@ -304,130 +287,48 @@ def update_header_status(report_date, record_count, status="COMPLETED", remark=N
     返回:
         bool: 表示操作是否成功
     """
-    try:
-        if not db_manager.connect():
-            logging.error("数据库连接失败")
-            return False
-            
-        update_sql = """
-        UPDATE stock_report_header 
-        SET record_count = %s, status = %s, remark = %s 
-        WHERE report_date = %s
-        """
-        
-        db_manager.execute(update_sql, (record_count, status, remark, report_date))
-        db_manager.commit()
-        
-        logging.info(f"头表状态更新成功！报告日期: {report_date}, 状态: {status}, 记录数: {record_count}")
-        return True
+    return _engine.update_header_status(report_date, record_count, status, remark)
+
+def get_notice_watermark(report_date):
+    """
+    获取头表记录的已入库最大公告日期（水位线）
+    
+    参数:
+        report_date: str, 报告日期
         
-    except Exception as e:
-        logging.error(f"更新头表状态时发生错误: {e}")
-        return False
+    返回:
+        datetime.date: 水位线，没有记录时返回None
+    """
+    return _engine.get_notice_watermark(report_date)
+
+def update_notice_watermark(report_date, max_notice_date):
+    """
+    推进头表的公告日期水位线，只会向后移动
+    
+    参数:
+        report_date: str, 报告日期
+        max_notice_date: datetime.date, 本次入库数据的最大公告日期
         
-    finally:
-        db_manager.close()
+    返回:
+        bool: 表示操作是否成功
+    """
+    return _engine.update_notice_watermark(report_date, max_notice_date)
 
-def insert_report_data(stock_yjbb_em_df=None, report_date=None):
+def insert_report_data(stock_yjbb_em_df=None, report_date=None, ignore=False, upsert=False):
     """
     将数据插入到stock_report表中
     
     参数:
         stock_yjbb_em_df: pandas.DataFrame, 包含股票业绩报告数据的DataFrame
         report_date: str, 报告日期，用于关联头表
+        ignore: bool, 为True时由唯一键跳过已存在的记录（INSERT IGNORE）
+        upsert: bool, 为True时按唯一键插入或更新，已存在的记录只更新变化的列
     
     返回:
         bool: 表示操作是否成功
         int: 插入的记录数量
     """
-    try:
-        # 如果未提供数据，则尝试获取
-        if stock_yjbb_em_df is None:
-            logging.error("错误：未提供数据")
-            return False, 0
-        
-        # 检查是否有数据返回
-        if stock_yjbb_em_df.empty:
-            logging.info("没有获取到数据，请检查日期参数或稍后再试")
-            return False, 0
-        
-        logging.info(f"准备插入{len(stock_yjbb_em_df)}条业绩报告数据")
-        
-        # 连接到数据库
-        if not db_manager.connect():
-            logging.error("数据库连接失败")
-            return False, 0
-        
-        # 准备批量插入数据
-        insert_count = 0
-        
-        # 验证报告日期是否存在
-        if report_date is None:
-            logging.error("错误：未提供报告日期")
-            return False, 0
-        
-        # 检查头表中是否存在该报告日期
-        check_sql = "SELECT 1 FROM stock_report_header WHERE report_date = %s"
-        db_manager.execute(check_sql, (report_date,))
-        if not db_manager.fetchone():
-            logging.error(f"错误：报告日期 {report_date} 在头表中不存在")
-            return False, 0
-            
-        for _, row in stock_yjbb_em_df.iterrows():
-            # 准备插入的数据
-            insert_data = {
-                'report_date': report_date,
-                'stock_code': str(row.get('股票代码', '')),
-                'stock_name': str(row.get('股票简称', '')),
-                'basic_eps': float(row.get('每股收益', None) or 0),
-                'diluted_eps': float(row.get('每股收益', None) or 0),  # 使用相同的每股收益值
-                'revenue': float(row.get('营业总收入-营业总收入', None) or 0),
-                'revenue_yoy': float(row.get('营业总收入-同比增长', None) or 0),
-                'revenue_qoq': float(row.get('营业总收入-季度环比增长', None) or 0),
-                'net_profit': float(row.get('净利润-净利润', None) or 0),
-                'net_profit_yoy': float(row.get('净利润-同比增长', None) or 0),
-                'net_profit_qoq': float(row.get('净利润-季度环比增长', None) or 0),
-                'net_asset_per_share': float(row.get('每股净资产', None) or 0),
-                'roe': float(row.get('净资产收益率', None) or 0),
-                'cf_per_share': float(row.get('每股经营现金流量', None) or 0),
-                'gross_profit_margin': float(row.get('销售毛利率', None) or 0),
-                'industry': str(row.get('所处行业', '')),
-                'notice_date': row.get('最新公告日期', None)
-            }
-            
-            # 处理数值字段中的NaN值
-            for key, value in insert_data.items():
-                if isinstance(value, (int, float)) and (pd.isna(value) or np.isnan(value)):
-                    insert_data[key] = None
-            
-            # 处理日期字段
-            if isinstance(insert_data['notice_date'], str):
-                try:
-                    insert_data['notice_date'] = datetime.strptime(insert_data['notice_date'], '%Y-%m-%d %H:%M:%S').date()
-                except ValueError:
-                    try:
-                        insert_data['notice_date'] = datetime.strptime(insert_data['notice_date'], '%Y-%m-%d').date()
-                    except ValueError:
-                        insert_data['notice_date'] = None
-            
-            # 构建插入SQL语句
-            columns = ', '.join(insert_data.keys())
-            placeholders = ', '.join(['%s'] * len(insert_data))
-            insert_sql = f"INSERT INTO stock_report ({columns}) VALUES ({placeholders})"
-            
-            # 执行插入操作
-            db_manager.execute(insert_sql, list(insert_data.values()))
-            insert_count += 1
-        
-        # 提交事务
-        db_manager.commit()
-        logging.info(f"成功插入{insert_count}条数据到stock_report表")
-        
-        return True, insert_count
-        
-    except Exception as e:
-        logging.error(f"插入数据时发生错误: {e}")
-        return False, 0
+    return _engine.insert(stock_yjbb_em_df, report_date, ignore=ignore, upsert=upsert)
 
 if __name__ == "__main__":
     # 测试创建头表和插入记录
@@ -8,6 +8,8 @@ rem 创建必要的目录
 mkdir "deployment\api" 2>nul
 mkdir "deployment\db\pre" 2>nul
 mkdir "deployment\db\report" 2>nul
+mkdir "deployment\db\backends" 2>nul
+mkdir "deployment\db\ingest" 2>nul
 mkdir "deployment\log" 2>nul
 mkdir "deployment\analyse" 2>nul
 mkdir "deployment\analyse\htmls" 2>nul
@@ -20,6 +22,11 @@ copy /Y "api\miniApi.py" "deployment\api\"
 
 rem 复制数据库相关文件
 copy /Y "db\db_manager.py" "deployment\db\"
+copy /Y "db\db_pool.py" "deployment\db\"
+copy /Y "db\db_trace.py" "deployment\db\"
+copy /Y "db\db_cache.py" "deployment\db\"
+copy /Y "db\backends\*.py" "deployment\db\backends\"
+copy /Y "db\ingest\*.py" "deployment\db\ingest\"
 copy /Y "db\pre\*.py" "deployment\db\pre\"
 copy /Y "db\report\*.py" "deployment\db\report\"
 
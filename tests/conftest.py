@@ -0,0 +1,42 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# 测试只使用SQLite后端，必须在导入db模块之前设置，不会连接MySQL
+_DB_DIR = tempfile.mkdtemp(prefix='stock_data_test_')
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ['DB_SQLITE_PATH'] = os.path.join(_DB_DIR, 'test.db')
+os.environ['FETCH_CACHE_ENABLED'] = 'false'
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from db.db_manager import db_manager
+from db import initDb
+
+# 每个测试前清空的表，子表在前
+TABLES = ('stock_change_log', 'stock_report', 'stock_preReport', 'stock_report_header', 'stock_prereport_header')
+
+@pytest.fixture(scope='session', autouse=True)
+def tables():
+    assert initDb.check_and_create_tables()
+    yield
+
+@pytest.fixture
+def db():
+    """
+    清空数据后的db_manager，测试结束时关闭当前线程的连接
+    """
+    for table in TABLES:
+        db_manager.execute(f"DELETE FROM {table}")
+    for table in ('stock_report_staging', 'stock_preReport_staging'):
+        db_manager.execute(f"DROP TABLE IF EXISTS {table}")
+    db_manager.commit()
+    yield db_manager
+    db_manager.close()
+
+def query(sql, params=None):
+    """
+    执行查询并返回全部结果
+    """
+    assert db_manager.execute(sql, params)
+    return db_manager.fetchall()
@@ -0,0 +1,60 @@
+import sqlite3
+import pandas as pd
+import pytest
+from db.ingest.board import (BOARD_BJ, BOARD_CHINEXT, BOARD_OTHER, BOARD_SH_MAIN, BOARD_STAR, BOARD_SZ_MAIN,
+                             allowed_boards, board_case_sql, board_series, boards_for_prefix, classify_board,
+                             split_except_prefixes)
+
+CODES = ['600519', '688981', '300750', '301001', '000001', '002594', '430047', '830799', '871981', '920002',
+         '900901', '200002', '1']
+
+# 每个三位代码段各取一个代码，用于比较按前缀排除和按板块排除的结果
+SEGMENT_CODES = [f"{i:03d}123" for i in range(1000)]
+
+def _excluded(codes, boards, prefixes):
+    return {code for code in codes if classify_board(code) in boards or code.startswith(tuple(prefixes))}
+
+def test_classify_board():
+    assert [classify_board(code) for code in CODES] == [
+        BOARD_SH_MAIN, BOARD_STAR, BOARD_CHINEXT, BOARD_CHINEXT, BOARD_SZ_MAIN, BOARD_SZ_MAIN, BOARD_BJ, BOARD_BJ,
+        BOARD_BJ, BOARD_BJ, BOARD_OTHER, BOARD_OTHER, BOARD_SZ_MAIN]
+    assert classify_board(None) is None
+
+def test_board_series_and_sql_match_classify_board():
+    codes = pd.Series(CODES + [None], dtype=object)
+    expected = [classify_board(code) for code in codes]
+    assert board_series(codes) == expected
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (stock_code TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(None if code is None else code.zfill(6),) for code in codes])
+    rows = conn.execute(f"SELECT CASE WHEN stock_code IS NULL THEN NULL ELSE {board_case_sql()} END FROM t").fetchall()
+    assert [row[0] for row in rows] == expected
+
+@pytest.mark.parametrize('prefix', ['300', '301', '688', '43', '83', '920', '8', '6', '30', '3001', '', 'abc'])
+def test_single_prefix_is_not_widened_to_a_board(prefix):
+    assert boards_for_prefix(prefix) == []
+
+@pytest.mark.parametrize('prefixes, boards, leftover', [
+    (['300'], [], ['300']),
+    (['300', '301', '302'], [BOARD_CHINEXT], []),
+    (['688', '689'], [BOARD_STAR], []),
+    (['43', '83', '87', '920'], [BOARD_BJ], []),
+    (['68'], [], ['68']),
+    (['8', '43', '920'], [BOARD_BJ], ['8']),
+    (['300', '301', '302', '600'], [BOARD_CHINEXT], ['600']),
+    ([' 300 ', '', 'abc'], [], ['300', 'abc']),
+])
+def test_split_except_prefixes(prefixes, boards, leftover):
+    assert split_except_prefixes(prefixes) == (boards, leftover)
+
+@pytest.mark.parametrize('prefixes', [
+    ['300'], ['300', '301', '302'], ['688', '689', '8'], ['8', '43', '920'], ['6'], ['0', '3'], ['43', '83', '87', '920'],
+])
+def test_split_except_prefixes_excludes_the_same_codes(prefixes):
+    boards, leftover = split_except_prefixes(prefixes)
+    assert _excluded(SEGMENT_CODES, boards, leftover) == _excluded(SEGMENT_CODES, [], prefixes)
+
+def test_allowed_boards():
+    assert allowed_boards([BOARD_STAR, BOARD_BJ]) == [BOARD_SH_MAIN, BOARD_CHINEXT, BOARD_SZ_MAIN, BOARD_OTHER]
+    assert allowed_boards(None)[-1] == BOARD_OTHER
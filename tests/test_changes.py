@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from benchmark.synthetic import make_yjyg_frame
+from db.ingest.changes import (CHANGE_NEW, CHANGE_CHANGED, classify_changes, record_changes, get_changed_stocks,
+                               get_existing_hashes)
+from db.ingest.normalize import ROW_HASH_SOURCE, add_row_fingerprints
+from db.ingest.specs import PREREPORT_SPEC
+
+SPEC = PREREPORT_SPEC
+
+def _frame(count=20, seed=1):
+    return add_row_fingerprints(make_yjyg_frame(count, seed=seed), SPEC.columns)
+
+def _existing(df, hashes=None):
+    """
+    由DataFrame构造get_existing_hashes格式的已入库记录
+    """
+    return pd.DataFrame({
+        'stock_code': df['股票代码'].to_numpy(),
+        'predict_indicator': df['预测指标'].to_numpy(),
+        'existing_hash': df[ROW_HASH_SOURCE].to_numpy() if hashes is None else hashes,
+    })
+
+def test_classify_new_changed_unchanged():
+    df = _frame()
+    existing = _existing(df.iloc[:10])
+    existing.loc[:4, 'existing_hash'] = 'stale'
+    result = classify_changes(df, SPEC.columns, SPEC.key_columns, existing)
+    assert result.index.equals(df.index)
+    assert (result.iloc[:5] == CHANGE_CHANGED).all()
+    assert result.iloc[5:10].isna().all()
+    assert (result.iloc[10:] == CHANGE_NEW).all()
+
+def test_classify_null_key_matches_empty_string():
+    df = _frame()
+    df.loc[df.index[:3], '预测指标'] = np.nan
+    df = add_row_fingerprints(df.drop(columns=[ROW_HASH_SOURCE]), SPEC.columns)
+    # 入库时缺失的键列写为空字符串，读回时也可能是旧数据中的NULL
+    existing = _existing(df)
+    existing.loc[0, 'predict_indicator'] = ''
+    existing.loc[1, 'predict_indicator'] = None
+    result = classify_changes(df, SPEC.columns, SPEC.key_columns, existing)
+    assert result.isna().all()
+
+def test_classify_duplicate_existing_keys():
+    df = _frame()
+    existing = pd.concat([_existing(df), _existing(df.iloc[:6], hashes=['old'] * 6)], ignore_index=True)
+    result = classify_changes(df, SPEC.columns, SPEC.key_columns, existing)
+    assert len(result) == len(df)
+    assert result.index.equals(df.index)
+
+def test_record_and_get_changed_stocks(db):
+    df = _frame(count=6)
+    types = pd.Series([CHANGE_NEW, CHANGE_CHANGED, None, None, CHANGE_NEW, None], index=df.index, dtype=object)
+    assert record_changes(SPEC.detail_table, '20250331', df, types)
+    db.commit()
+    expected = sorted(df['股票代码'].iloc[[0, 1, 4]])
+    assert get_changed_stocks('20250331', SPEC.detail_table) == expected
+    assert get_changed_stocks('20250331', 'stock_report') == []
+    assert get_changed_stocks('20250630') == []
+    assert get_existing_hashes(SPEC.detail_table, '20250331', SPEC.key_columns).empty
@@ -0,0 +1,63 @@
+import db.ingest.engine as engine_module
+from benchmark.synthetic import make_yjyg_frame
+from db.ingest.engine import IngestionEngine
+from db.ingest.specs import PREREPORT_SPEC
+from tests.conftest import query
+
+DATE = '20250331'
+
+def _fail_on_call(monkeypatch, failing_call):
+    """
+    让record_changes在第failing_call次调用时失败，模拟写到一半中断
+    """
+    original = engine_module.record_changes
+    calls = {'n': 0}
+
+    def flaky(*args, **kwargs):
+        calls['n'] += 1
+        return False if calls['n'] == failing_call else original(*args, **kwargs)
+    monkeypatch.setattr(engine_module, 'record_changes', flaky)
+
+def _header():
+    return query("SELECT status, record_count, checkpoint_chunk FROM stock_prereport_header")
+
+def test_resume_from_checkpoint(db, monkeypatch):
+    engine = IngestionEngine(PREREPORT_SPEC, watermark_enabled=False, chunk_size=100, checkpoint_enabled=True)
+    df = make_yjyg_frame(1000, seed=5)
+    _fail_on_call(monkeypatch, 5)
+    assert not engine.ingest(df.copy(), DATE)
+    assert _header() == [('FAILED', 400, 4)]
+    assert query("SELECT COUNT(*) FROM stock_preReport") == [(400,)]
+
+    monkeypatch.undo()
+    assert engine.ingest(df.copy(), DATE)
+    assert _header() == [('COMPLETED', 600, None)]
+    assert query("SELECT COUNT(*) FROM stock_preReport") == [(1000,)]
+    assert query("SELECT COUNT(*) FROM stock_change_log") == [(1000,)]
+
+def test_changed_source_restarts_from_beginning(db, monkeypatch):
+    engine = IngestionEngine(PREREPORT_SPEC, ingest_mode='upsert', watermark_enabled=False, chunk_size=100,
+                             checkpoint_enabled=True)
+    df = make_yjyg_frame(500, seed=6)
+    _fail_on_call(monkeypatch, 3)
+    assert not engine.ingest(df.copy(), DATE)
+    monkeypatch.undo()
+    df.loc[df.index[0], '预测数值'] = 1.0
+    assert engine.ingest(df.copy(), DATE)
+    assert _header() == [('COMPLETED', 301, None)]
+    assert query("SELECT COUNT(*) FROM stock_preReport") == [(500,)]
+
+def test_without_checkpoint_failure_rolls_back_period(db, monkeypatch):
+    engine = IngestionEngine(PREREPORT_SPEC, watermark_enabled=False, chunk_size=100, checkpoint_enabled=False)
+    _fail_on_call(monkeypatch, 3)
+    assert not engine.ingest(make_yjyg_frame(500, seed=7), DATE)
+    assert query("SELECT COUNT(*) FROM stock_preReport") == [(0,)]
+    assert _header() == [('FAILED', 0, None)]
+
+def test_existing_rows_keep_period_count(db):
+    engine = IngestionEngine(PREREPORT_SPEC, watermark_enabled=False)
+    df = make_yjyg_frame(50, seed=9)
+    assert engine.ingest(df, DATE)
+    assert engine.ingest(df, DATE)
+    assert query("SELECT status, record_count, remark FROM stock_prereport_header") == [
+        ('COMPLETED', 50, '数据已存在，无需更新')]
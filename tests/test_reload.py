@@ -0,0 +1,44 @@
+import pandas as pd
+from benchmark.synthetic import make_yjyg_frame
+from db.ingest.engine import IngestionEngine
+from db.ingest.specs import PREREPORT_SPEC
+from tests.conftest import query
+
+DATE = '20250331'
+
+def _rows():
+    return {(code, indicator): (row_id, value) for row_id, code, indicator, value in
+            query("SELECT id, stock_code, predict_indicator, predict_value FROM stock_preReport WHERE report_date = %s",
+                  (DATE,))}
+
+def test_reload_replaces_period_and_keeps_unchanged_rows(db):
+    engine = IngestionEngine(PREREPORT_SPEC, ingest_mode='insert', watermark_enabled=False)
+    df = make_yjyg_frame(100, seed=3)
+    assert engine.ingest(df, DATE)
+    before = _rows()
+
+    df2 = df.iloc[10:].copy()
+    df2.loc[df2.index[:5], '预测数值'] = 1.0
+    extra = make_yjyg_frame(3, seed=99)
+    extra['股票代码'] = ['920001', '920002', '920003']
+    df2 = pd.concat([df2, extra], ignore_index=True)
+    assert engine.reload(df2, DATE)
+
+    after = _rows()
+    assert len(after) == 93
+    removed = {(c, i) for c, i in zip(df['股票代码'].iloc[:10], df['预测指标'].iloc[:10])}
+    assert not removed & after.keys()
+    changed = list(zip(df2['股票代码'].iloc[:5], df2['预测指标'].iloc[:5]))
+    assert all(after[key][1] == 1.0 for key in changed)
+    untouched = list(zip(df2['股票代码'].iloc[5:90], df2['预测指标'].iloc[5:90]))
+    assert all(after[key][0] == before[key][0] for key in untouched)
+    assert query("SELECT COUNT(*) FROM stock_preReport_staging") == [(0,)]
+    assert query("SELECT status, record_count FROM stock_prereport_header") == [('COMPLETED', 8)]
+
+def test_reload_recreates_outdated_staging_table(db):
+    engine = IngestionEngine(PREREPORT_SPEC, watermark_enabled=False)
+    db.execute("CREATE TABLE stock_preReport_staging (id INTEGER, report_date TEXT, stock_code TEXT)")
+    db.commit()
+    assert engine.reload(make_yjyg_frame(20, seed=4), DATE)
+    assert db.table_columns('stock_preReport_staging') == db.table_columns('stock_preReport')
+    assert query("SELECT COUNT(*) FROM stock_preReport") == [(20,)]
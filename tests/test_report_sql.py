@@ -0,0 +1,79 @@
+import pytest
+from benchmark.synthetic import make_yjbb_frame, make_yjyg_frame
+from analyse.generate_report import (build_exceed_prereport_sql, build_exceed_report_sql, build_high_change_sql,
+                                     build_high_profit_growth_sql)
+from db.ingest.board import BOARD_STAR, classify_board
+from db.ingest.engine import IngestionEngine
+from db.ingest.specs import PREREPORT_SPEC, REPORT_SPEC
+from tests.conftest import query
+
+DATE = '20250331'
+
+def _config(**overrides):
+    config = {
+        'queryNum': 1000,
+        'multiple': {'low': 2, 'high': -1},
+        'netProfitYoy': {'low': 200, 'high': 1000},
+        'exceptStock': [],
+        'exceptBoard': [],
+    }
+    config.update(overrides)
+    return config
+
+@pytest.fixture
+def data(db):
+    prereport = make_yjyg_frame(300, seed=11)
+    report = make_yjbb_frame(300, seed=12)
+    assert IngestionEngine(PREREPORT_SPEC, watermark_enabled=False).ingest(prereport, DATE)
+    assert IngestionEngine(REPORT_SPEC, watermark_enabled=False).ingest(report, DATE)
+    return prereport, report
+
+@pytest.mark.parametrize('config', [
+    _config(),
+    _config(multiple={'low': 1.5, 'high': 5}, exceptStock=['300', '8'], exceptBoard=[BOARD_STAR]),
+])
+def test_placeholders_match_params(config):
+    builders = [
+        build_high_change_sql(DATE, config),
+        build_high_profit_growth_sql(DATE, config),
+        build_exceed_report_sql(DATE, config['exceptStock'], config['exceptBoard']),
+        build_exceed_prereport_sql(DATE, config['exceptStock'], config['exceptBoard']),
+    ]
+    for sql, params in builders:
+        assert sql.count('%s') == len(params)
+
+def test_high_change_filters_and_excludes(data):
+    config = _config(multiple={'low': 2, 'high': 8}, exceptStock=['600'], exceptBoard=[BOARD_STAR])
+    rows = query(*build_high_change_sql(DATE, config))
+    assert rows
+    codes = [row[0] for row in rows]
+    assert len(codes) == len(set(codes))
+    assert all(200 <= float(row[3]) <= 800 for row in rows)
+    assert not [code for code in codes if code.startswith('600') or classify_board(code) == BOARD_STAR]
+
+    prereport = data[0]
+    rates = prereport['业绩变动幅度']
+    expected = prereport[(rates >= 200) & (rates <= 800)]['股票代码']
+    expected = {code for code in expected if not code.startswith('600') and classify_board(code) != BOARD_STAR}
+    assert set(codes) == expected
+
+def test_board_filter_keeps_rows_without_board(db, data):
+    code = query("SELECT stock_code FROM stock_report WHERE board = %s AND net_profit > 0 LIMIT 1", (BOARD_STAR,))[0][0]
+    config = _config(exceptBoard=[BOARD_STAR])
+    assert code not in {row[0] for row in query(*build_high_profit_growth_sql(DATE, config))}
+    assert db.execute("UPDATE stock_report SET board = NULL WHERE stock_code = %s", (code,))
+    assert code in {row[0] for row in query(*build_high_profit_growth_sql(DATE, config))}
+
+def test_high_profit_growth_orders_and_limits(data):
+    rows = query(*build_high_profit_growth_sql(DATE, _config(queryNum=10)))
+    assert len(rows) == 10
+    assert all(float(row[2]) > 0 for row in rows)
+    assert [row[4] for row in rows] == sorted((row[4] for row in rows), reverse=True)
+
+def test_exceed_sql_returns_one_row_per_stock(data):
+    report_rows = query(*build_exceed_report_sql(DATE, ['300'], [BOARD_STAR]))
+    prereport_rows = query(*build_exceed_prereport_sql(DATE, ['300'], [BOARD_STAR]))
+    for rows in (report_rows, prereport_rows):
+        codes = [row[0] for row in rows]
+        assert codes and len(codes) == len(set(codes))
+        assert not [code for code in codes if code.startswith('300') or classify_board(code) == BOARD_STAR]
@@ -0,0 +1,16 @@
+from db.backends.sqlite_backend import translate_sql
+
+def test_null_safe_equal_outside_quotes_only():
+    (sql,) = translate_sql("SELECT '<=>', \"a<=>b\" FROM t WHERE a <=> b AND c = 'it''s <=>' AND d<=>e")
+    assert sql == "SELECT '<=>', \"a<=>b\" FROM t WHERE a  IS  b AND c = 'it''s <=>' AND d IS e"
+
+def test_placeholders_and_upsert():
+    (sql,) = translate_sql("INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = VALUES(b)")
+    assert sql == "INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT DO UPDATE SET b = excluded.b"
+
+def test_modify_column_is_skipped():
+    assert translate_sql("ALTER TABLE t MODIFY COLUMN a VARCHAR(10) NOT NULL DEFAULT ''") == ("SELECT 1",)
+
+def test_index_names_are_prefixed_with_table():
+    assert translate_sql("ALTER TABLE stock_report ADD INDEX idx_x (report_date)") == (
+        "CREATE INDEX IF NOT EXISTS stock_report_idx_x ON stock_report (report_date)",)
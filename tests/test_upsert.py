@@ -0,0 +1,64 @@
+import numpy as np
+from benchmark.synthetic import make_yjyg_frame
+from db import initDb
+from db.ingest.engine import IngestionEngine
+from db.ingest.specs import PREREPORT_SPEC
+from tests.conftest import query
+
+DATE = '20250331'
+
+def _engine(mode='upsert'):
+    return IngestionEngine(PREREPORT_SPEC, ingest_mode=mode, watermark_enabled=False)
+
+def _frame():
+    df = make_yjyg_frame(50, seed=8)
+    df.loc[df.index[:4], '预测指标'] = np.nan
+    return df
+
+def test_upsert_updates_changed_rows(db):
+    engine = _engine()
+    df = _frame()
+    assert engine.ingest(df, DATE)
+    df.loc[df.index[10], '预测数值'] = 123.45
+    assert engine.ingest(df, DATE)
+    assert query("SELECT COUNT(*) FROM stock_preReport WHERE report_date = %s", (DATE,)) == [(50,)]
+    code, indicator = df.loc[df.index[10], ['股票代码', '预测指标']]
+    assert query("SELECT predict_value FROM stock_preReport WHERE stock_code = %s AND predict_indicator = %s",
+                 (code, indicator)) == [(123.45,)]
+
+def test_upsert_null_key_does_not_duplicate(db):
+    engine = _engine()
+    df = _frame()
+    for step in range(3):
+        df.loc[df.index[:4], '预测数值'] += 1
+        assert engine.ingest(df, DATE)
+    assert query("SELECT COUNT(*), SUM(predict_indicator = '') FROM stock_preReport") == [(50, 4)]
+    assert engine.reload(df, DATE)
+    assert query("SELECT COUNT(*) FROM stock_preReport") == [(50,)]
+
+def test_insert_mode_skips_existing_stocks(db):
+    engine = _engine('insert')
+    df = _frame()
+    assert engine.ingest(df.iloc[:30], DATE)
+    df.loc[df.index[0], '预测数值'] = 1.0
+    assert engine.ingest(df, DATE)
+    assert query("SELECT COUNT(*) FROM stock_preReport") == [(50,)]
+    assert query("SELECT record_count FROM stock_prereport_header") == [(20,)]
+
+def test_ensure_key_columns_removes_null_key_duplicates(db, monkeypatch):
+    db.execute("DROP TABLE IF EXISTS legacy_prereport")
+    db.execute("CREATE TABLE legacy_prereport (id INTEGER PRIMARY KEY AUTOINCREMENT, report_date TEXT, "
+               "stock_code VARCHAR(10), predict_indicator VARCHAR(50))")
+    rows = [(DATE, '600000', None), (DATE, '600000', None), (DATE, '600000', ''), (DATE, '600000', '营业收入'),
+            ('20250630', '600000', None)]
+    db.bulk_insert('legacy_prereport', ['report_date', 'stock_code', 'predict_indicator'], rows)
+    db.commit()
+    monkeypatch.setattr(initDb, 'KEY_COLUMNS', [
+        ('legacy_prereport', ('stock_code', 'predict_indicator'),
+         "ALTER TABLE legacy_prereport MODIFY COLUMN predict_indicator VARCHAR(50) NOT NULL DEFAULT ''"),
+    ])
+    initDb.ensure_key_columns()
+    assert query("SELECT id, report_date, predict_indicator FROM legacy_prereport ORDER BY id") == [
+        (3, DATE, ''), (4, DATE, '营业收入'), (5, '20250630', '')]
+    db.execute("DROP TABLE legacy_prereport")
+    db.commit()
@@ -0,0 +1,239 @@
+import sys
+import os
+import time
+import logging
+import argparse
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, as_completed
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from log.logger import configure_logging  # 模块导入时已自动配置
+from tabulate import tabulate
+from db.db_manager import db_manager
+from db.ingest.engine import IngestionEngine
+from db.ingest.fetch_cache import fetch_cache
+from db.ingest.normalize import add_row_fingerprints
+from db.ingest.specs import DATASET_SPECS
+
+# 回补结果状态
+RESULT_COMPLETED = 'COMPLETED'
+RESULT_SKIPPED = 'SKIPPED'
+RESULT_EMPTY = 'EMPTY'
+RESULT_FAILED = 'FAILED'
+
+# 每个写线程同时占用的连接数：线程自己的连接 + 读取已入库指纹时流式读取借用的连接
+CONNECTIONS_PER_WRITER = 2
+
+# 每个写线程最多积压的已获取、未写入的报告期数，写库慢时获取线程等待，避免所有报告期的数据同时驻留内存
+PENDING_PER_WRITER = 2
+
+def quarter_end_periods(start, end):
+    """
+    生成起止日期之间（含）的所有季度末报告期
+
+    参数:
+        start: str, 起始日期，格式为YYYYMMDD
+        end: str, 结束日期，格式为YYYYMMDD
+
+    返回:
+        list: YYYYMMDD格式的报告期列表
+    """
+    periods = []
+    for year in range(int(start[:4]), int(end[:4]) + 1):
+        for month, day in ((3, 31), (6, 30), (9, 30), (12, 31)):
+            period = date(year, month, day).strftime('%Y%m%d')
+            if start <= period <= end:
+                periods.append(period)
+    return periods
+
+def load_periods(start, end):
+    """
+    从stock_period表读取起止日期之间的报告期，表不存在或为空时按季度末生成
+
+    参数:
+        start: str, 起始日期，格式为YYYYMMDD
+        end: str, 结束日期，格式为YYYYMMDD
+
+    返回:
+        list: YYYYMMDD格式的报告期列表
+    """
+    periods = []
+    try:
+        sql = "SELECT period FROM stock_period WHERE period BETWEEN %s AND %s ORDER BY period"
+        periods = [str(row[0]) for row in db_manager.fetch_iter(sql, (start, end))]
+    except Exception as e:
+        logging.warning(f"读取stock_period表失败，按季度末生成报告期: {e}")
+    if not periods:
+        periods = quarter_end_periods(start, end)
+    return periods
+
+class Backfill:
+    """
+    多报告期历史数据回补
+    获取和指纹计算在有界的线程池中并行执行，写库在单独的写线程池中通过连接池和批量写入完成
+    已获取、未写入的报告期数不超过 writers*PENDING_PER_WRITER，写库跟不上时获取线程等待
+    头表状态为COMPLETED的报告期直接跳过，因此中断后重新执行即可从断点继续
+    """
+
+    def __init__(self, datasets, workers=4, writers=2, force=False, ingest_mode=None, reload=False):
+        """
+        初始化回补任务
+
+        参数:
+            datasets: list, 数据集名称列表，见db.ingest.specs.DATASET_SPECS
+            workers: int, 并行获取数据的线程数
+            writers: int, 并行写库的线程数，连接池上限不足 writers*2+1 时自动提高
+            force: bool, 为True时已完成的报告期也重新处理
+            ingest_mode: str, insert/upsert，默认使用INGEST_MODE
+            reload: bool, 为True时通过暂存表整期重载，替换各报告期的全部明细数据（同时视为force）
+        """
+        # 回补历史数据时不按水位线切片，整期数据都参与比对
+        self.engines = {name: IngestionEngine(DATASET_SPECS[name], ingest_mode=ingest_mode, watermark_enabled=False)
+                        for name in datasets}
+        self.workers = max(1, int(workers))
+        self.writers = max(1, int(writers))
+        self._ensure_pool_capacity()
+        self.reload = reload
+        self.force = force or reload
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(self.writers * PENDING_PER_WRITER)
+        self.results = []
+
+    def _ensure_pool_capacity(self):
+        """
+        每个写线程同时占用CONNECTIONS_PER_WRITER个连接，主线程检查头表状态再占用一个
+        连接池上限不足时提高上限，否则写线程会互相等待连接直到checkout超时
+        """
+        if db_manager.pool is None:
+            return
+        needed = self.writers * CONNECTIONS_PER_WRITER + 1
+        if db_manager.pool.max_size < needed:
+            logging.info(f"写库线程{self.writers}个需要{needed}个数据库连接，"
+                         f"连接池上限由{db_manager.pool.max_size}提高到{needed}")
+            db_manager.pool.grow(needed)
+
+    def _is_completed(self, engine, period):
+        try:
+            return engine.get_header_status(period) == 'COMPLETED'
+        finally:
+            db_manager.close()
+
+    def _record(self, dataset, period, status, rows=0, elapsed=0.0, remark=''):
+        with self._lock:
+            self.results.append([dataset, period, status, rows, round(elapsed, 2), remark])
+        logging.info(f"回补 {dataset} {period}: {status} {remark}")
+
+    def _fetch(self, name, period):
+        """
+        获取一个报告期的数据并预先计算行内容指纹，在获取线程中执行
+        获取前占用一个积压名额，写入完成（或获取失败、没有数据）后释放
+        """
+        engine = self.engines[name]
+        self._pending.acquire()
+        try:
+            start = time.perf_counter()
+            df = engine.fetch(period)
+            if df is not None and not df.empty:
+                df = add_row_fingerprints(df, engine.spec.columns)
+            return df, time.perf_counter() - start
+        except Exception:
+            self._pending.release()
+            raise
+
+    def _write(self, name, period, df, fetch_seconds):
+        """
+        入库一个报告期的数据，在写线程中执行，每个线程使用自己的池化连接
+        """
+        engine = self.engines[name]
+        start = time.perf_counter()
+        try:
+            success = engine.reload(df, period) if self.reload else engine.ingest(df, period)
+            rows = engine.count_rows(period)
+        finally:
+            db_manager.close()
+            self._pending.release()
+        elapsed = fetch_seconds + time.perf_counter() - start
+        if success:
+            self._record(name, period, RESULT_COMPLETED, rows, elapsed)
+        else:
+            self._record(name, period, RESULT_FAILED, rows, elapsed, "入库失败")
+
+    def run(self, periods):
+        """
+        回补指定报告期
+
+        参数:
+            periods: list, YYYYMMDD格式的报告期列表
+
+        返回:
+            bool: 所有报告期是否都没有失败
+        """
+        tasks = []
+        for period in periods:
+            for name, engine in self.engines.items():
+                if not self.force and self._is_completed(engine, period):
+                    self._record(name, period, RESULT_SKIPPED, remark="已完成")
+                    continue
+                tasks.append((name, period))
+        logging.info(f"回补任务: {len(tasks)}个（报告期{len(periods)}个，数据集{len(self.engines)}个），"
+                     f"获取线程{self.workers}个，写库线程{self.writers}个")
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='fetch') as fetch_pool, \
+                ThreadPoolExecutor(max_workers=self.writers, thread_name_prefix='write') as write_pool:
+            fetches = {fetch_pool.submit(self._fetch, name, period): (name, period) for name, period in tasks}
+            writes = []
+            for future in as_completed(fetches):
+                # 取出后不再持有已完成的获取结果，数据只由写任务引用
+                name, period = fetches.pop(future)
+                try:
+                    df, fetch_seconds = future.result()
+                except Exception as e:
+                    self._record(name, period, RESULT_FAILED, remark=f"获取失败: {e}")
+                    continue
+                if df is None or df.empty:
+                    self._pending.release()
+                    self._record(name, period, RESULT_EMPTY, elapsed=fetch_seconds, remark="没有数据")
+                    continue
+                writes.append(write_pool.submit(self._write, name, period, df, fetch_seconds))
+            for future in as_completed(writes):
+                future.result()
+
+        self.results.sort(key=lambda row: (row[1], row[0]))
+        return all(row[2] != RESULT_FAILED for row in self.results)
+
+def main():
+    parser = argparse.ArgumentParser(description="按报告期范围并行回补业绩报告和业绩预告历史数据，中断后重新执行即可续传")
+    parser.add_argument("--start", required=True, help="起始报告期，格式为YYYYMMDD")
+    parser.add_argument("--end", required=True, help="结束报告期，格式为YYYYMMDD")
+    parser.add_argument("--datasets", default=",".join(DATASET_SPECS), help="逗号分隔的数据集名称")
+    parser.add_argument("--workers", type=int, default=4, help="并行获取数据的线程数")
+    parser.add_argument("--writers", type=int, default=2, help="并行写库的线程数，每个线程占用2个数据库连接，连接池上限不足时自动提高")
+    parser.add_argument("--mode", choices=["insert", "upsert"], default=None, help="入库方式，默认使用INGEST_MODE")
+    parser.add_argument("--force", action="store_true", help="已完成的报告期也重新处理")
+    parser.add_argument("--reload", action="store_true", help="通过暂存表整期重载，替换已入库的明细数据")
+    parser.add_argument("--refresh", action="store_true", help="忽略本地缓存，重新获取原始数据")
+    args = parser.parse_args()
+    fetch_cache.refresh = args.refresh
+
+    datasets = [name.strip() for name in args.datasets.split(',') if name.strip()]
+    unknown = [name for name in datasets if name not in DATASET_SPECS]
+    if unknown:
+        parser.error(f"未知的数据集: {unknown}，可选: {list(DATASET_SPECS)}")
+
+    periods = load_periods(args.start, args.end)
+    db_manager.close()
+    if not periods:
+        print("指定范围内没有报告期")
+        return
+
+    backfill = Backfill(datasets, workers=args.workers, writers=args.writers, force=args.force, ingest_mode=args.mode,
+                        reload=args.reload)
+    start = time.perf_counter()
+    ok = backfill.run(periods)
+    print(tabulate(backfill.results, headers=["数据集", "报告期", "结果", "明细行数", "耗时(秒)", "备注"]))
+    print(f"回补完成，总耗时 {time.perf_counter() - start:.1f} 秒")
+    db_manager.log_run_summary()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
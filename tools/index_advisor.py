@@ -0,0 +1,149 @@
+import sys
+import os
+import re
+import logging
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from log.logger import configure_logging  # 模块导入时已自动配置
+from tabulate import tabulate
+from db.db_manager import db_manager
+from db import initDb
+from analyse.generate_report import (load_config, get_target_report_dates, build_exceed_report_sql,
+                                     build_exceed_prereport_sql, build_high_change_sql, build_high_profit_growth_sql)
+
+# SQLite没有忽略索引的提示，在保存点中临时删除索引后查看执行计划，再回滚
+_SAVEPOINT = 'index_advisor'
+
+def screen_queries(prereport_date, exceed_date, config):
+    """
+    分析报告中各筛选查询的SQL，与analyse.generate_report实际执行的语句一致
+
+    返回:
+        list: [(查询名称, 表名, sql, params)]
+    """
+    except_stock = config.get('exceptStock', [])
+    except_board = config.get('exceptBoard', [])
+    return [
+        ('业绩预告高变动', 'stock_prereport') + build_high_change_sql(prereport_date, config),
+        ('业绩超预期-当期业绩', 'stock_report') + build_exceed_report_sql(exceed_date, except_stock, except_board),
+        ('业绩超预期-预告', 'stock_prereport') + build_exceed_prereport_sql(exceed_date, except_stock, except_board),
+        ('净利润同比增长', 'stock_report') + build_high_profit_growth_sql(exceed_date, config),
+    ]
+
+def explain(sql, params):
+    """
+    获取查询的执行计划
+
+    返回:
+        list: 执行计划各行，{列名: 值}；执行失败时返回None
+    """
+    if not db_manager.execute(db_manager.backend.explain_sql(sql), params):
+        return None
+    columns = [d[0].lower() for d in db_manager.cursor.description]
+    return [dict(zip(columns, row)) for row in db_manager.fetchall()]
+
+def summarize(plan):
+    """
+    汇总执行计划：扫描行数、使用的索引和附加信息
+    MySQL的rows为各实际表的预计扫描行数之和（不含派生表）；SQLite的执行计划没有行数，返回None
+
+    返回:
+        tuple: (扫描行数, 使用的索引, 附加信息)
+    """
+    if plan is None:
+        return None, '执行失败', ''
+    if plan and 'rows' in plan[0]:
+        tables = [r for r in plan if r.get('table') and not str(r['table']).startswith('<')]
+        rows = sum(int(r['rows'] or 0) for r in tables)
+        keys = ', '.join(str(r['key']) if r.get('key') else '全表扫描' for r in tables)
+        extra = '; '.join(dict.fromkeys(str(r['extra']) for r in tables if r.get('extra')))
+        return rows, keys, extra
+    # 只保留访问实际表和临时排序的步骤
+    details = [str(r.get('detail', '')) for r in plan]
+    details = [d for d in details if 'TEMP B-TREE' in d or re.match(r"(SEARCH|SCAN) stock_", d)]
+    keys = ', '.join(dict.fromkeys(m for d in details for m in re.findall(r"USING (?:COVERING )?INDEX (\w+)", d)))
+    return None, keys or '全表扫描', '; '.join(details)
+
+def _ignore_indexes(sql, table, indexes):
+    """
+    MySQL：给查询中的表加上IGNORE INDEX提示，模拟建索引之前的执行计划
+    """
+    return re.sub(rf"\bFROM\s+{table}\b", f"FROM {table} IGNORE INDEX ({', '.join(indexes)})", sql, flags=re.IGNORECASE)
+
+def explain_without(sql, params, table, indexes):
+    """
+    获取不使用指定索引时的执行计划，不修改线上表结构
+    MySQL使用IGNORE INDEX提示；SQLite的DDL可以回滚，在保存点中删除索引后查看执行计划再回滚
+    """
+    if not indexes:
+        return explain(sql, params)
+    if db_manager.backend.name == 'mysql':
+        return explain(_ignore_indexes(sql, table, indexes), params)
+
+    db_manager.execute(f"SAVEPOINT {_SAVEPOINT}")
+    try:
+        for index_name in indexes:
+            db_manager.execute(f"ALTER TABLE {table} DROP INDEX {index_name}")
+        return explain(sql, params)
+    finally:
+        db_manager.execute(f"ROLLBACK TO {_SAVEPOINT}")
+        db_manager.execute(f"RELEASE {_SAVEPOINT}")
+
+def _change(before, after):
+    if before is None or after is None:
+        return '-'
+    if before == 0:
+        return '0%'
+    return f"{(after - before) / before:+.0%}"
+
+def advise(prereport_date, exceed_date, config):
+    """
+    对每个筛选查询比较建筛选索引之前和之后的执行计划
+
+    返回:
+        list: 表格行
+        list: 尚未创建的筛选索引 [(表名, 索引名)]
+    """
+    existing = {}
+    missing = []
+    for table_name, index_name, _ in initDb.SCREEN_INDEXES:
+        if db_manager.index_exists(table_name, index_name):
+            existing.setdefault(table_name, []).append(index_name)
+        else:
+            missing.append((table_name, index_name))
+
+    rows = []
+    for name, table, sql, params in screen_queries(prereport_date, exceed_date, config):
+        before_rows, before_keys, before_extra = summarize(explain_without(sql, params, table, existing.get(table, [])))
+        after_rows, after_keys, after_extra = summarize(explain(sql, params))
+        rows.append([name, table, before_rows if before_rows is not None else '-', after_rows if after_rows is not None else '-',
+                     _change(before_rows, after_rows), before_keys, after_keys, before_extra, after_extra])
+    return rows, missing
+
+def main():
+    parser = argparse.ArgumentParser(description="对分析报告的各筛选查询执行EXPLAIN，比较建筛选索引前后的扫描行数和执行计划")
+    parser.add_argument("--date", default=None, help="分析的报告期，格式为YYYYMMDD，默认按QUERY_DATE配置确定")
+    parser.add_argument("--apply", action="store_true", help="先创建缺少的筛选索引（同initDb中的补建索引）")
+    args = parser.parse_args()
+
+    config = load_config()
+    prereport_date, exceed_date = get_target_report_dates(args.date or config['queryDate'])
+    if not db_manager.connect():
+        logging.error("数据库连接失败")
+        sys.exit(1)
+    try:
+        if args.apply:
+            initDb.ensure_indexes()
+        rows, missing = advise(prereport_date, exceed_date, config)
+    finally:
+        db_manager.close()
+
+    print(f"预告分析期: {prereport_date}，业绩分析期: {exceed_date}，数据库: {db_manager.backend.name}")
+    print(tabulate(rows, headers=["查询", "表", "之前扫描行数", "之后扫描行数", "变化", "之前索引", "之后索引",
+                                  "之前执行计划", "之后执行计划"]))
+    if missing:
+        print("以下筛选索引尚未创建，\"之后\"与\"之前\"相同，可使用 --apply 或运行 db/initDb.py 创建: "
+              + ", ".join(f"{table}.{index}" for table, index in missing))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import sys
 import os
+import argparse
 import dotenv
 from datetime import datetime
 import traceback
@@ -18,6 +19,8 @@ from db.pre.main_preReport import process_preReport_data
 
 from analyse.date_utils import get_next_quarter_end, get_prev_quarter_end,get_prev_prev_quarter_end
 from analyse.generate_report import main as generate_report_main
+from db.db_manager import db_manager
+from db.ingest.fetch_cache import fetch_cache
 
 from api.miniApi import send_user_sub_message
  
@@ -154,11 +157,18 @@ if __name__ == "__main__":
 
 
     # 从命令行参数获取日期
-
-    date_param = sys.argv[1] if len(sys.argv) > 1 else None
+    parser = argparse.ArgumentParser(description="处理业绩报告和业绩预告数据并生成分析报告")
+    parser.add_argument("date", nargs="?", default=None, help="处理日期，格式为YYYYMMDD，默认按上一个季度末计算")
+    parser.add_argument("--refresh", action="store_true", help="忽略本地缓存，重新获取原始数据")
+    args = parser.parse_args()
+    date_param = args.date
+    fetch_cache.refresh = args.refresh
     
     # 执行处理
     report_result, prereport_result = process_daily_report(date_param)
+    
+    db_manager.log_run_summary()
+    logging.info(f"原始数据缓存统计: {fetch_cache.stats()}")
 
    
     